@@ -1,5 +1,6 @@
 import glm
 import pygame as pg
+from typing import Tuple
 
 FOV = 90  # deg
 NEAR = 0
@@ -34,6 +35,37 @@ class Camera:
         self.move()
         self.update_camera_vectors()
         self.m_view = self.get_view_matrix()
+        self.update_frame_uniforms()
+
+    def get_visible_rect(self, z:float=0.0) -> Tuple[glm.vec2, glm.vec2]:
+        # (min, max) corners of what the camera sees on the plane at height z, for culling
+        inv_view_proj = glm.inverse(self.m_proj * self.m_view)
+        corners = []
+        for x, y in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+            near = inv_view_proj * glm.vec4(x, y, -1, 1)
+            far = inv_view_proj * glm.vec4(x, y, 1, 1)
+            near, far = near.xyz / near.w, far.xyz / far.w
+            corners.append(glm.mix(near, far, (z - near.z) / (far.z - near.z)).xy)
+        return (
+            glm.vec2(min(c.x for c in corners), min(c.y for c in corners)),
+            glm.vec2(max(c.x for c in corners), max(c.y for c in corners)),
+        )
+
+    def pixels_per_unit(self, distance:float=None) -> float:
+        # screen px one world unit covers `distance` in front of the camera (the z = 0 plane by default), what the projection zooms by
+        if distance is None:
+            distance = self.position.z
+        height = self.app.mesh.vao.Framebuffers.framebuffers["default"].image_out[0].size[1]
+        return self.m_proj[1][1] * height / 2 / max(distance, 1.0) # 1 == the projection's near plane
+
+    def update_frame_uniforms(self): # the "frame" include every shader can read, once per frame instead of per object
+        frame = self.app.mesh.vao.frame
+        frame["view"] = self.m_view
+        frame["proj"] = self.m_proj
+        frame["viewProj"] = self.m_proj * self.m_view
+        frame["cameraPos"] = self.position
+        frame["time"] = self.app.elapsed_time
+        frame["resolution"] = self.app.mesh.vao.Framebuffers.framebuffers["default"].image_out[0].size
 
     def move(self):
         if self.freemove:
@@ -1,5 +1,6 @@
 from engine.vao import VAOs
 from engine.texture import Textures
+from engine.sprite_batch import SpriteBatches
 
 
 class Mesh:
@@ -7,7 +8,9 @@ class Mesh:
 		self.app = app
 		self.vao = VAOs(app)
 		self.texture = Textures(app.ctx)
+		self.sprites = SpriteBatches(app)
 
 	def destroy(self):
+		self.sprites.destroy()
 		self.vao.destroy()
 		self.texture.destroy()
\ No newline at end of file
@@ -1,7 +1,30 @@
+from typing import Any, Dict, Tuple
+
+# (program name, vertex shader name, sorted defines), one Shader per variant
+VariantKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+def define_value(value:Any) -> str:
+    return str(int(value)) if isinstance(value, bool) else str(value)
+
+
+def add_defines(source:str, defines:Dict[str, Any]) -> str:
+    # #version has to stay the first line, the defines go right under it
+    if not defines:
+        return source
+    version, _, rest = source.partition("\n")
+    lines = "".join(f"#define {name} {define_value(value)}\n" for name, value in sorted(defines.items()))
+    return f"{version}\n{lines}{rest}"
+
+
 class Shader:
-    def __init__(self, vertex_shader, fragment_shader, **future_stuff): # future stuff like mesh shading, not nessacary for now so not doin it
+    def __init__(self, vertex_shader, fragment_shader, name:str=None, vertex_name:str=None, defines:Dict[str, Any]=None, **future_stuff): # future stuff like mesh shading, not nessacary for now so not doin it
         self.vertex_shader   = vertex_shader
         self.fragment_shader = fragment_shader
+        # which variant this is, ShaderPrograms.get_variant builds the others from it
+        self.name = name
+        self.vertex_name = vertex_name
+        self.defines:Dict[str, Any] = dict(defines or {})
         
         self.blend_data = {
             "enable": True,
@@ -9,41 +32,71 @@ class Shader:
             "dst_color": "one_minus_src_alpha",
         }
 
+    def uses_include(self, name:str) -> bool:
+        return f'#include "{name}"' in self.vertex_shader or f'#include "{name}"' in self.fragment_shader
+
     def destroy(self): # Goodbye world
         del self.vertex_shader, self.fragment_shader
 
 class ShaderPrograms:
     def __init__(self):
+        self.sources:Dict[str, str] = {} # file name -> glsl, every file is read once
+        self.variants:Dict[VariantKey, Shader] = {} # every Shader ever handed out, self.programs included
         self.programs = {}
         self.programs['default'] = self.get_program('default')
         self.programs['planet'] = self.get_program('planet')
+        self.programs['planet_count'] = self.get_program('planet_count', vertex_name='planet') # same coverage as the planets
+        self.programs['planet_count'].blend_data = {"enable": True, "src_color": "one", "dst_color": "one"}
+        self.programs['planet_resolve'] = self.get_program('planet_resolve')
+        self.programs['planet_resolve'].blend_data = {"enable": False} # writes the planet id into alpha
+        self.programs['planet_composite'] = self.get_program('planet_composite', vertex_name='planet')
+        self.programs['planet_impostor'] = self.get_program('planet_impostor')
         self.programs['player'] = self.get_program('player')
+        self.programs['sprite'] = self.get_program('sprite')
+        self.programs['particle'] = self.get_program('particle')
+        self.programs['gpu_particle'] = self.get_program('gpu_particle')
+        self.programs['gpu_particle_sim'] = self.get_program('gpu_particle_sim')
+        self.programs['gpu_particle_sim'].blend_data = {"enable": False} # writes particle state, not colours
         self.programs['ui'] = self.get_program('ui')
         self.programs['main_menu_ui'] = self.get_program('main_menu_ui')
         self.programs['tilemap'] = self.get_program('tilemap') # TODO: make shader
         self.programs['background'] = self.get_program('background') # TODO: make shader
         self.programs['post_process'] = self.get_program('post_process')
 
-    def get_program(self, shader_program_name):
-        with open(f'shaders/{shader_program_name}.vert.glsl') as file:
-            vertex_shader = file.read()
-        
-        
-        with open(f'shaders/{shader_program_name}.frag.glsl') as file:
-            fragment_shader = file.read()
-        
-        
-        program = Shader(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
+    def get_source(self, file_name:str) -> str:
+        if file_name not in self.sources:
+            with open(f'shaders/{file_name}') as file:
+                self.sources[file_name] = file.read()
+        return self.sources[file_name]
+
+    def get_program(self, shader_program_name, vertex_name:str=None, defines:Dict[str, Any]=None):
+        # defines get #define'd into both stages, same arguments == same Shader, so VAOs share its pipelines
+        defines = defines or {}
+        key = (shader_program_name, vertex_name, tuple(sorted((name, define_value(value)) for name, value in defines.items())))
+        if key in self.variants:
+            return self.variants[key]
+
+        vertex_shader = add_defines(self.get_source(f'{vertex_name or shader_program_name}.vert.glsl'), defines)
+        fragment_shader = add_defines(self.get_source(f'{shader_program_name}.frag.glsl'), defines)
+        program = Shader(vertex_shader=vertex_shader, fragment_shader=fragment_shader, name=shader_program_name, vertex_name=vertex_name, defines=defines)
+        if defines and shader_program_name in self.programs: # variants blend like the program they're a variant of
+            program.blend_data = dict(self.programs[shader_program_name].blend_data)
+        self.variants[key] = program
         return program
-        
+
+    def get_variant(self, program:Shader, defines:Dict[str, Any]) -> Shader:
+        # `program` with some defines added or changed
+        return self.get_program(program.name, program.vertex_name, {**program.defines, **defines})
+
     def add_program(self, shader_program_name): # called on startup
-        self.programs[shader_program_name] = self.get_program('shader_program_name')
+        self.programs[shader_program_name] = self.get_program(shader_program_name)
         
     def del_program(self, shader_program_name): # called on startup
-        self.programs[shader_program_name].destroy()
-        del self.programs[shader_program_name]
+        program = self.programs.pop(shader_program_name)
+        self.variants = {key: variant for key, variant in self.variants.items() if variant is not program}
+        program.destroy()
 
     def destroy(self):
-        [program.destroy() for program in self.programs.values()] # Ehh why not
-        del self.programs
+        [program.destroy() for program in self.variants.values()] # Ehh why not
+        del self.programs, self.variants, self.sources
         del self
\ No newline at end of file
@@ -0,0 +1,149 @@
+from typing import TYPE_CHECKING, Dict, Sequence
+import numpy as np
+import glm
+
+from engine.vbo import InstancingVBO
+
+if TYPE_CHECKING:
+    import zengl
+    from engine.vao import VAO
+    from engine.texture import Texture
+
+
+# one row per sprite, uploaded as-is into the instance buffer
+# 0-15 model matrix (column major, one vec4 attribute per column), 16-19 tint, 20 layer, 21 frame, 22 flip, 23 unused
+INSTANCE_FLOATS = 24
+INSTANCE_FORMAT = "4f 4f 4f 4f 4f 4f"
+INSTANCE_ATTRIBS = ("in_model_0", "in_model_1", "in_model_2", "in_model_3", "in_tint", "in_sprite")
+SPRITE_CAPACITY = 256
+
+
+class SpriteBatch:
+    """Every sprite sampling the same texture array, drawn with one instanced call.
+
+    add() sprites during the frame, render() once, the batch empties itself afterwards.
+    """
+    def __init__(self, app, texture:"Texture", capacity:int=SPRITE_CAPACITY, fbo:str="default", program:str="sprite"):
+        self.app = app
+        self.ctx:"zengl.Context" = app.ctx
+        self.texture = texture
+        self.fbo = fbo
+        self.program = program
+
+        self.count = 0
+        self.instances:np.ndarray = None
+        self.ibo:InstancingVBO = None
+        self.vao:"VAO" = None
+        self.reserve(capacity)
+
+    def reserve(self, capacity:int):
+        # growing keeps the VAO, only its instance buffer gets reallocated (and the pipelines that had it baked in)
+        instances = np.zeros((capacity, INSTANCE_FLOATS), dtype="f4")
+        if self.instances is not None:
+            instances[:self.count] = self.instances[:self.count]
+        self.instances = instances
+        if self.vao is not None:
+            self.vao.grow_instances(self.instances.nbytes)
+            return
+
+        self.ibo = InstancingVBO(self.ctx, self.ctx.buffer(size=self.instances.nbytes), INSTANCE_FORMAT, *INSTANCE_ATTRIBS, offset=2)
+        self.vao = self.app.mesh.vao.get_ins_vao(
+            fbo=self.app.mesh.vao.Framebuffers.framebuffers[self.fbo],
+            program=self.app.mesh.vao.program.programs[self.program],
+            vbo=self.app.mesh.vao.vbo.vbos["plane"],
+            ibo=self.ibo,
+            umap={
+                "key_color": "vec3", # colour that gets discarded, black like the rest of the sprites
+            },
+            tmap=["Sprites"],
+        )
+        self.vao.texture_bind(0, "Sprites", self.texture)
+
+    def push(self, count:int) -> np.ndarray:
+        # hands out the next `count` rows, growing the batch if needed
+        if self.count + count > len(self.instances):
+            self.reserve(max(len(self.instances) * 2, self.count + count))
+        rows = self.instances[self.count:self.count + count]
+        self.count += count
+        return rows
+
+    def add(self, m_model:glm.mat4, layer:int=0, frame:int=0, flip:bool=False, tint:Sequence[float]=(1, 1, 1, 1)):
+        row = self.push(1)[0]
+        row[0:16] = np.asarray(m_model.to_list(), dtype="f4").ravel() # to_list gives the columns
+        row[16:20] = tint
+        row[20:23] = (layer, frame, flip)
+
+    def add_many(
+        self,
+        positions:np.ndarray,
+        scales:np.ndarray,
+        rotations:np.ndarray = None,
+        layers:np.ndarray = 0,
+        frames:np.ndarray = 0,
+        flips:np.ndarray = 0,
+        tints:np.ndarray = (1, 1, 1, 1),
+    ):
+        # same transform as translate * rotate(z) * scale, built for all sprites at once
+        positions = np.asarray(positions, dtype="f4")
+        n = len(positions)
+        if n == 0:
+            return
+        scales = np.broadcast_to(np.asarray(scales, dtype="f4"), (n, 2))
+        angles = np.radians(np.broadcast_to(np.asarray(0 if rotations is None else rotations, dtype="f4"), (n,)))
+        cos, sin = np.cos(angles), np.sin(angles)
+
+        rows = self.push(n)
+        rows[:, 0:16] = 0
+        rows[:, 0] = cos * scales[:, 0]
+        rows[:, 1] = sin * scales[:, 0]
+        rows[:, 4] = -sin * scales[:, 1]
+        rows[:, 5] = cos * scales[:, 1]
+        rows[:, 10] = 1
+        rows[:, 12:12 + positions.shape[1]] = positions
+        rows[:, 15] = 1
+        rows[:, 16:20] = tints
+        rows[:, 20] = layers
+        rows[:, 21] = frames
+        rows[:, 22] = flips
+
+    def render(self):
+        if self.count:
+            # the draw is deferred to the arena flush, the buffer is only written once a frame
+            self.ibo.vbo.write(self.instances[:self.count])
+            self.vao.texture_bind(0, "Sprites", self.texture)
+            self.vao.render(instance_count=self.count)
+        self.count = 0
+
+    def release(self):
+        if self.vao is not None:
+            self.vao.destroy()
+            self.ibo.destroy()
+            self.vao = self.ibo = None
+
+    def destroy(self):
+        self.release()
+        self.instances = None
+
+
+class SpriteBatches:
+    """One SpriteBatch per texture array, scenes render them all after their objects updated"""
+    def __init__(self, app):
+        self.app = app
+        self.batches:Dict[str, SpriteBatch] = {}
+
+    def get_batch(self, texture_name:str, **kwargs) -> SpriteBatch:
+        if texture_name not in self.batches:
+            self.batches[texture_name] = SpriteBatch(self.app, self.app.mesh.texture.textures[texture_name], **kwargs)
+        return self.batches[texture_name]
+
+    def del_batch(self, texture_name:str):
+        if texture_name in self.batches:
+            self.batches.pop(texture_name).destroy()
+
+    def render(self):
+        for batch in self.batches.values():
+            batch.render()
+
+    def destroy(self):
+        [batch.destroy() for batch in self.batches.values()]
+        self.batches = {}
@@ -209,4 +209,5 @@ class Textures:
         del self.textures[texture_name]
 
     def destroy(self):
+        self.ctx.release(self.textures.pop("NUL_IMG")) # a bare image, every VAO's empty sampler slots point at it
         [tex.destroy(self.ctx) for tex in self.textures.values()]
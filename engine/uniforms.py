@@ -0,0 +1,169 @@
+from typing import Dict, List, Tuple, Any
+import re
+import numpy as np
+import zengl
+
+
+# glsl type: (numpy type, rows, columns, GL enum reported by the driver)
+# rows == components per column, so vecN is (N, 1) and matN is (N, N)
+GLSL_TYPES:Dict[str, Tuple[str, int, int, int]] = {
+    "float": ("f4", 1, 1, 0x1406),
+    "vec2":  ("f4", 2, 1, 0x8B50),
+    "vec3":  ("f4", 3, 1, 0x8B51),
+    "vec4":  ("f4", 4, 1, 0x8B52),
+    "int":   ("i4", 1, 1, 0x1404),
+    "ivec2": ("i4", 2, 1, 0x8B53),
+    "ivec3": ("i4", 3, 1, 0x8B54),
+    "ivec4": ("i4", 4, 1, 0x8B55),
+    "uint":  ("u4", 1, 1, 0x1405),
+    "uvec2": ("u4", 2, 1, 0x8DC6),
+    "uvec3": ("u4", 3, 1, 0x8DC7),
+    "uvec4": ("u4", 4, 1, 0x8DC8),
+    "bool":  ("i4", 1, 1, 0x8B56), # bools are 4 bytes in std140
+    "mat2":  ("f4", 2, 2, 0x8B5A),
+    "mat3":  ("f4", 3, 3, 0x8B5B),
+    "mat4":  ("f4", 4, 4, 0x8B5C),
+}
+
+GLSL_DECL = re.compile(r"^\s*(\w+)\s*(?:\[\s*(\d+)\s*\])?\s*$")
+
+
+def round_up(value:int, align:int) -> int:
+    return (value + align - 1) // align * align
+
+
+class UniformField:
+    def __init__(self, name:str, glsl_type:str):
+        match = GLSL_DECL.match(glsl_type)
+        if match is None or match.group(1) not in GLSL_TYPES:
+            raise NotImplementedError(f"Either unknown GLSL type: {glsl_type} or not Implemented")
+
+        self.name = name
+        self.glsl_type = glsl_type
+        self.base_type = match.group(1)
+        self.array = int(match.group(2)) if match.group(2) else 0 # 0 == not an array
+        self.dtype, self.rows, self.columns, self.gltype = GLSL_TYPES[self.base_type]
+
+        # std140: matrices are arrays of column vectors, arrays pad every element to a vec4
+        padded = self.columns > 1 or self.array
+        if padded:
+            self.align = 16
+            self.stride = 16 * self.columns
+            self.size = self.stride * max(self.array, 1)
+            self.shape = ((self.array,) if self.array else ()) + ((self.columns,) if self.columns > 1 else ()) + (4,)
+        else:
+            self.align = {1: 4, 2: 8, 3: 16, 4: 16}[self.rows]
+            self.size = 4 * self.rows
+            self.shape = (self.rows,) if self.rows > 1 else ()
+        self.padded = padded
+        self.offset = 0
+
+    def view(self, array:np.ndarray) -> np.ndarray:
+        # strips the std140 padding so callers can assign the glsl shaped value
+        field = array[self.name]
+        if self.padded:
+            field = field[..., :self.rows] if self.rows > 1 else field[..., 0]
+        return field
+
+
+class UniformLayout:
+    """Compiles a {name: glsl_type} uniforms map into a std140 numpy dtype + the glsl block."""
+    def __init__(self, uniforms_map:Dict[str, str]):
+        self.fields:Dict[str, UniformField] = {}
+        offset = 0
+
+        for uf_name, uf_type in uniforms_map.items():
+            field = UniformField(uf_name, uf_type)
+            field.offset = round_up(offset, field.align)
+            offset = field.offset + field.size
+            self.fields[uf_name] = field
+
+        self.size = round_up(max(offset, 4), 16)
+        self.offsets:Dict[str, int] = {name: field.offset for name, field in self.fields.items()}
+        self.dtype = np.dtype({
+            "names": list(self.fields.keys()),
+            "formats": [(field.dtype, field.shape) for field in self.fields.values()],
+            "offsets": list(self.offsets.values()),
+            "itemsize": self.size,
+        })
+
+    def glsl(self, block_name:str="Common") -> str:
+        members = "".join(f"{field.glsl_type} {name};\n" for name, field in self.fields.items())
+        return f"layout (std140) uniform {block_name} {{{members if self.fields else 'float dummy;'}}};"
+
+    def validate(self, pipeline:"zengl.Pipeline", block_name:str="Common"):
+        # checks the layout against what the driver compiled from the glsl block
+        _, uniforms, uniform_buffers = zengl.inspect(pipeline)["interface"]
+        for block in uniform_buffers:
+            if block["name"] == block_name and round_up(block["size"], 16) != self.size:
+                raise ValueError(f'Uniform block "{block_name}" is {block["size"]} bytes in glsl but {self.size} in the layout')
+
+        for uniform in uniforms:
+            name = uniform["name"].removesuffix("[0]")
+            if name not in self.fields or uniform["location"] != -1: # samplers and other blocks
+                continue
+            field = self.fields[name]
+            if uniform["gltype"] != field.gltype or uniform["size"] != max(field.array, 1):
+                raise ValueError(f'Uniform "{name}" does not match its glsl declaration "{field.glsl_type}"')
+
+
+class UniformBlock:
+    """One contiguous std140 block, assign fields like block['m_view'] = mat"""
+    def __init__(self, layout:UniformLayout, buffer:bytearray=None, offset:int=0):
+        # buffer lets the block live inside a bigger allocation (the VAOs' uniform arena)
+        self.layout = layout
+        if buffer is None:
+            buffer, offset = bytearray(layout.size), 0
+        self.offset = offset
+        self.array:np.ndarray = np.ndarray((), dtype=layout.dtype, buffer=buffer, offset=offset)
+        self.data:memoryview = memoryview(buffer)[offset:offset + layout.size]
+        self.dirty:List[int] = [layout.size, 0] # byte range that still needs uploading
+
+    def __contains__(self, name:str) -> bool:
+        return name in self.layout.fields
+
+    def __getitem__(self, name:str) -> np.ndarray:
+        # the view can be written through, so assume it will be
+        field = self.layout.fields[name]
+        self.mark_dirty(field.offset, field.offset + field.size)
+        return field.view(self.array)
+
+    def __setitem__(self, name:str, value:Any):
+        field = self.layout.fields[name]
+        view = field.view(self.array)
+        if hasattr(value, "to_list"): # glm types, their buffer is row major but to_list gives columns
+            value = value.to_list()
+        value = np.asarray(value, dtype=view.dtype)
+        if np.array_equal(view, value):
+            return # same value as last time, nothing to upload
+        view[...] = value
+        self.mark_dirty(field.offset, field.offset + field.size)
+
+    def write(self, name:str, value:bytes):
+        # raw bytes at the field offset, for struct.pack / glm.to_bytes() callers
+        field = self.layout.fields[name]
+        value = memoryview(value).cast("B")
+        if value.nbytes > field.size:
+            raise ValueError(f'{value.nbytes} bytes do not fit in uniform "{name}" ({field.glsl_type})')
+
+        start, end = field.offset, field.offset + value.nbytes
+        if self.data[start:end] == value:
+            return
+        self.data[start:end] = value
+        self.mark_dirty(start, end)
+
+    def mark_dirty(self, start:int, end:int):
+        self.dirty[0] = min(self.dirty[0], start)
+        self.dirty[1] = max(self.dirty[1], end)
+
+    def clean(self) -> bool:
+        # returns if anything changed since the last clean
+        changed = self.dirty[0] < self.dirty[1]
+        self.dirty = [self.layout.size, 0]
+        return changed
+
+    def flush(self, buffer:"zengl.Buffer", offset:int=0): # one upload of everything that changed
+        start, end = self.dirty
+        if start < end:
+            buffer.write(self.data[start:end], offset=offset + start)
+            self.dirty = [self.layout.size, 0]
@@ -2,7 +2,24 @@ from typing import TYPE_CHECKING, Dict, List, Tuple, Literal, Any
 from engine.shader_program import ShaderPrograms, Shader
 from engine.vbo import VBOs
 from engine.fbo import Framebuffers
-import struct, zengl
+from engine.uniforms import UniformLayout, UniformBlock
+import re, struct, zengl
+
+PIPELINE_CACHE_SIZE = 8 # binding states per VAO, times the arena's frame slices and the shader variants in use, least recently used pipelines get released past that
+ARENA_SIZE = 1 << 18 # bytes of uniforms per frame, every VAO gets a slice
+ARENA_FRAMES = 3 # triple buffered so we never write into what the gpu is still reading
+ARENA_ALIGN = 256 # GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT is <= 256 pretty much everywhere
+UNUSED_BINDING = re.compile(r'Cannot set layout binding for "(\w+)"') # zengl's error for a name the driver compiled out
+
+# shared by every shader that does #include "frame", filled once per frame by Camera.update
+FRAME_UNIFORMS = {
+    "view": "mat4",
+    "proj": "mat4",
+    "viewProj": "mat4",
+    "cameraPos": "vec3",
+    "time": "float",
+    "resolution": "vec2",
+}
 
 if TYPE_CHECKING:
     from main import Game
@@ -12,6 +29,114 @@ if TYPE_CHECKING:
     from texture import Texture
 
 
+class UniformArena:
+    """One big uniform buffer shared by every VAO, uploaded in one write per frame"""
+    def __init__(self, ctx:"zengl.Context", size:int=ARENA_SIZE, frames:int=ARENA_FRAMES):
+        self.ctx = ctx
+        self.size = size
+        self.frames = frames
+        self.buffer:"zengl.Buffer" = self.ctx.buffer(size=size * frames)
+        self.data:bytearray = bytearray(size) # what the current frame's slice should contain
+        self.view:memoryview = memoryview(self.data)
+
+        self.top:int = 0 # everything past this is unused
+        self.free_list:List[Tuple[int, int]] = [] # (offset, size) holes left by destroyed VAOs
+        self.frame:int = 0
+        self.uploaded:bool = False # if this frame's slice got its one write already
+        self.stale:int = 0 # how many frame slices are still behind self.data, goes down once per frame
+        self.blocks:List[UniformBlock] = []
+        self.draws:List[Tuple["zengl.Pipeline", int]] = []
+
+    def block(self, layout:UniformLayout) -> UniformBlock:
+        block = UniformBlock(layout, self.data, self.alloc(layout.size))
+        block.mark_dirty(0, layout.size) # the slices could still hold whatever was here before
+        self.blocks.append(block)
+        return block
+
+    def release(self, block:UniformBlock):
+        self.blocks.remove(block)
+        self.free(block.offset, block.layout.size)
+
+    def alloc(self, size:int) -> int:
+        size = (size + ARENA_ALIGN - 1) // ARENA_ALIGN * ARENA_ALIGN
+        for i, (offset, free_size) in enumerate(self.free_list):
+            if free_size >= size:
+                if free_size == size:
+                    del self.free_list[i]
+                else:
+                    self.free_list[i] = (offset + size, free_size - size)
+                return offset
+
+        if self.top + size > self.size:
+            raise MemoryError(f"Uniform arena is full ({self.size} bytes), make ARENA_SIZE bigger")
+        offset = self.top
+        self.top += size
+        return offset
+
+    def free(self, offset:int, size:int):
+        size = (size + ARENA_ALIGN - 1) // ARENA_ALIGN * ARENA_ALIGN
+        self.view[offset:offset + size] = bytes(size)
+        if offset + size == self.top:
+            self.top = offset
+        else:
+            self.free_list.append((offset, size))
+
+    def resource(self, block:UniformBlock, binding:int=0) -> Dict[str, Any]:
+        # where a block lives in this frame's copy of the arena
+        return {
+            "type": "uniform_buffer",
+            "binding": binding,
+            "buffer": self.buffer,
+            "offset": self.frame * self.size + block.offset,
+            "size": block.layout.size,
+        }
+
+    def submit(self, pipeline:"zengl.Pipeline", instance_count:int):
+        self.draws.append((pipeline, instance_count))
+
+    def changed(self) -> Tuple[int, int]:
+        # byte range of the arena written since the last flush, empty when start >= end
+        start, end = self.size, 0
+        for block in self.blocks:
+            if block.dirty[0] < block.dirty[1]:
+                start = min(start, block.offset + block.dirty[0])
+                end = max(end, block.offset + block.dirty[1])
+            block.clean()
+        return start, end
+
+    def flush(self):
+        # uniforms are final once the frame's draws are recorded, the first flush of a frame uploads them into
+        # this frame's slice, the ones after it (postprocessor, end_frame) only replay what got recorded since
+        start, end = self.changed()
+        if start < end:
+            self.stale = self.frames
+
+        offset = self.frame * self.size
+        if not self.uploaded:
+            if self.stale and self.top:
+                self.buffer.write(self.view[:self.top], offset=offset)
+                self.stale -= 1
+            self.uploaded = True
+        elif start < end:
+            # written after this frame's upload (reports, VAOs made mid frame), only the changed bytes go into this slice
+            self.buffer.write(self.view[start:end], offset=offset + start)
+            self.stale = self.frames - 1
+
+        for pipeline, instance_count in self.draws:
+            pipeline.instance_count = instance_count # mutable on zengl pipelines, no rebuild needed
+            pipeline.render()
+        self.draws.clear()
+
+    def new_frame(self):
+        if self.draws: # recorded before the frame started, they belong to the slice they were recorded with
+            self.flush()
+        self.frame = (self.frame + 1) % self.frames
+        self.uploaded = False
+
+    def destroy(self):
+        self.ctx.release(self.buffer)
+
+
 class VAO:
     def __init__(
         self,
@@ -26,23 +151,38 @@ class VAO:
     ):
         self.app = app
         self.ctx:"zengl.Context" = app.ctx
-        self.uniforms, self.ufs_size, self.ufs_includes = self.pack_uniforms(
-            uniforms_map
-        )
+        self.ufs_layout:UniformLayout = UniformLayout(uniforms_map)
+        self.ufs_size:int = self.ufs_layout.size
+        self.ufs_includes:Dict[str, str] = {"uniforms": self.ufs_layout.glsl("Common")}
+        self.arena:UniformArena = app.mesh.vao.arena
+        self.block:UniformBlock = self.arena.block(self.ufs_layout) # CPU side lives in the arena
+        self.frame:UniformBlock = app.mesh.vao.frame
+        self.ufs_includes["frame"] = app.mesh.vao.frame_include
         self.shader:"Shader" = shader
+        self.base_shader:"Shader" = shader # set_variant() defines are on top of this one
         self.FBO:"FBO" = FBO
         self.VBO:"VBO" = VBO
         self.IBO:"IBO" = IBO
         self.dynaforms:Dict[str, Any] = {}
         
-        self.uniform_buffer:"zengl.Buffer" = self.ctx.buffer(size=self.ufs_size)
         self.please_update:bool  = False
+        self.pipelines:Dict[Tuple, "zengl.Pipeline"] = {} # binding state -> pipeline
+        self.templates:Dict["Shader", "zengl.Pipeline"] = {} # one compiled pipeline per shader variant, the rest are made from it
+        self.unused:Dict["Shader", List[int]] = {} # texture bindings a variant's defines turned into dead code
         self.NUL_IMG = self.app.mesh.texture.textures["NUL_IMG"]
         
-        self.layout = [{"name": "Common", "binding": 0}]
+        # (binding, block), shaders without #include "uniforms" don't get a Common block
+        self.uniform_blocks:List[Tuple[int, UniformBlock]] = []
+        self.layout = []
+        if shader.uses_include("uniforms"):
+            self.uniform_blocks.append((0, self.block))
+            self.layout.append({"name": "Common", "binding": 0})
+        if shader.uses_include("frame"):
+            self.uniform_blocks.append((1, self.frame))
+            self.layout.append({"name": "Frame", "binding": 1})
         [self.layout.append({"name": textures_name, "binding": i}) for i, textures_name in enumerate(textures_names)]
         
-        self.resources = [{"type": "uniform_buffer", "binding": 0, "buffer": self.uniform_buffer}]
+        self.resources = self.get_uniform_resources()
         self.ptb = len(self.resources)
         
         for i in range(len(textures_names)):
@@ -60,37 +200,82 @@ class VAO:
 
         self.construct_pipeline(instance_count=instance_count)
 
+    def get_uniform_resources(self) -> List[Dict[str, Any]]:
+        return [self.arena.resource(block, binding) for binding, block in self.uniform_blocks]
+
+    def get_pipeline_key(self) -> Tuple:
+        # everything that gets baked into a zengl pipeline, images and buffers hash by identity
+        return (
+            self.shader,
+            tuple(self.FBO.get_FBO()),
+            self.FBO.get_viewport(),
+            tuple(tuple(sorted(resource.items())) for resource in self.resources),
+            tuple(sorted(self.shader.blend_data.items())),
+            tuple(self.dynaforms),
+        )
+
+    def get_resources(self) -> List[Dict[str, Any]]:
+        # self.resources minus the textures the current variant doesn't sample, the driver has nothing to bind those to
+        unused = self.unused.get(self.shader)
+        if not unused:
+            return self.resources
+        return [resource for i, resource in enumerate(self.resources) if i - self.ptb not in unused]
+
     def reconstruct_pipeline(self, instance_count:int=1):
-        layout = self.layout
-        resources = self.resources
-        
-        old_line = self.pipeline 
-        if (self.dynaforms=={}):
-            self.pipeline = self.ctx.pipeline(
-                template=old_line,
-                resources=resources,
-                framebuffer=self.FBO.get_FBO(),
-                viewport=self.FBO.get_viewport(),
-                blend=self.shader.blend_data,
-                instance_count=instance_count,
-            )
-        else:
-            self.pipeline = self.ctx.pipeline(
-                template=old_line,
-                resources=resources,
-                framebuffer=self.FBO.get_FBO(),
-                viewport=self.FBO.get_viewport(),
-                blend=self.shader.blend_data,
-                uniforms=self.dynaforms,
-                instance_count=instance_count,
-            )
-        self.ctx.release(old_line)
+        key = self.get_pipeline_key()
+        pipeline = self.pipelines.pop(key, None) # pop + reinsert keeps the dict in LRU order
+
+        if pipeline is None:
+            if (self.dynaforms=={}):
+                pipeline = self.ctx.pipeline(
+                    template=self.template,
+                    resources=self.get_resources(),
+                    framebuffer=self.FBO.get_FBO(),
+                    viewport=self.FBO.get_viewport(),
+                    blend=self.shader.blend_data,
+                    instance_count=instance_count,
+                )
+            else:
+                pipeline = self.ctx.pipeline(
+                    template=self.template,
+                    resources=self.get_resources(),
+                    framebuffer=self.FBO.get_FBO(),
+                    viewport=self.FBO.get_viewport(),
+                    blend=self.shader.blend_data,
+                    uniforms=self.dynaforms,
+                    instance_count=instance_count,
+                )
+            self.evict_pipelines(self.pipeline_cache_size() - 1)
+
+        self.pipelines[key] = pipeline
+        self.pipeline = pipeline
         self.please_update = False
+
+    def pipeline_cache_size(self) -> int:
+        # the arena offset is part of the key (zengl has no dynamic offsets), so every binding state has a pipeline per slice
+        return PIPELINE_CACHE_SIZE * self.arena.frames * max(len(self.templates), 1)
+
+    def evict_pipelines(self, max_size:int=0):
+        for key in list(self.pipelines.keys()):
+            if len(self.pipelines) <= max_size:
+                break
+            if self.pipelines[key] is self.templates.get(key[0]): # every other pipeline is built from it
+                continue
+            self.ctx.release(self.pipelines.pop(key))
+
+    def release_pipelines(self):
+        for key, pipeline in self.pipelines.items():
+            if pipeline is not self.templates.get(key[0]):
+                self.ctx.release(pipeline)
+        self.pipelines = {}
+        [self.ctx.release(template) for template in self.templates.values()]
+        self.templates = {}
         
         
     def construct_pipeline(self, instance_count:int=1):
-        layout = self.layout
-        resources = self.resources
+        unused = self.unused.setdefault(self.shader, [])
+        layout = [entry for i, entry in enumerate(self.layout) if i - self.ptb not in unused]
+        resources = self.get_resources()
 
         if self.IBO != None:
             buffers = [
@@ -102,27 +287,70 @@ class VAO:
                 *zengl.bind(self.VBO.vbo, self.VBO.format, *self.VBO.locations),
             ]
         
-        self.pipeline = self.ctx.pipeline(
-            includes=self.ufs_includes,
-            vertex_shader=self.shader.vertex_shader,
-            fragment_shader=self.shader.fragment_shader,
-            layout=layout,
-            resources=resources,
-            framebuffer=self.FBO.get_FBO(),
-            topology="triangles",
-            viewport=self.FBO.get_viewport(),
-            vertex_buffers=buffers,
-            vertex_count=self.VBO.vbo.size // zengl.calcsize(self.VBO.format),
-            cull_face=self.VBO.cull_face,
-            blend=self.shader.blend_data,
-            instance_count=instance_count,
-            depth={
-                "write": True,
-                "func": "lequal",
-            },
-        )
+        try:
+            self.pipeline = self.ctx.pipeline(
+                includes=self.ufs_includes,
+                vertex_shader=self.shader.vertex_shader,
+                fragment_shader=self.shader.fragment_shader,
+                layout=layout,
+                resources=resources,
+                framebuffer=self.FBO.get_FBO(),
+                topology="triangles",
+                viewport=self.FBO.get_viewport(),
+                vertex_buffers=buffers,
+                vertex_count=self.VBO.vbo.size // zengl.calcsize(self.VBO.format),
+                cull_face=self.VBO.cull_face,
+                blend=self.shader.blend_data,
+                instance_count=instance_count,
+                depth={
+                    "write": True,
+                    "func": "lequal",
+                },
+            )
+        except ValueError as error:
+            # a variant's defines can turn a sampler into dead code, leave it out and try again
+            unused_name = UNUSED_BINDING.fullmatch(str(error))
+            textures = [entry["name"] for entry in self.layout[self.ptb:]]
+            if unused_name is None or unused_name.group(1) not in textures:
+                raise
+            unused.append(textures.index(unused_name.group(1)))
+            return self.construct_pipeline(instance_count)
+        self.ufs_layout.validate(self.pipeline, "Common")
+        self.template:"zengl.Pipeline" = self.pipeline
+        self.templates[self.shader] = self.pipeline
+        self.pipelines[self.get_pipeline_key()] = self.pipeline
+
+    def set_variant(self, defines:Dict[str, Any]):
+        # switches to the variant of the shader this VAO was made with + `defines`, compiled the first time it's used
+        shader = self.app.mesh.vao.program.get_variant(self.base_shader, defines)
+        if shader is self.shader:
+            return
+        self.shader = shader
+        if shader in self.templates:
+            self.template = self.templates[shader]
+            self.please_update = True # the pipeline for the current bindings is probably cached too
+        else:
+            self.construct_pipeline(self.pipeline.instance_count)
+
+    def grow_instances(self, size:int):
+        # a bigger instance buffer for the same VAO, uniforms and textures stay. zengl bakes the buffer into the pipelines so only those get rebuilt
+        if self.IBO.vbo.size >= size:
+            return
+        self.flush_pending() # they still read the old buffer
+        instance_count = self.pipeline.instance_count
+        self.release_pipelines()
+        self.ctx.release(self.IBO.vbo)
+        self.IBO.vbo = self.ctx.buffer(size=size)
+        self.construct_pipeline(instance_count)
+
+    def flush_pending(self):
+        # runs the arena's recorded draws if any of them is ours, before our pipelines get released
+        pipelines = [id(pipeline) for pipeline in self.pipelines.values()]
+        if any(id(pipeline) in pipelines for pipeline, _ in self.arena.draws):
+            self.arena.flush()
 
     def reload_shaders(self):
+        self.release_pipelines()
         self.construct_pipeline()
 
 
@@ -132,7 +360,7 @@ class VAO:
     
         if ( image.filter[0].startswith("linear") or
              image.filter[1].startswith("linear") ):
-            self.resources[binding + self.ptb] = \
+            resource = \
             {
                 "type": "sampler",
                 "binding": binding,
@@ -141,11 +369,11 @@ class VAO:
                 "mag_filter": image.filter[1],
                 "wrap_x": image.repeat[0],  # clamp_to_edge == you need to give 0 - 1
                 "wrap_y": image.repeat[1],  # repeat == automatically repeats texture
-                'max_anisotropy': self.max_anisotropy,
-                'lod_bias': self.lod_bias,
+                'max_anisotropy': image.max_anisotropy,
+                'lod_bias': image.lod_bias,
             }
         else:
-            self.resources[binding + self.ptb] = \
+            resource = \
             {
                 "type": "sampler",
                 "binding": binding,
@@ -155,173 +383,51 @@ class VAO:
                 "wrap_x": image.repeat[0],  # clamp_to_edge == you need to give 0 - 1
                 "wrap_y": image.repeat[1],  # repeat == automatically repeats texture
             }
-            
-        self.layout[binding + self.ptb] = {"name": name, "binding": binding}
+
+        layout = {"name": name, "binding": binding}
+        if self.resources[binding + self.ptb] == resource and self.layout[binding + self.ptb] == layout:
+            return # same texture, same pipeline
+
+        self.resources[binding + self.ptb] = resource
+        self.layout[binding + self.ptb] = layout
         
         self.please_update = True
 
-    def render(self, instance_count:int=1):
+    def render(self, instance_count:int=None):
+        resources = self.get_uniform_resources()
+        if self.resources[:self.ptb] != resources: # arena moved on to the next frame's slice
+            self.resources[:self.ptb] = resources
+            self.please_update = True
+
         if self.please_update:
-            self.reconstruct_pipeline(instance_count)
-            
-        self.pipeline.render()
+            self.reconstruct_pipeline(self.pipeline.instance_count if instance_count is None else instance_count)
+
+        self.arena.submit(self.pipeline, self.pipeline.instance_count if instance_count is None else instance_count)
 
     def uniform_bind(self, name, value): # FOR UPDATING INCLUDES
-        try:
-            self.uniform_buffer.write(value, offset=self.uniforms[name])
-        except: # UH OH, ITS NOT IN THE BUFFER. DO SOMETHING ABOUT IT
+        if name not in self.block: # UH OH, ITS NOT IN THE BUFFER. DO SOMETHING ABOUT IT
             print("OPTIMIZE YOUR CODE NEXT TIME", name, value)
+            return
 
-    @staticmethod
-    def pack_uniforms(uniforms_map):
-        uniforms = {}
-        layout = ""
-        offset = 0
-        
-        # TO READER, PLEASE MAKE THIS SWITCH CASE
-        # WARNING :-:-: TACTICAL CODEMESS INCOMING 
-        for uf_name, uf_data in uniforms_map.items():
-            data_type = uf_data
-            v = len(uf_data)-1
-            if uf_data == "float":
-                size = 4  # Size of a float in bytes
-                align = 4
-            elif uf_data == "vec2":
-                size = 8  # 2 floats
-                align = 8
-            elif uf_data == "vec3":
-                size = 12  # 3 floats, but aligned as vec4 in std140 layout
-                align = 16
-            elif uf_data == "vec4":
-                size = 16  # 4 floats
-                align = 16
-                
-            elif uf_data == "mat2":
-                size = 16  # 2x2 floats
-                align = 16  # aligned as vec4 in std140 layout
-            elif uf_data == "mat3":
-                size = 48  # 3x3 floats, but aligned as mat4 in std140 layout
-                align = 16  # aligned as mat4 in std140 layout
-            elif uf_data == "mat4":
-                size = 64  # 4x4 floats
-                align = 16
-              
-            elif uf_data == "int":
-                size = 4  # 1 i32
-                align = 4
-            elif uf_data == "ivec2":
-                size = 8  # 2 i32
-                align = 8
-            elif uf_data == "ivec3":
-                size = 12  # 3 i32
-                align = 16
-            elif uf_data == "ivec4":
-                size = 16  # 4 i32
-                align = 16
-              
-            elif uf_data == "imat2":
-                size = 16  # 2x2 ints
-                align = 16  # aligned as vec4 in std140 layout
-            elif uf_data == "imat3":
-                size = 48  # 3x3 ints, but aligned as ivec4 in std140 layout
-                align = 16  # aligned as imat4 in std140 layout
-            elif uf_data == "imat4":
-                size = 64  # 4x4 ints
-                align = 16
-            elif data_type == 'bool':
-                size = 4
-                align = 4
-                
-                
-            elif data_type.startswith("float"):
-                arr_size = data_type[6:v]
-                size  = 4 * int(arr_size)
-                align = 16
-            elif data_type.startswith("vec2"):
-                arr_size = data_type[5:v]
-                size  = 8 * int(arr_size)
-                align = 16
-            elif data_type.startswith("vec3"):
-                arr_size = data_type[5:v]
-                size  = 16 * int(arr_size)
-                align = 16
-            elif data_type.startswith("vec4"):
-                arr_size = data_type[5:v]
-                size  = 16 * int(arr_size)
-                align = 16
-
-            elif data_type.startswith("mat2"):
-                arr_size = data_type[5:v]
-                size  = 16 * int(arr_size)
-                align = 16  # aligned as vec4 in std140 layout
-            elif data_type.startswith("mat3"):
-                arr_size = data_type[5:v]
-                size  = 48 * int(arr_size)
-                align = 16  # aligned as mat4 in std140 layout
-            elif data_type.startswith("mat4"):
-                arr_size = data_type[5:v]
-                size  = 64 * int(arr_size)
-                align = 16
-              
-            elif data_type.startswith("int"):
-                arr_size = data_type[5:v]
-                size  = 4 * int(arr_size)
-                align = 4
-            elif data_type.startswith("ivec2"):
-                arr_size = data_type[5:v]
-                size  = 8 * int(arr_size)
-                align = 8
-            elif data_type.startswith("ivec3"):
-                arr_size = data_type[5:v]
-                size  = 16 * int(arr_size)
-                align = 16
-            elif data_type.startswith("ivec4"):
-                arr_size = data_type[5:v]
-                size  = 16 * int(arr_size)
-                align = 16
-
-            elif data_type.startswith("imat2"):
-                arr_size = data_type[5:v]
-                size  = 8 * int(arr_size)
-                align = 8  # aligned as vec4 in std140 layout
-            elif data_type.startswith("imat3"):
-                arr_size = data_type[5:v]
-                size  = 64 * int(arr_size)
-                align = 64  # aligned as mat4 in std140 layout
-            elif data_type.startswith("imat4"):
-                arr_size = data_type[5:v]
-                size  = 64 * int(arr_size)
-                align = 64
-              
-            else:
-                raise NotImplementedError(
-                    f"Either unknown GLSL type: {uf_data['glsl_type']} or not Implemented"
-                )
-
-            # Add padding for alignment
-            if offset % align != 0:
-                offset += align - (offset % align)
-
-            uniforms[uf_name] = offset
-            offset += size
-            layout += f"{uf_data} {uf_name};\n"
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            self.block.write(name, value)
+        else:
+            self.block[name] = value
 
-        includes = f"""
-                layout (std140) uniform Common {{{layout if uniforms else 'float dummy;'}}};
-            """
-        buffer_size = 16 + offset
-        return uniforms, buffer_size, {"uniforms": includes.strip()}
-        
     def destroy(self):
-        self.ctx.release(self.pipeline)
-        self.ctx.release(self.uniform_buffer)
-        self.ctx.release(self.NUL_IMG)
+        self.flush_pending()
+        self.release_pipelines()
+        self.arena.release(self.block) # NUL_IMG is shared by every VAO, Textures owns it
 
 
 class VAOs:
     def __init__(self, app):
         self.app = app
         self.ctx = app.ctx
+        self.arena:UniformArena = UniformArena(self.ctx)
+        self.frame_layout:UniformLayout = UniformLayout(FRAME_UNIFORMS)
+        self.frame:UniformBlock = self.arena.block(self.frame_layout)
+        self.frame_include:str = self.frame_layout.glsl("Frame")
         self.Framebuffers:Framebuffers = Framebuffers(self.ctx)
         self.vbo:VBOs = VBOs(self.ctx)
         self.program:ShaderPrograms = ShaderPrograms()
@@ -362,9 +468,18 @@ class VAOs:
     def del_vao(self, vao_name):
         self.vaos[vao_name].destroy()
         del self.vaos[vao_name]
+
+    def new_frame(self): # use these instead of ctx.new_frame / ctx.end_frame
+        self.arena.new_frame()
+        self.ctx.new_frame()
+
+    def end_frame(self):
+        self.arena.flush()
+        self.ctx.end_frame()
         
 
     def destroy(self):
         [vao.destroy() for vao in self.vaos.values()]
+        self.arena.destroy()
         self.vbo.destroy()
         self.program.destroy()
\ No newline at end of file
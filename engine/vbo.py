@@ -10,6 +10,7 @@ class VBOs:
 	def __init__(self, ctx):
 		self.vbos:Dict[str, "VBO"] = {}
 		self.vbos['plane'] = PlaneVBO(ctx)
+		self.vbos['circle'] = CircleVBO(ctx)
 
 	def destroy(self) -> None:
 		[vbo.destroy() for vbo in self.vbos.values()]
@@ -61,6 +62,28 @@ class PlaneVBO(VBO):
 		return vertex_data
 		
 		
+class CircleVBO(VBO):
+	"""A polygon just around the unit circle, for things that are round anyway (planets).
+
+	Same layout as PlaneVBO, texcoords are position * 0.5 + 0.5, so shaders written for the plane work as is.
+	The 8 sided one covers ~83% of the plane, the 4 corners it cuts off never get rasterized.
+	"""
+	def __init__(self, ctx, sides:int=8):
+		self.sides = sides
+		super().__init__(ctx)
+		self.format:str = '2f 3f'
+		self.locations:List[int] = [0, 1]
+		self.attribs:List[str] = ['in_texcoord_0', 'in_position']
+
+	def get_vertex_data(self) -> np.ndarray:
+		# edges touch the circle, so the corners are 1 / cos(pi / sides) out
+		angles = np.arange(self.sides) * 2 * np.pi / self.sides + np.pi / self.sides
+		corners = np.stack([np.cos(angles), np.sin(angles)], axis=1) / np.cos(np.pi / self.sides)
+		fan = [(0, i, i + 1) for i in range(1, self.sides - 1)] # counter clockwise, front facing like the plane
+		positions = corners[np.array(fan).ravel()]
+		return np.hstack([positions * 0.5 + 0.5, positions, np.ones((len(positions), 1))]).astype('f4')
+
+
 class TriangleVBO(VBO):
 	def __init__(self, ctx):
 		super().__init__(ctx)
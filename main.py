@@ -36,6 +36,11 @@ WEB = True if sys.platform in ("wasi", "emscripten") else False
 
 WIN_SIZE = 640, 360
 
+FPS = 60 # render rate, the simulation doesn't care
+TICK_RATE = 120 # simulation steps per second
+FIXED_DT = 1 / TICK_RATE
+MAX_FRAME_TIME = 0.25 # a longer hitch just slows the game down instead of running hundreds of ticks
+
 
 class Game:
     def __init__(self, win_size=(640, 480)):
@@ -82,6 +87,9 @@ class Game:
         self.elapsed_frames = 0
         self.delta_time = 0
         self.elapsed_time = 0
+        self.accumulator = 0 # frame time not simulated yet
+        self.alpha = 0 # how far rendering is between the last two ticks
+        self.ticks = 0
         print(self.ctx.info)
 
         # camera
@@ -103,6 +111,16 @@ class Game:
             self.events
         )  # this is where resizing windows and idk what goes
 
+    def simulate(self, frame_time:float):
+        # run however many fixed ticks fit, the leftover gets interpolated when rendering
+        self.accumulator += min(frame_time, MAX_FRAME_TIME)
+        while self.accumulator >= FIXED_DT:
+            self.scene_manager.tick(FIXED_DT)
+            self.accumulator -= FIXED_DT
+            self.ticks += 1
+        self.alpha = self.accumulator / FIXED_DT
+        self.scene_manager.interpolate(self.alpha)
+
     def render(self):
         self.scene_manager.update()
         # print(self.scene_manager.scene)
@@ -116,10 +134,11 @@ class Game:
         while True:
             self.elapsed_frames += 1
             self.check_events()
+            self.simulate(self.delta_time)
             self.camera.update()
             self.render()
 
-            self.delta_time = self.clock.tick(60) / 1000
+            self.delta_time = self.clock.tick(FPS) / 1000
             self.elapsed_time += self.delta_time
             self.fps = 1 / self.delta_time
             
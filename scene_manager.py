@@ -8,6 +8,17 @@ class SceneManager():
         self.current_scene = scene.default_scene
         self.pls_loadscene = False
         
+    def tick(self, dt):
+        # fixed rate simulation for the scene's objects that have one, can run 0..n times a frame
+        for obj in self.scene.opaque_objects + self.scene.tp_objects:
+            if hasattr(obj, "tick"):
+                obj.tick(dt)
+
+    def interpolate(self, alpha):
+        for obj in self.scene.opaque_objects + self.scene.tp_objects:
+            if hasattr(obj, "interpolate"):
+                obj.interpolate(alpha)
+
     def update(self):
         self.scene.update()
         if self.pls_loadscene:
@@ -24,17 +24,18 @@ class MenuScene:
         self.add_opaque_object(MainMenu(self.app))
 
     def update(self):
-        self.ctx.new_frame()
+        self.mesh.vao.new_frame()
         self.fbo.image_out[0].clear()
         self.fbo.depth_out.clear()
         for obj in self.opaque_objects:
             obj.update()
+        self.mesh.sprites.render()
   
         for obj in self.tp_objects:
             obj.render()
 
         self.pr.render()
-        self.ctx.end_frame()
+        self.mesh.vao.end_frame()
         
     def destroy(self):
         for obj in self.opaque_objects:
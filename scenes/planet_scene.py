@@ -25,18 +25,40 @@ class PlanetScene:
         self.tp_objects.append(obj)
 
     def load(self):
-        self.add_opaque_object(Tilemap(self.app))
+        tilemap = Tilemap(self.app)
+        self.add_opaque_object(tilemap)
         self.add_opaque_object(Planet(self.app))
         self.add_opaque_object(Player(self.app))
+        self.particles = ParticleSystem(self.app, tilemap.collision)
+        self.app.share_data['particles'] = self.particles
+        self.add_tp_object(self.particles) # blended, so after the background
+        self.snow = GPUParticles(
+            self.app,
+            side=64,
+            spawn=self.get_snow_spawn(),
+            velocity=(0, -22),
+            jitter=(6, 6),
+            life=(6, 10),
+            drag=0.2,
+            sway=14,
+            color=(0.92, 0.95, 1.0, 0.85),
+        )
+        self.add_tp_object(self.snow)
+
+    def get_snow_spawn(self):
+        lo, hi = self.app.camera.get_visible_rect()
+        return (lo.x - 32, lo.y, hi.x + 32, hi.y + 64) # falls in from above what we can see
 
     def update(self):
-        self.ctx.new_frame()
+        self.snow.spawn = self.get_snow_spawn()
+        self.mesh.vao.new_frame()
         self.fbo.image_out[0].clear()
         self.fbo.depth_out.clear()
         for obj in self.opaque_objects:
             obj.update()
             self.ctx.end_frame()
             self.ctx.new_frame()
+        self.mesh.sprites.render() # one instanced draw per texture array
 
         self.bg.render()
   
@@ -44,7 +66,7 @@ class PlanetScene:
             obj.render()
 
         self.pr.render()
-        self.ctx.end_frame()
+        self.mesh.vao.end_frame()
         #self.blit_img.blit()
         
     def destroy(self):
@@ -27,11 +27,12 @@ class SpaceScene:
         self.add_tp_object(SpaceShip(self.app))
 
     def update(self):
-        self.ctx.new_frame()
+        self.mesh.vao.new_frame()
         self.fbo.image_out[0].clear()
         self.fbo.depth_out.clear()
         for obj in self.opaque_objects:
             obj.update()
+        self.mesh.sprites.render()
 
         self.bg.render()
   
@@ -39,7 +40,7 @@ class SpaceScene:
             obj.update()
             
         self.pr.render()
-        self.ctx.end_frame()
+        self.mesh.vao.end_frame()
         
     def destroy(self):
         for obj in self.opaque_objects:
@@ -7,16 +7,18 @@ precision highp sampler2DArray;
 uniform sampler2D U_bg_image;
 
 #include "uniforms"
+#include "frame"
 
 in vec2 uv_0;
 out vec4 fragColor;
 
 vec2 pixellize(vec2 uv, float pixelSize) {
     // if you dont multiply by screenRes it wont work
-    return floor(uv * screenResolution / pixelSize) / screenResolution * pixelSize;
+    return floor(uv * resolution / pixelSize) / resolution * pixelSize;
 }
 
 void main() {	
+    vec2 mos = cameraPos.xy / 2000.0;
     vec4 color = texture(U_bg_image, mos/1000.0).rgba * vec4(0.32, 0.45, 0.7, 1.0);
     fragColor = color + vec4(u_color_offset.rgb + uv_0.x*0.001, 1.0);
 }
@@ -0,0 +1,20 @@
+#version 300 es
+precision highp float;
+precision highp int;
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 uv_0;
+in float alpha;
+
+#include "uniforms"
+
+
+
+
+void main() {
+    if (length(uv_0 - 0.5) > 0.5) {
+        discard;
+    }
+    fragColor = vec4(color.rgb, alpha);
+}
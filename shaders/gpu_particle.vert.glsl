@@ -0,0 +1,38 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+
+layout (location = 0) in vec2 in_texcoord_0;
+layout (location = 1) in vec3 in_position;
+
+out vec2 uv_0;
+out float alpha;
+
+uniform sampler2D State0;
+uniform sampler2D State1;
+
+#include "uniforms"
+#include "frame"
+
+
+
+void main() {
+    // one instance per state texel, see src/gpu_particles.py
+    int side = textureSize(State0, 0).x;
+    ivec2 texel = ivec2(gl_InstanceID % side, gl_InstanceID / side);
+    vec4 s0 = texelFetch(State0, texel, 0);
+    vec4 s1 = texelFetch(State1, texel, 0);
+
+    float t = clamp(s1.x / max(s1.y, 0.0001), 0.0, 1.0); // 1 when born, 0 when dead
+    if (t <= 0.0) {
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0); // clipped
+        return;
+    }
+
+    uv_0 = in_texcoord_0;
+    alpha = color.a * min(1.0, (1.0 - t) * 8.0) * min(1.0, t * 4.0); // fades in and out instead of popping
+    float size = radius * mix(1.0, t, shrink);
+    vec4 place = viewProj * vec4(s0.xy + in_position.xy * size, 0.0, 1.0);
+    gl_Position = vec4(place.xy/(place.w), depth, 1.0);
+}
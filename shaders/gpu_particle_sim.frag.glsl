@@ -0,0 +1,52 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+
+layout (location = 0) out vec4 state0; // position xy, velocity xy
+layout (location = 1) out vec4 state1; // life left, max life, seed, unused
+
+in vec2 uv_0;
+
+uniform sampler2D State0;
+uniform sampler2D State1;
+
+#include "uniforms"
+#include "frame"
+
+
+
+vec4 hash4(vec2 p) { // 4 randoms in 0-1
+    vec4 p4 = fract(vec4(p.xyxy) * vec4(0.1031, 0.1030, 0.0973, 0.1099));
+    p4 += dot(p4, p4.wzxy + 33.33);
+    return fract((p4.xxyz + p4.yzzw) * p4.zywx);
+}
+
+void main() {
+    ivec2 texel = ivec2(uv_0 * vec2(textureSize(State0, 0))); // the state is the same size as the target
+    vec4 s0 = texelFetch(State0, texel, 0);
+    vec4 s1 = texelFetch(State1, texel, 0);
+    vec2 pos = s0.xy;
+    vec2 vel = s0.zw;
+    float life = s1.x - dt;
+    float maxLife = s1.y;
+    float seed = s1.z;
+
+    if (life > 0.0) {
+        vel += (gravity + vec2(sin(time * 1.7 + seed * 40.0) * sway, 0.0)) * dt;
+        vel *= exp(-drag * dt);
+        pos += vel * dt;
+    } else if (emitting > 0.5) {
+        vec4 r = hash4(gl_FragCoord.xy + vec2(seed * 1000.0, time * 60.0));
+        pos = mix(spawn.xy, spawn.zw, r.xy);
+        vel = velocity + (r.zw * 2.0 - 1.0) * jitter;
+        maxLife = mix(lifeRange.x, lifeRange.y, fract(r.x + r.w));
+        life = maxLife;
+        seed = fract(seed + 0.618034);
+    } else {
+        life = 0.0; // stays dead until emitting again
+    }
+
+    state0 = vec4(pos, vel);
+    state1 = vec4(life, maxLife, seed, 0.0);
+}
@@ -6,6 +6,7 @@ precision highp sampler2D;
 uniform sampler2D T_ui;
 
 #include "uniforms"
+#include "frame"
 
 in vec2 uv_0;
 out vec4 fragColor;
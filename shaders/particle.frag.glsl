@@ -0,0 +1,34 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+precision highp sampler2DArray;
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 uv_0;
+in vec4 color;
+flat in int layer;
+
+uniform sampler2DArray Sprites;
+
+#include "uniforms"
+
+
+
+
+void main() {
+    if (layer < 0) { // plain circle
+        if (length(uv_0 - 0.5) > 0.5) {
+            discard;
+        }
+        fragColor = color;
+        return;
+    }
+
+    vec3 texel = texture(Sprites, vec3(uv_0, layer)).rgb;
+    if (texel == key_color) {
+        discard;
+    }
+    fragColor = vec4(texel, 1) * color;
+}
@@ -0,0 +1,30 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+precision highp sampler2DArray;
+
+layout (location = 0) in vec2 in_texcoord_0;
+layout (location = 1) in vec3 in_position;
+layout (location = 2) in vec2 in_center; // per instance, see src/particles.py
+layout (location = 3) in vec2 in_life;   // life left, max life
+layout (location = 4) in vec2 in_shape;  // radius, texture layer (-1 == circle)
+layout (location = 5) in vec4 in_color;
+
+out vec2 uv_0;
+out vec4 color;
+flat out int layer;
+
+#include "uniforms"
+#include "frame"
+
+
+
+void main() {
+    float fade = clamp(in_life.x / in_life.y, 0.0, 1.0); // shrinks and fades out like the old pg.draw.circle ones
+    uv_0 = in_texcoord_0;
+    color = vec4(in_color.rgb, in_color.a * fade);
+    layer = int(in_shape.y);
+    vec4 place = viewProj * vec4(in_center + in_position.xy * in_shape.x * fade, 0.0, 1.0);
+    gl_Position = vec4(place.xy/(place.w), depth, 1.0);
+}
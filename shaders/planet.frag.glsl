@@ -2,18 +2,44 @@
 precision highp float;
 precision highp int;
 precision highp sampler2D;
+precision highp sampler2DArray;
 
-uniform sampler2D T_planet;
+uniform sampler2DArray T_planet; // every body's surface, layer from the body table
 uniform sampler2D T_planetNormal;
 uniform sampler2D T_planetUV;
+uniform sampler2D T_fbm; // one tile of fbm(), linear + repeat (src/noise_textures.py)
+uniform sampler2D T_bayer; // bayer matrix, texelFetch'ed
+uniform sampler2D T_bodies; // body table, the flat disc detail tier reads the palette from it
 
 #include "uniforms"
+#include "frame"
 
-in vec2 uv_0;
+in vec2 uv_0; // 0-1 across the quad
+in vec2 pos; // screen px
+flat in vec2 planetCenter;
+flat in vec4 body; // this instance's row of the body table, see planet.vert.glsl
+flat in int instanceLod; // this instance's detail tier, see planet.vert.glsl
 out vec4 fragColor;
 
-bool shouldPixellize = false;
-bool shouldDither = true;
+// compile time switches, ShaderPrograms.get_program(..., defines={...}) overrides them per variant
+#ifndef SHOULD_PIXELLIZE
+#define SHOULD_PIXELLIZE 0
+#endif
+#ifndef SHOULD_DITHER
+#define SHOULD_DITHER 1
+#endif
+#ifndef BAKED_NOISE
+#define BAKED_NOISE 1 // 0 computes the fbm and dither instead of sampling T_fbm / T_bayer, to compare the two
+#endif
+#ifndef OCTAVES
+#define OCTAVES 2 // between 2 - 20, T_fbm is baked with src/noise_textures.py's NOISE_OCTAVES
+#endif
+#ifndef REDUCED_OCTAVES
+#define REDUCED_OCTAVES 1 // detail tier 1 when the fbm is computed, the baked one skips the warp sample instead
+#endif
+// IS_STAR 0 / 1 when every body of the draw is the same kind, undefined == read it from the body table
+// LOD 0 / 1 / 2 when every body of the draw has the same detail tier, undefined == per instance
+// 0: fbm, clouds and normal map, 1: one unwarped fbm (fewer octaves when computed) and no clouds, 2: flat palette disc
 
 vec3 cloudColor = vec3(1.0);
 vec3 lightColor = vec3(1.0);
@@ -22,10 +48,24 @@ float PI = 3.14159; //26535897932384626433832795; OPTIMIZATION
 vec2 light_origin = vec2(0.7, 0.5);
 float pixelSize = 8.0;
 
+// the instance's body, filled at the top of main
+float bodyRadius;
+float cloudRadius;
+#ifdef IS_STAR
+const bool isStar = IS_STAR != 0;
+#else
+bool isStar;
+#endif
+float planetLayer;
+#ifdef LOD
+const int lod = LOD;
+#else
+int lod;
+#endif
+
 // Planet Gen Godot Parameters //
 float size = 25.0;  // controls fbm size + rand function // 40 - 200
 float seed = 3.4;
-int OCTAVES = 2;  // between 2 - 20
 
 float rand(vec2 coord) {
 	coord = mod(coord, vec2(1.0, 1.0)*round(size));
@@ -50,13 +90,31 @@ float fbm(vec2 coord){
 	float value = 0.0;
 	float scale = 0.5;
 
-	for (int i = 0; i < OCTAVES ; i++){
+	for (int i = 0; i < (lod == 0 ? OCTAVES : REDUCED_OCTAVES) ; i++){
 		value += noise(coord) * scale;
 		coord *= 2.0;
 		scale *= 0.5;
 	}
 	return value;
 }
+
+float noiseFbm(vec2 coord) {
+#if BAKED_NOISE
+    return texture(T_fbm, coord / round(size)).r * (1.0 - pow(0.5, float(OCTAVES)));
+#else
+    return fbm(coord);
+#endif
+}
+
+bool ditherCell(vec2 texture_uv, float graincount) {
+#if BAKED_NOISE
+    ivec2 cell = ivec2(floor(texture_uv * graincount)) & (textureSize(T_bayer, 0) - 1);
+    return texelFetch(T_bayer, cell, 0).r < 0.5; // half the cells, the same checker as below
+#else
+    return (mod(texture_uv.x*graincount, 2.0) < 1.0 && mod(texture_uv.y*graincount, 2.0) < 1.0) ||
+           (mod(texture_uv.x*graincount, 2.0) > 1.0 && mod(texture_uv.y*graincount, 2.0) > 1.0);
+#endif
+}
 /*
 float getZSphere(float rad, float x, float y) { // WHY ARE THESE ***STILL*** HERE
     return sqrt(pow(rad, 2.0) - pow(x, 2.0) - pow(y, 2.0));
@@ -69,7 +127,7 @@ float getZSphere2(vec2 uv, float dis) {
 */
 vec2 pixellize(vec2 uv) {
     // if you dont multiply by screenRes it wont work
-    return floor(uv * screenResolution / pixelSize) / screenResolution * pixelSize;
+    return floor(uv * resolution / pixelSize) / resolution * pixelSize;
 }
 /*
 vec2 rotate_uv(vec2 uv, float rotation) // I CAN GENERATE A ROTATED UV MAP BTW
@@ -97,8 +155,8 @@ vec2 texture_uv_sphere(vec3 normal) {  // NOW ABSOLUTLY USELESS, KKEP FOR TEXTUR
 */
 
 float cloud(vec2 texture_uv) {
-    float fbm1 = fbm(texture_uv * vec2(500.0));
-    float fbm_val = fbm(texture_uv * size+fbm1+vec2(time*time_speed, 0.0));
+    float fbm1 = noiseFbm(texture_uv * vec2(500.0));
+    float fbm_val = noiseFbm(texture_uv * size+fbm1+vec2(time*time_speed, 0.0));
     return mod(fbm_val, 1.0);
 }
 /*
@@ -115,16 +173,15 @@ vec2 LightandDither(vec3 normal, vec2 texture_uv) {
     float graincount = 128.0; // really its just totalGrainsInGrid
     float edge = 0.05; // must be less than 1/ringcount
 
-    float fbm1 = fbm(texture_uv);
-    float fbm_val = fbm(texture_uv * size + fbm1 + vec2(time*time_speed, 0.0)) * 0.3;
+    float fbm1 = lod == 0 ? noiseFbm(texture_uv) : 0.0; // the domain warp, one sample (or OCTAVES of noise) less below full detail
+    float fbm_val = noiseFbm(texture_uv * size + fbm1 + vec2(time*time_speed, 0.0)) * 0.3;
     
     float ls = max(dot(normal, -normalize(movedLightDirection)), 0.04); // luminosity
     ls -= fbm_val;  // apply fbm
     
     float dithered_ls = ls;
-    if (mod(ls, ringcount) >= edge && ls < 0.899) {
-        if ((mod(texture_uv.x*graincount, 2.0) < 1.0 && mod(texture_uv.y*graincount, 2.0) < 1.0) ||
-            (mod(texture_uv.x*graincount, 2.0) > 1.0 && mod(texture_uv.y*graincount, 2.0) > 1.0)) {
+    if (SHOULD_DITHER != 0 && mod(ls, ringcount) >= edge && ls < 0.899) {
+        if (ditherCell(texture_uv, graincount)) {
             dithered_ls += 0.1001;  // dither
         }
     }
@@ -135,7 +192,7 @@ vec2 LightandDither(vec3 normal, vec2 texture_uv) {
 vec3 cloudFinal(float ls, vec2 texture_uv) {
     // ld.x = ls
     // ld.y = dithered_ls
-    vec3 NotfragColor = texture(T_planet, texture_uv).rgb * lightColor;
+    vec3 NotfragColor = texture(T_planet, vec3(texture_uv, planetLayer)).rgb * lightColor;
     if (!isStar) {  // if planet(has shadows)
 		vec3 nodither_shadow_mul = vec3(1.0 * max(ls - mod(ls, 0.1001), 0.04));
 		vec3 cloud_result = cloudColor * nodither_shadow_mul;
@@ -147,8 +204,19 @@ vec3 cloudFinal(float ls, vec2 texture_uv) {
     }
 }
 
+vec3 paletteDisc(vec2 p) {
+    // p: -1 to 1 across the body. No textures but the body table, lit by the sphere's own normal in palette bands
+    if (isStar) {
+        return texture(T_planet, vec3(p * 0.5 + 0.5, planetLayer)).rgb * lightColor;
+    }
+    vec3 normal = vec3(p, sqrt(max(1.0 - dot(p, p), 0.0)));
+    float ls = max(dot(normal, -normalize(movedLightDirection)), 0.04);
+    float paletteSize = texelFetch(T_bodies, ivec2(1, int(planetLayer)), 0).w;
+    return texelFetch(T_bodies, ivec2(2 + int(min(ls, 0.999) * paletteSize), int(planetLayer)), 0).rgb;
+}
+
 vec3 planetFinal(float dithered_ls, vec2 texture_uv) {
-    vec3 NotfragColor = texture(T_planet, texture_uv).rgb * lightColor;
+    vec3 NotfragColor = texture(T_planet, vec3(texture_uv, planetLayer)).rgb * lightColor;
     vec3 dithered_shadow_mul = vec3(1.0 * max(dithered_ls - mod(dithered_ls, 0.1001), 0.04));
 
     vec3 planet_result = vec3(1.5) * NotfragColor * dithered_shadow_mul;
@@ -164,30 +232,57 @@ vec3 planetFinal(float dithered_ls, vec2 texture_uv) {
 }
 
 void main() {
-    vec2 pos = uv_0 * screenResolution;
+    if (length(uv_0 - 0.5) > 0.5) { // quad corners, cheapest test first
+        discard;
+    }
+    if (checkerParity >= 0 && ((int(gl_FragCoord.x) + int(gl_FragCoord.y) + checkerParity) & 1) == 1) {
+        discard; // checkerboard quality, the other half gets reprojected from last frame (planet_resolve.frag.glsl)
+    }
+    bodyRadius = body.x;
+    cloudRadius = body.y;
+#ifndef IS_STAR
+    isStar = body.z > 0.5;
+#endif
+    planetLayer = body.w;
+#ifndef LOD
+    lod = instanceLod;
+#endif
 
     float dis = distance(planetCenter, pos);
+
+    if (lod >= 2) { // too small on screen for anything else to show
+        if (dis > bodyRadius) {
+            discard;
+        }
+        fragColor = vec4(paletteDisc((pos - planetCenter) / bodyRadius), 1.0);
+        return;
+    }
     
     if (dis<=cloudRadius) {
         vec2 uv_remap = (pos - planetCenter)/(cloudRadius*2.0) + 0.5; // just replace bodyRadius with cloudRadius
-        vec3 normal = texture(T_planetNormal, uv_remap).rgb * 2.0 - 1.0;
+        vec3 normal;
+        vec2 texture_uv;
+        float isCloud = 0.0; // no clouds below full detail
+        vec2 ld;
+        vec4 final;
 
-        vec2 texture_uv = texture(T_planetUV, uv_remap).rg;
+        if (lod == 0) {
+            texture_uv = texture(T_planetUV, uv_remap).rg;
 
-        // for this to work you need to use "wrap_x":"repeat" in the texture settings
-        texture_uv.x += planetOffset;
+            // for this to work you need to use "wrap_x":"repeat" in the texture settings
+            texture_uv.x += planetOffset;
 
-        if (shouldPixellize) {
+#if SHOULD_PIXELLIZE
             texture_uv = pixellize(texture_uv);
-        }
-
-        float cloud_val = cloud(texture_uv);
-        float isCloud = step(cloud_val, 0.35);
+#endif
 
-        vec2 ld = LightandDither(normal, texture_uv); // ls + dithered_ls
-        vec4 final;
+            float cloud_val = cloud(texture_uv);
+            isCloud = step(cloud_val, 0.35);
+        }
 
         if (isCloud == 1.0) {
+            normal = texture(T_planetNormal, uv_remap).rgb * 2.0 - 1.0;
+            ld = LightandDither(normal, texture_uv); // ls + dithered_ls
             final = vec4(cloudFinal(ld.x, texture_uv), 1.0);
         }
         else if (dis <= bodyRadius) {
@@ -196,9 +291,9 @@ void main() {
             texture_uv = texture(T_planetUV, uv_remap).rg;
             
             texture_uv.x += planetOffset;
-            if (shouldPixellize) {
-                texture_uv = pixellize(texture_uv);
-            }
+#if SHOULD_PIXELLIZE
+            texture_uv = pixellize(texture_uv);
+#endif
 			
 			ld = LightandDither(normal, texture_uv); // ls + dithered_ls
             
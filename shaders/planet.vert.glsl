@@ -1,14 +1,35 @@
 #version 300 es
 precision highp float;
 precision highp int;
+precision highp sampler2D;
 
 layout (location = 0) in vec2 in_texcoord_0;
 layout (location = 1) in vec2 in_position;
+layout (location = 2) in vec4 in_body; // per instance: centre (screen px), radius scale, planet id
+layout (location = 3) in float in_lod; // per instance: detail tier (PlanetManager.get_lods), clouds only at 0
 
-out vec2 uv_0;
+uniform sampler2D T_bodies; // body table, one row per planet id (src/body_table.py)
+
+out vec2 uv_0; // 0-1 across the quad
+out vec2 pos; // screen px
+flat out vec2 planetCenter;
+flat out vec4 body; // bodyRadius, cloudRadius, isStar, texture layer
+flat out int instanceLod;
+
+#include "uniforms" // viewRect: x, y, width, height (px) of what the target shows, all 0 == the screen
+#include "frame"
 
 
 void main() {
+    body = texelFetch(T_bodies, ivec2(0, int(in_body.w)), 0);
+    body.xy *= in_body.z;
+    planetCenter = in_body.xy;
+    instanceLod = int(in_lod);
+
+    // a quad just big enough for the clouds, everything outside them used to get shaded and discarded
+    // below full detail there are no clouds, so just big enough for the body
     uv_0 = in_texcoord_0;
-    gl_Position = vec4(in_position.xy, 0.9999, 1.0);
+    pos = planetCenter + in_position.xy * ((instanceLod > 0 ? body.x : body.y) + 1.0);
+    vec4 view = viewRect.z > 0.0 ? viewRect : vec4(0.0, 0.0, resolution);
+    gl_Position = vec4((pos - view.xy) / view.zw * 2.0 - 1.0, 0.9999, 1.0);
 }
@@ -0,0 +1,24 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+
+// planet.vert.glsl + this copies offscreen shaded planets (half resolution or checkerboard) onto the screen
+uniform sampler2D T_shaded;
+
+#include "uniforms"
+
+in vec2 uv_0;
+out vec4 fragColor;
+
+
+void main() {
+    if (length(uv_0 - 0.5) > 0.5) {
+        discard;
+    }
+    vec4 color = texelFetch(T_shaded, ivec2(gl_FragCoord.xy * shadedScale), 0); // nearest, keeps the pixel look
+    if (color.a == 0.0) {
+        discard;
+    }
+    fragColor = vec4(color.rgb, 1.0);
+}
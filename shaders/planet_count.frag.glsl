@@ -0,0 +1,13 @@
+#version 300 es
+precision highp float;
+
+// planet.vert.glsl + this == how many fragments the planet shader gets run for, see PlanetRenderer.count_fragments
+
+in vec2 uv_0;
+out vec2 fragCount; // every fragment, the ones that get past planet.frag's corner discard (the fbm/lighting ones)
+
+
+void main() {
+    // summed by additive blending
+    fragCount = vec2(1.0, length(uv_0 - 0.5) > 0.5 ? 0.0 : 1.0);
+}
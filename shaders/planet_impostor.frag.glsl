@@ -0,0 +1,25 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2DArray;
+
+// draws a body from its cached impostor instead of running planet.frag.glsl again, see PlanetRenderer
+uniform sampler2DArray T_impostors; // one square layer per slot, bodies are baked around the layer's centre
+
+in vec2 uv_0;
+in vec2 offset;
+flat in int slot;
+out vec4 fragColor;
+
+
+void main() {
+    if (length(uv_0 - 0.5) > 0.5) {
+        discard;
+    }
+    vec2 center = vec2(textureSize(T_impostors, 0).xy) * 0.5;
+    vec4 color = texelFetch(T_impostors, ivec3(floor(center + offset), slot), 0); // nearest, 1:1 with the screen
+    if (color.a == 0.0) {
+        discard;
+    }
+    fragColor = vec4(color.rgb, 1.0);
+}
@@ -0,0 +1,29 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+
+layout (location = 0) in vec2 in_texcoord_0;
+layout (location = 1) in vec2 in_position;
+layout (location = 2) in vec4 in_body; // same as planet.vert.glsl: centre (screen px), radius scale, planet id
+layout (location = 3) in float in_slot; // layer of the impostor texture array the body was baked into
+
+uniform sampler2D T_bodies;
+
+out vec2 uv_0;
+out vec2 offset; // px from the body's centre
+flat out int slot;
+
+#include "frame"
+
+
+void main() {
+    float radius = texelFetch(T_bodies, ivec2(0, int(in_body.w)), 0).y * in_body.z + 1.0;
+    uv_0 = in_texcoord_0;
+    offset = in_position.xy * radius;
+    slot = int(in_slot);
+
+    // the same octagon planet.vert.glsl would shade
+    vec2 pos = in_body.xy + offset;
+    gl_Position = vec4(pos / resolution * 2.0 - 1.0, 0.9999, 1.0);
+}
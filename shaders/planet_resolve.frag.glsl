@@ -0,0 +1,40 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+
+uniform sampler2D T_shaded; // this frame's planets, every other pixel
+uniform sampler2D T_history; // last frame's resolved planets, alpha == (planet id + 1) / 255
+
+#include "uniforms"
+
+in vec2 uv_0;
+flat in vec2 motion;
+flat in float planetId;
+out vec4 fragColor;
+
+vec4 shaded(ivec2 p) {
+    return texelFetch(T_shaded, clamp(p, ivec2(0), textureSize(T_shaded, 0) - 1), 0);
+}
+
+
+void main() {
+    if (length(uv_0 - 0.5) > 0.5) {
+        discard;
+    }
+    ivec2 p = ivec2(gl_FragCoord.xy);
+    float tag = (planetId + 1.0) / 255.0;
+    vec4 color = shaded(p);
+
+    if (((p.x + p.y + checkerParity) & 1) == 1) { // skipped by planet.frag.glsl this frame
+        ivec2 q = clamp(ivec2(floor(gl_FragCoord.xy - motion)), ivec2(0), textureSize(T_history, 0) - 1);
+        vec4 history = texelFetch(T_history, q, 0);
+        if (abs(history.a - tag) < 0.5 / 255.0) { // same body was there last frame
+            color = vec4(history.rgb, 1.0);
+        } else { // just came into view, the 4 neighbours got shaded
+            vec4 sum = shaded(p + ivec2(1, 0)) + shaded(p - ivec2(1, 0)) + shaded(p + ivec2(0, 1)) + shaded(p - ivec2(0, 1));
+            color = sum.a > 0.0 ? vec4(sum.rgb / sum.a, 1.0) : vec4(0.0);
+        }
+    }
+    fragColor = color.a > 0.0 ? vec4(color.rgb, tag) : vec4(0.0);
+}
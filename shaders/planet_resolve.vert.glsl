@@ -0,0 +1,29 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+
+layout (location = 0) in vec2 in_texcoord_0;
+layout (location = 1) in vec2 in_position;
+layout (location = 2) in vec4 in_body; // same instances as planet.vert.glsl
+layout (location = 3) in vec2 in_motion; // screen px the body moved since last frame
+
+uniform sampler2D T_bodies;
+
+out vec2 uv_0;
+flat out vec2 motion;
+flat out float planetId;
+
+#include "frame"
+
+
+void main() {
+    float cloudRadius = texelFetch(T_bodies, ivec2(0, int(in_body.w)), 0).y * in_body.z;
+    motion = in_motion;
+    planetId = in_body.w;
+
+    // the same octagon planet.vert.glsl shades
+    uv_0 = in_texcoord_0;
+    vec2 pos = in_body.xy + in_position.xy * (cloudRadius + 1.0);
+    gl_Position = vec4(pos / resolution * 2.0 - 1.0, 0.9999, 1.0);
+}
@@ -11,12 +11,13 @@ out vec2 uv_0;
 out vec3 fragPos;
 
 #include "uniforms"
+#include "frame"
 
 
 
 void main() {
     uv_0 = in_texcoord_0;
     fragPos = vec3(m_model * vec4(in_position, 1.0));
-	vec4 place = m_view * vec4(in_position, 1.0);
+	vec4 place = viewProj * m_model * vec4(in_position, 1.0);
     gl_Position = vec4(place.xy/(place.w), place.z/1000.0 - 0.1, 1.0);
 }
\ No newline at end of file
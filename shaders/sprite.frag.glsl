@@ -0,0 +1,28 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+precision highp sampler2DArray;
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 uv_0;
+in vec4 tint;
+flat in int layer;
+
+uniform sampler2DArray Sprites;
+
+#include "uniforms"
+
+
+
+
+void main() {
+    vec3 color = texture(Sprites, vec3(uv_0, layer)).rgb;
+
+    if (color == key_color) {
+        discard;
+    }
+
+    fragColor = vec4(color, 1) * tint;
+}
\ No newline at end of file
@@ -0,0 +1,32 @@
+#version 300 es
+precision highp float;
+precision highp int;
+precision highp sampler2D;
+precision highp sampler2DArray;
+
+layout (location = 0) in vec2 in_texcoord_0;
+layout (location = 1) in vec3 in_position;
+layout (location = 2) in vec4 in_model_0; // per instance model matrix columns
+layout (location = 3) in vec4 in_model_1;
+layout (location = 4) in vec4 in_model_2;
+layout (location = 5) in vec4 in_model_3;
+layout (location = 6) in vec4 in_tint;
+layout (location = 7) in vec4 in_sprite; // layer, frame, flip, unused
+
+out vec2 uv_0;
+out vec4 tint;
+flat out int layer;
+
+#include "uniforms"
+#include "frame"
+
+
+
+void main() {
+    uv_0 = (in_sprite.z > 0.5) ? vec2(1.0 - in_texcoord_0.x, in_texcoord_0.y) : in_texcoord_0;
+    tint = in_tint;
+    layer = int(in_sprite.x + in_sprite.y);
+    mat4 m_model = mat4(in_model_0, in_model_1, in_model_2, in_model_3);
+	vec4 place = viewProj * m_model * vec4(in_position, 1.0);
+    gl_Position = vec4(place.xy/(place.w), place.z/1000.0 - 0.1, 1.0);
+}
\ No newline at end of file
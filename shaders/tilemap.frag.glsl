@@ -13,14 +13,18 @@ in vec4 instance_pos_data;
 uniform sampler2DArray Tiles;
 uniform sampler2DArray Decor;
 
-#include "uniforms"
+// DECOR: first layer id that samples Decor, undefined == everything lives in Tiles
 
 
 void main() {
 	int ArrayIndex = int(instance_pos_data.z);
-	bool bol = ArrayIndex<decor;
+#ifdef DECOR
+	bool bol = ArrayIndex<DECOR;
 	
-	vec3 color = bol ? texture(Tiles, vec3(uv_0, ArrayIndex)).rgb : texture(Decor, vec3(uv_0, ArrayIndex-decor)).rgb;
+	vec3 color = bol ? texture(Tiles, vec3(uv_0, ArrayIndex)).rgb : texture(Decor, vec3(uv_0, ArrayIndex-DECOR)).rgb;
+#else
+	vec3 color = texture(Tiles, vec3(uv_0, ArrayIndex)).rgb;
+#endif
 
 	if (color==vec3(0)) {
 		discard;
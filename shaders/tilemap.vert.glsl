@@ -11,6 +11,7 @@ out vec3 fragPos;
 out vec4 instance_pos_data;
 
 #include "uniforms"
+#include "frame"
 
 
 void main() {
@@ -19,6 +20,6 @@ void main() {
     instance_pos_data = position;
 
     fragPos = vec3(m_model * vec4(vert_position, 1.0));
-	vec4 place = m_view * vec4(vert_position, 1.0);
+	vec4 place = viewProj * m_model * vec4(vert_position, 1.0);
     gl_Position = vec4(place.xy/(place.w), place.z/1000.0, 1.0);
 }
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""Uniform grid over the astral bodies for "which one is closest to the camera" queries.
+
+Benchmark (build + a camera flying through a system of n bodies):
+    python -m src.body_index
+"""
+from typing import Tuple
+import math
+import time
+import numpy as np
+
+ROW_BITS = 32 # cell key = (cell y << ROW_BITS) + cell x, so a row of cells is one contiguous key range
+ROW_OFFSET = 1 << (ROW_BITS - 1) # keeps negative cell x out of the row above
+
+
+class BodyIndex:
+    """Bodies bucketed by grid cell, sorted by cell key.
+
+    For the cell a point is in, candidates() finds every body that can be the closest one to *some* point of that cell
+    (usually 1-3 of them). closest() only recomputes that set when the point moves into another cell,
+    in between it's a distance check against those few bodies, so the answer is always exact.
+    """
+    def __init__(self, positions:np.ndarray, cell_size:float=None):
+        self.positions = np.asarray(positions, dtype="f8").reshape(-1, 2)
+        n = len(self.positions)
+        if n == 0:
+            raise ValueError("BodyIndex needs at least one body")
+        lo, hi = self.positions.min(axis=0), self.positions.max(axis=0)
+        if cell_size is None:
+            # about 2 bodies per cell if they were spread evenly
+            cell_size = max(float(np.sqrt((hi - lo).prod() / n * 2)), float((hi - lo).max()) / 1024, 1.0)
+        self.cell_size = cell_size
+        self.lo_cell = np.floor(lo / cell_size).astype("i8")
+        self.hi_cell = np.floor(hi / cell_size).astype("i8")
+
+        cells = np.floor(self.positions / cell_size).astype("i8")
+        keys = self.key(cells[:, 0], cells[:, 1])
+        self.order = np.argsort(keys, kind="stable") # body ids sorted by cell
+        self.keys = keys[self.order]
+
+        self.cell:Tuple[int, int] = None # cell of the last closest() query
+        self.cell_candidates = np.zeros(0, dtype="i8")
+
+    @staticmethod
+    def key(cx:np.ndarray, cy:np.ndarray) -> np.ndarray:
+        return (cy << ROW_BITS) + (cx + ROW_OFFSET)
+
+    def bodies_around(self, cx:int, cy:int, r:int) -> np.ndarray:
+        # ids of every body in the (2r+1)^2 cells around (cx, cy), one searchsorted pair per row
+        rows = np.arange(cy - r, cy + r + 1, dtype="i8")
+        starts = np.searchsorted(self.keys, self.key(np.int64(cx - r), rows), side="left")
+        ends = np.searchsorted(self.keys, self.key(np.int64(cx + r), rows), side="right")
+        counts = ends - starts
+        if counts.sum() == 0:
+            return np.zeros(0, dtype="i8")
+        slots = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return self.order[slots]
+
+    def candidates(self, cx:int, cy:int) -> np.ndarray:
+        size = self.cell_size
+        cell_lo = np.array([cx, cy], dtype="f8") * size
+        cell_hi = cell_lo + size
+        # grow the search until it finds something, past the grid's edge there's nothing more to find
+        max_r = int(max(abs(cx - self.lo_cell[0]), abs(cx - self.hi_cell[0]), abs(cy - self.lo_cell[1]), abs(cy - self.hi_cell[1])))
+        r = 1
+        found = self.bodies_around(cx, cy, r)
+        while len(found) == 0 and r < max_r:
+            r = min(r * 2, max_r)
+            found = self.bodies_around(cx, cy, r)
+
+        # no point in the cell is further than `worst` from its closest body
+        far = np.maximum(np.abs(self.positions[found] - cell_lo), np.abs(self.positions[found] - cell_hi))
+        worst = float(np.sqrt((far ** 2).sum(axis=1)).min())
+        needed = min(int(math.ceil(worst / size)) + 1, max_r)
+        if needed > r:
+            found = self.bodies_around(cx, cy, needed)
+
+        # keep the bodies that could beat `worst` for some point of the cell
+        near = np.clip(self.positions[found], cell_lo, cell_hi) - self.positions[found]
+        return found[np.sqrt((near ** 2).sum(axis=1)) <= worst]
+
+    def closest(self, x:float, y:float) -> int:
+        cell = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        if cell != self.cell: # the only time the grid gets searched
+            self.cell = cell
+            self.cell_candidates = self.candidates(*cell)
+        if len(self.cell_candidates) == 1:
+            return int(self.cell_candidates[0])
+        offsets = self.positions[self.cell_candidates] - (x, y)
+        return int(self.cell_candidates[np.argmin((offsets ** 2).sum(axis=1))])
+
+    def closest_many(self, points:np.ndarray) -> np.ndarray:
+        # vectorized closest for lots of points, no caching. Brute force in chunks, fine for the odd batch query
+        points = np.asarray(points, dtype="f8").reshape(-1, 2)
+        result = np.empty(len(points), dtype="i8")
+        chunk = max(1, (1 << 22) // len(self.positions))
+        for start in range(0, len(points), chunk):
+            block = points[start:start + chunk]
+            d = ((block[:, None, :] - self.positions[None, :, :]) ** 2).sum(axis=2)
+            result[start:start + chunk] = d.argmin(axis=1)
+        return result
+
+
+def benchmark(counts:Tuple[int, ...]=(4, 1000, 10000, 100000), world:float=40000, frames:int=2000):
+    rng = np.random.default_rng(0)
+    for n in counts:
+        positions = rng.random((n, 2)) * world
+
+        start = time.perf_counter()
+        index = BodyIndex(positions)
+        built = time.perf_counter() - start
+
+        # a camera flying across the system at ~1500 px/s, 60 fps
+        path = np.stack([np.linspace(0.1, 0.9, frames), np.linspace(0.2, 0.7, frames)], axis=1) * world
+        start = time.perf_counter()
+        found = [index.closest(x, y) for x, y in path.tolist()]
+        took = (time.perf_counter() - start) / frames
+
+        check = index.closest_many(path[::50])
+        assert (np.asarray(found[::50]) == check).all(), "closest() disagrees with brute force"
+        print(f"{n:>6} bodies: build {built * 1000:6.1f} ms, {took * 1e6:6.1f} us/query, cell {index.cell_size:.0f} px")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,64 @@
+from typing import TYPE_CHECKING, Dict, List
+import numpy as np
+import webcolors
+
+from engine.texture import Texture
+
+if TYPE_CHECKING:
+    from main import Game
+
+# one row of rgba32float texels per body in the "bodies" texture, the planet shader texelFetch'es row planetId
+# 0: bodyRadius, cloudRadius, isStar, texture layer
+# 1: lightDirection xyz, palette size
+# 2..: palette colours
+ROW_TEXELS = 2 + 8
+MAX_PALETTE = ROW_TEXELS - 2
+
+DEFAULT_PALETTE = """000000
+21283f
+38526e
+3f86b0
+839dbf
+cee3ef
+"""
+
+
+def load_palette(hex_palette:str=DEFAULT_PALETTE) -> List[List[float]]:
+    palette = []
+    for v in hex_palette.splitlines():
+        rgb = webcolors.hex_to_rgb(v if v[0] == "#" else f"#{v}")
+        palette.append([rgb.red / 255, rgb.green / 255, rgb.blue / 255, 1.0]) # rgba
+    return palette
+
+
+class BodyTable:
+    """Every astral body's parameters + surface texture uploaded once, shaders pick a body with one int (planetId).
+
+    `bodies` is a BODIES like dict, the ids are its order. Get the shared one with BodyTable.get(app, BODIES).
+    """
+    def __init__(self, app:"Game", bodies:Dict[str, dict]):
+        self.app = app
+        self.names = list(bodies.keys())
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+        rows = np.zeros((len(bodies), ROW_TEXELS, 4), dtype="f4")
+        for i, body in enumerate(bodies.values()):
+            palette = body.get("palette", load_palette())[:MAX_PALETTE]
+            rows[i, 0] = (body["bodyRadius"], body["cloudRadius"], float(body.get("isStar", False)), i)
+            rows[i, 1] = (*body["lightDirection"], len(palette))
+            rows[i, 2:2 + len(palette)] = palette
+        self.rows = rows
+
+        textures = self.app.mesh.texture
+        image = self.app.ctx.image((ROW_TEXELS, len(bodies)), "rgba32float", rows.tobytes())
+        self.params = Texture(image, repeat=("clamp_to_edge", "clamp_to_edge")) # nearest, texelFetch'ed anyway
+        self.surfaces = textures.from_list("assets/textures/planets/", [name.lower() for name in self.names], ".png") # layer == id
+        textures.textures["bodies"] = self.params # Textures.destroy cleans them up with everything else
+        textures.textures["planets"] = self.surfaces
+
+    @classmethod
+    def get(cls, app:"Game", bodies:Dict[str, dict]) -> "BodyTable":
+        # built once, space and planet scenes share it
+        if "body_table" not in app.share_data:
+            app.share_data["body_table"] = cls(app, bodies)
+        return app.share_data["body_table"]
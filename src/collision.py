@@ -0,0 +1,213 @@
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+import math
+import numpy as np
+import pygame as pg
+
+if TYPE_CHECKING:
+    from src.tilemap_file import TilemapFile
+
+CHUNK_BITS = 5
+CHUNK_SIZE = 1 << CHUNK_BITS # cells per chunk side
+CHUNK_MASK = CHUNK_SIZE - 1
+SWEEP_EPSILON = 1e-5 # in tiles, edges this close to a tile border just touch it
+
+# the cells RigidBody checks around itself, in the order it resolves them
+# (world y points up, the json keys point down, so this is player.py's old neighbor_offsets flipped)
+NEIGHBOURS:List[Tuple[int, int]] = [(-1, 1), (0, 1), (1, 1), (-1, 0), (1, 0), (-1, -1), (0, -1), (1, -1), (0, 0)]
+
+
+class TileHit:
+    """One solid cell found by a query, the objects get reused by the next query"""
+    __slots__ = ("rect", "friction", "material")
+
+    def __init__(self, tile_size:int):
+        self.rect = pg.Rect(0, 0, tile_size, tile_size)
+        self.friction = 1.0
+        self.material = 0
+
+
+class CollisionGrid:
+    """Solidity, friction and material id per tile cell, in CHUNK_SIZE x CHUNK_SIZE chunks.
+
+    Cells are world tile coords (tile x, -json y), a chunk is only allocated once something is in it.
+    """
+    def __init__(self, tile_size:int=16):
+        self.tile_size = tile_size
+        self.origin = (0, 0) # chunk coords of table[0, 0]
+        self.table = np.full((0, 0), -1, dtype="i4") # [chunk y, chunk x] -> chunk slot, -1 == empty
+        self.count = 0 # slots in use
+
+        self.solid = np.zeros((0, CHUNK_SIZE, CHUNK_SIZE), dtype="u1")
+        self.friction = np.ones((0, CHUNK_SIZE, CHUNK_SIZE), dtype="f4")
+        self.material = np.zeros((0, CHUNK_SIZE, CHUNK_SIZE), dtype="u2")
+
+        self.hits = [TileHit(tile_size) for _ in NEIGHBOURS]
+        self.sweep_hit = TileHit(tile_size)
+        self.hit_list:List[TileHit] = []
+
+    @classmethod
+    def from_map_file(cls, map_file:"TilemapFile", layer:str="0", tile_size:int=16, frictions:Dict[str, float]={}) -> "CollisionGrid":
+        # frictions: tile name -> friction multiplier, anything not in there is 1.0
+        grid = cls(tile_size)
+        tiles = map_file.layers[layer]
+        solid = np.array([bool(tile[1]) for tile in map_file.types], dtype="u1")
+        friction = np.array([frictions.get(str(tile[4]), 1.0) for tile in map_file.types], dtype="f4")
+        grid.fill(tiles["x"].astype("i4"), -tiles["y"].astype("i4"), solid[tiles["type"]], friction[tiles["type"]], tiles["type"])
+        return grid
+
+    def grow(self, lo:Tuple[int, int], hi:Tuple[int, int]):
+        # makes the chunk table cover chunk coords lo..hi (inclusive)
+        ox, oy = self.origin
+        h, w = self.table.shape
+        if w and h:
+            lo = (min(lo[0], ox), min(lo[1], oy))
+            hi = (max(hi[0], ox + w - 1), max(hi[1], oy + h - 1))
+        table = np.full((hi[1] - lo[1] + 1, hi[0] - lo[0] + 1), -1, dtype="i4")
+        table[oy - lo[1]:oy - lo[1] + h, ox - lo[0]:ox - lo[0] + w] = self.table
+        self.table, self.origin = table, lo
+
+    def allocate(self, count:int) -> np.ndarray:
+        # hands out `count` new chunk slots, the cell arrays double when they run out
+        if self.count + count > len(self.solid):
+            size = max(len(self.solid) * 2, self.count + count)
+            for name, fill in (("solid", 0), ("friction", 1), ("material", 0)):
+                old = getattr(self, name)
+                new = np.full((size, CHUNK_SIZE, CHUNK_SIZE), fill, dtype=old.dtype)
+                new[:self.count] = old[:self.count]
+                setattr(self, name, new)
+        slots = np.arange(self.count, self.count + count, dtype="i4")
+        self.count += count
+        return slots
+
+    def fill(self, gx:np.ndarray, gy:np.ndarray, solid:np.ndarray, friction:np.ndarray=1.0, material:np.ndarray=0):
+        # writes many cells at once, arrays (or scalars) per cell
+        gx, gy = np.asarray(gx, dtype="i4"), np.asarray(gy, dtype="i4")
+        if gx.size == 0:
+            return
+        cx, cy = gx >> CHUNK_BITS, gy >> CHUNK_BITS
+        self.grow((int(cx.min()), int(cy.min())), (int(cx.max()), int(cy.max())))
+        tx, ty = cx - self.origin[0], cy - self.origin[1]
+
+        new = np.unique(np.stack([ty, tx], axis=1)[self.table[ty, tx] < 0], axis=0)
+        if len(new):
+            self.table[new[:, 0], new[:, 1]] = self.allocate(len(new))
+
+        slots = self.table[ty, tx]
+        ly, lx = gy & CHUNK_MASK, gx & CHUNK_MASK
+        self.solid[slots, ly, lx] = solid
+        self.friction[slots, ly, lx] = friction
+        self.material[slots, ly, lx] = material
+
+    def slot(self, gx:int, gy:int) -> int:
+        tx, ty = (gx >> CHUNK_BITS) - self.origin[0], (gy >> CHUNK_BITS) - self.origin[1]
+        h, w = self.table.shape
+        if 0 <= tx < w and 0 <= ty < h:
+            return self.table.item(ty, tx)
+        return -1
+
+    def is_solid(self, gx:int, gy:int) -> bool:
+        slot = self.slot(gx, gy)
+        return slot >= 0 and bool(self.solid.item(slot, gy & CHUNK_MASK, gx & CHUNK_MASK))
+
+    def slots_at(self, gx:np.ndarray, gy:np.ndarray) -> np.ndarray:
+        # vectorized slot, -1 where there's no chunk
+        tx, ty = (gx >> CHUNK_BITS) - self.origin[0], (gy >> CHUNK_BITS) - self.origin[1]
+        h, w = self.table.shape
+        inside = (tx >= 0) & (tx < w) & (ty >= 0) & (ty < h)
+        slots = np.full(gx.shape, -1, dtype="i4")
+        slots[inside] = self.table[ty[inside], tx[inside]]
+        return slots
+
+    def solid_at(self, gx:np.ndarray, gy:np.ndarray) -> np.ndarray:
+        # vectorized is_solid
+        gx, gy = np.asarray(gx, dtype="i4"), np.asarray(gy, dtype="i4")
+        slots = self.slots_at(gx, gy)
+        found = slots >= 0
+        result = np.zeros(gx.shape, dtype=bool)
+        result[found] = self.solid[slots[found], gy[found] & CHUNK_MASK, gx[found] & CHUNK_MASK] != 0
+        return result
+
+    def friction_at(self, gx:np.ndarray, gy:np.ndarray) -> np.ndarray:
+        # friction multiplier per cell, 1.0 for empty ones
+        gx, gy = np.asarray(gx, dtype="i4"), np.asarray(gy, dtype="i4")
+        slots = self.slots_at(gx, gy)
+        found = slots >= 0
+        result = np.ones(gx.shape, dtype="f4")
+        result[found] = self.friction[slots[found], gy[found] & CHUNK_MASK, gx[found] & CHUNK_MASK]
+        return result
+
+    def neighbours(self, gx:int, gy:int) -> List[TileHit]:
+        # solid cells in the 3x3 around (gx, gy), the returned list and hits are reused by the next call
+        self.hit_list.clear()
+        lx, ly = gx & CHUNK_MASK, gy & CHUNK_MASK
+        slot = self.slot(gx, gy)
+        if slot >= 0 and 0 < lx < CHUNK_MASK and 0 < ly < CHUNK_MASK:
+            # whole 3x3 inside one chunk (the usual case), one read instead of nine
+            window = self.solid[slot, ly - 1:ly + 2, lx - 1:lx + 2].tolist()
+            for (ox, oy), hit in zip(NEIGHBOURS, self.hits):
+                if window[oy + 1][ox + 1]:
+                    self.set_hit(hit, slot, gx + ox, gy + oy)
+            return self.hit_list
+
+        for (ox, oy), hit in zip(NEIGHBOURS, self.hits):
+            x, y = gx + ox, gy + oy
+            slot = self.slot(x, y)
+            if slot >= 0 and self.solid.item(slot, y & CHUNK_MASK, x & CHUNK_MASK):
+                self.set_hit(hit, slot, x, y)
+        return self.hit_list
+
+    def set_hit(self, hit:TileHit, slot:int, x:int, y:int):
+        ly, lx = y & CHUNK_MASK, x & CHUNK_MASK
+        hit.rect.update(x * self.tile_size, y * self.tile_size, self.tile_size, self.tile_size)
+        hit.friction = self.friction.item(slot, ly, lx) # .item() skips making numpy scalars
+        hit.material = self.material.item(slot, ly, lx)
+        self.hit_list.append(hit)
+
+    def sweep(self, rect:pg.FRect, dx:float, dy:float) -> Tuple[float, Tuple[int, int], Optional[TileHit]]:
+        """Moves rect by (dx, dy) through the grid, returns (time of impact 0-1, normal, hit tile or None).
+
+        DDA over the tile borders the leading edges cross, so nothing gets skipped however long the step is.
+        Boxes already inside a tile aren't reported, that's what neighbours() is for. The hit is reused by the next call.
+        """
+        if dx == 0 and dy == 0:
+            return 1.0, (0, 0), None
+
+        ts = self.tile_size
+        lo, hi, d = (rect.x, rect.y), (rect.x + rect.w, rect.y + rect.h), (dx, dy)
+        step, lead = [0, 0], [0, 0]
+        t_next, t_delta = [math.inf, math.inf], [math.inf, math.inf]
+        for i in (0, 1):
+            if d[i] > 0:
+                step[i] = 1
+                lead[i] = math.ceil(hi[i] / ts - SWEEP_EPSILON) - 1 # cell the leading edge is in
+                t_next[i] = ((lead[i] + 1) * ts - hi[i]) / d[i]
+                t_delta[i] = ts / d[i]
+            elif d[i] < 0:
+                step[i] = -1
+                lead[i] = math.floor(lo[i] / ts + SWEEP_EPSILON)
+                t_next[i] = (lead[i] * ts - lo[i]) / d[i]
+                t_delta[i] = -ts / d[i]
+
+        while True:
+            axis = 0 if t_next[0] <= t_next[1] else 1
+            t = t_next[axis]
+            if t > 1:
+                return 1.0, (0, 0), None
+            lead[axis] += step[axis]
+
+            # the column/row of cells the box just moved into, as wide as the box is at time t
+            other = 1 - axis
+            first = math.floor((lo[other] + d[other] * t) / ts + SWEEP_EPSILON)
+            last = math.ceil((hi[other] + d[other] * t) / ts - SWEEP_EPSILON) - 1
+            for cell in range(first, last + 1):
+                gx, gy = (lead[0], cell) if axis == 0 else (cell, lead[1])
+                slot = self.slot(gx, gy)
+                if slot >= 0 and self.solid.item(slot, gy & CHUNK_MASK, gx & CHUNK_MASK):
+                    hit = self.sweep_hit
+                    hit.rect.update(gx * ts, gy * ts, ts, ts)
+                    hit.friction = self.friction.item(slot, gy & CHUNK_MASK, gx & CHUNK_MASK)
+                    hit.material = self.material.item(slot, gy & CHUNK_MASK, gx & CHUNK_MASK)
+                    normal = (-step[0], 0) if axis == 0 else (0, -step[1])
+                    return max(t, 0.0), normal, hit
+
+            t_next[axis] += t_delta[axis]
@@ -5,6 +5,7 @@ import glm
 import os, sys
 
 from typing import TYPE_CHECKING
+from src.planet_renderer import PlanetRenderer, QUALITIES as PLANET_QUALITIES
 
 WEB = sys.platform in ("emscripten", "wasi")
 
@@ -16,6 +17,14 @@ class EventManager:
     def __init__(self, app: "Game") -> None:
         self.app = app
 
+    def get_planet_renderer(self) -> PlanetRenderer:
+        # the current scene's, None if it has none. share_data["space_planet"] outlives the space scene so it can't be trusted
+        for obj in getattr(self.app.scene_manager.scene, "opaque_objects", []):
+            renderer = getattr(obj, "renderer", None)
+            if isinstance(renderer, PlanetRenderer) and not renderer.destroyed:
+                return renderer
+        return None
+
     def handle_events(self, events):
         for event in events:
             if event.type == pg.QUIT or (
@@ -41,6 +50,20 @@ class EventManager:
                 elif event.key == pg.K_F2:
                     try: self.app.share_data["space_planet"].planet_manager.tp_planet()
                     except: pass
+
+                elif event.key == pg.K_F3: # how much the planet shader costs per body
+                    renderer = self.get_planet_renderer()
+                    if renderer is not None:
+                        renderer.fragment_report()
+                        renderer.noise_report()
+                        renderer.lod_report()
+
+                elif event.key == pg.K_F4: # planet shading quality, space and the planet scene both follow it
+                    quality = self.app.share_data.get("planet_quality", PLANET_QUALITIES[0])
+                    self.app.share_data["planet_quality"] = PLANET_QUALITIES[(PLANET_QUALITIES.index(quality) + 1) % len(PLANET_QUALITIES)]
+
+                elif event.key == pg.K_F5: # baked noise textures vs computing the fbm and dither in the planet shader
+                    self.app.share_data["planet_baked_noise"] = not self.app.share_data.get("planet_baked_noise", True)
                     
                 elif self.app.scene_manager.current_scene == "menu":
                     if event.key == pg.K_w:
@@ -0,0 +1,162 @@
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+import numpy as np
+
+from engine.texture import Texture
+
+if TYPE_CHECKING:
+    import zengl
+    from engine.vao import VAO
+    from engine.fbo import Framebuffer
+
+# particle state lives in two float textures, one texel per particle
+# State0: position xy, velocity xy. State1: life left, max life, random seed, unused
+STATE_FORMATS = ["rgba32float", "rgba32float"]
+STATE_SIDE = 320 # 320 * 320 == 102400 particles
+
+
+class GPUParticles:
+    """Particles simulated and drawn entirely on the gpu, the cpu cost per frame doesn't depend on the count.
+
+    The state textures get advanced by a fullscreen pass (shaders/gpu_particle_sim.*.glsl) that reads one framebuffer
+    and writes the other, then they swap. The draw pass (shaders/gpu_particle.*.glsl) is one instanced quad per texel
+    that fetches its particle from the state in the vertex shader. Dead particles respawn inside `spawn` while emitting.
+    """
+    def __init__(
+        self,
+        app,
+        side:int = STATE_SIDE,
+        spawn:Tuple[float, float, float, float] = (0, 0, 0, 0),
+        velocity:Tuple[float, float] = (0, 0),
+        jitter:Tuple[float, float] = (0, 0),
+        gravity:Tuple[float, float] = (0, 0),
+        life:Tuple[float, float] = (1, 1),
+        drag:float = 0.0,
+        sway:float = 0.0,
+        radius:float = 1.0,
+        shrink:float = 0.0,
+        color:Sequence[float] = (1, 1, 1, 1),
+        depth:float = -0.1,
+        fbo:str = "default",
+    ):
+        self.app = app
+        self.ctx:"zengl.Context" = app.ctx
+        self.side = side
+        self.count = side * side
+        self.emitting = True
+        self.pending = 0.0 # simulated time the gpu hasn't caught up with yet, see tick()
+
+        # everything here gets uploaded as uniforms every frame, change them whenever
+        self.spawn = spawn # x0, y0, x1, y1 world rect dead particles respawn in
+        self.velocity = velocity # spawn velocity, +- jitter
+        self.jitter = jitter
+        self.gravity = gravity
+        self.life = life # min, max seconds
+        self.drag = drag
+        self.sway = sway # sideways wobble, px/s^2
+        self.radius = radius
+        self.shrink = shrink # 0 == same size all its life, 1 == shrinks to nothing
+        self.color = color
+        self.depth = depth
+
+        framebuffers = self.app.mesh.vao.Framebuffers
+        self.states:List["Framebuffer"] = [
+            framebuffers.get_framebuffer((side, side), depth_type="depth16unorm", color_type=STATE_FORMATS) for _ in range(2)
+        ]
+        self.textures = [[Texture(image, repeat=("clamp_to_edge", "clamp_to_edge")) for image in state.image_out] for state in self.states]
+        self.current = 0 # index of the state that holds the latest particles
+        self.seed()
+
+        # one sim VAO per direction, a pipeline can only ever render into one framebuffer
+        self.sim_vaos:List["VAO"] = []
+        for i in range(2):
+            vao = self.app.mesh.vao.get_vao(
+                fbo=self.states[1 - i],
+                program=self.app.mesh.vao.program.programs["gpu_particle_sim"],
+                vbo=self.app.mesh.vao.vbo.vbos["plane"],
+                umap={
+                    "dt": "float",
+                    "emitting": "float",
+                    "spawn": "vec4",
+                    "velocity": "vec2",
+                    "jitter": "vec2",
+                    "gravity": "vec2",
+                    "lifeRange": "vec2",
+                    "drag": "float",
+                    "sway": "float",
+                },
+                tmap=["State0", "State1"],
+            )
+            vao.texture_bind(0, "State0", self.textures[i][0])
+            vao.texture_bind(1, "State1", self.textures[i][1])
+            self.sim_vaos.append(vao)
+
+        self.vao:"VAO" = self.app.mesh.vao.get_vao(
+            fbo=self.app.mesh.vao.Framebuffers.framebuffers[fbo],
+            program=self.app.mesh.vao.program.programs["gpu_particle"],
+            vbo=self.app.mesh.vao.vbo.vbos["plane"],
+            umap={
+                "color": "vec4",
+                "radius": "float",
+                "shrink": "float",
+                "depth": "float",
+            },
+            tmap=["State0", "State1"],
+        )
+
+    def seed(self):
+        # one time upload so the lives are staggered from the start instead of everything spawning on the same frame
+        rng = np.random.default_rng()
+        n = self.count
+        lives = rng.uniform(self.life[0], self.life[1], n)
+        state0 = np.zeros((n, 4), dtype="f4")
+        state0[:, 0] = rng.uniform(self.spawn[0], self.spawn[2], n)
+        state0[:, 1] = rng.uniform(self.spawn[1], self.spawn[3], n)
+        state0[:, 2:4] = np.asarray(self.velocity) + (rng.random((n, 2)) * 2 - 1) * np.asarray(self.jitter)
+        state1 = np.zeros((n, 4), dtype="f4")
+        state1[:, 0] = lives * rng.random(n) # somewhere into their life
+        state1[:, 1] = lives
+        state1[:, 2] = rng.random(n)
+        for state in self.states:
+            state.image_out[0].write(state0)
+            state.image_out[1].write(state1)
+            state.depth_out.clear()
+
+    def tick(self, dt:float):
+        # the gpu catches up once a frame in update(), one pass no matter how many ticks ran
+        self.pending += dt
+
+    def simulate(self):
+        if self.pending <= 0:
+            return
+        vao = self.sim_vaos[self.current]
+        vao.uniform_bind("dt", self.pending)
+        vao.uniform_bind("emitting", float(self.emitting))
+        vao.uniform_bind("spawn", self.spawn)
+        vao.uniform_bind("velocity", self.velocity)
+        vao.uniform_bind("jitter", self.jitter)
+        vao.uniform_bind("gravity", self.gravity)
+        vao.uniform_bind("lifeRange", self.life)
+        vao.uniform_bind("drag", self.drag)
+        vao.uniform_bind("sway", self.sway)
+        vao.render()
+        self.current = 1 - self.current
+        self.pending = 0.0
+
+    def update(self):
+        self.render()
+
+    def render(self):
+        self.simulate()
+        # draws are replayed in order at the arena flush, so this reads what simulate() just wrote
+        self.vao.texture_bind(0, "State0", self.textures[self.current][0])
+        self.vao.texture_bind(1, "State1", self.textures[self.current][1])
+        self.vao.uniform_bind("color", self.color)
+        self.vao.uniform_bind("radius", self.radius)
+        self.vao.uniform_bind("shrink", self.shrink)
+        self.vao.uniform_bind("depth", self.depth)
+        self.vao.render(instance_count=self.count)
+
+    def destroy(self):
+        [vao.destroy() for vao in self.sim_vaos + [self.vao]]
+        [state.destroy(self.ctx) for state in self.states]
+        self.sim_vaos, self.vao, self.states = [], None, []
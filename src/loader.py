@@ -7,6 +7,8 @@ import src.planet as planet
 import src.planet_manager as planet_manager
 import src.postprocessor as postprocessor
 import src.player as player
+import src.particles as particles
+import src.gpu_particles as gpu_particles
 
 from src.space_menu import SpaceMenu
 from src.spaceship import SpaceShip
@@ -22,6 +24,8 @@ EventManager = event_manager.EventManager
 Sun = sun.Sun
 Tilemap = tilemap.Tilemap
 Player = player.Player
+ParticleSystem = particles.ParticleSystem
+GPUParticles = gpu_particles.GPUParticles
 
 SpaceMenu = SpaceMenu
 SpaceShip = SpaceShip
\ No newline at end of file
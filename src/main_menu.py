@@ -52,7 +52,7 @@ class MainMenu:
             fbo=self.app.mesh.vao.Framebuffers.framebuffers["default"],
             program=self.app.mesh.vao.program.programs["main_menu_ui"],
             vbo=self.app.mesh.vao.vbo.vbos["plane"],
-            umap={"u_plsdriver": "vec3", "time":"float"},  # some drivers want this
+            umap={"u_plsdriver": "vec3"},  # some drivers want this
             tmap=["T_ui"],
         )
         app.mesh.vao.vaos["main_menu"] = self.vao
@@ -64,17 +64,12 @@ class MainMenu:
             umap=
 			{ 
 				"u_color_offset": "vec3",
-				"screenResolution": "vec2",
-				"mos": "vec2",
 			},
             tmap=["U_bg_image"],
         )
         self.update_surf()
         self.send_tex()
 
-    def send_uniforms(self):
-        self.vao.uniform_bind("time", struct.pack("f", self.app.elapsed_time))
-
     def send_tex(self):
         try:
             self.app.mesh.texture.del_texture("ui")
@@ -182,7 +177,6 @@ class MainMenu:
         # im sorry performance
         self.update_surf()
         self.send_tex()
-        self.send_uniforms()
 
         self.vao.render()
         # self.init_uniforms()
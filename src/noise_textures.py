@@ -0,0 +1,128 @@
+"""The planet shader's fbm and dither baked into textures, so a fragment samples them instead of hashing dozens of sin()s.
+
+Baked once at startup and cached on disk (assets/cache/), the bake only runs again when a parameter changes.
+Rebake and time it:
+    python -m src.noise_textures
+"""
+from typing import TYPE_CHECKING
+import os
+import time
+import numpy as np
+
+from engine.texture import Texture
+
+if TYPE_CHECKING:
+    from main import Game
+
+# same as planet.frag.glsl's size, seed and OCTAVES, its rand() wraps every `size` units so the fbm tiles too
+NOISE_SIZE = 25
+NOISE_SEED = 3.4
+NOISE_OCTAVES = 2
+NOISE_TEXELS = 32 # texels per noise unit, the lattice is smoothstepped so linear filtering between these is close enough
+BAYER_SIZE = 8 # thresholded at 0.5 any 2^n bayer matrix is the checker the shader used to compute
+
+CACHE_DIR = "assets/cache/"
+
+
+def rand(coord:np.ndarray, size:float=NOISE_SIZE, seed:float=NOISE_SEED) -> np.ndarray:
+    # in float32 like the gpu, the hash is sin() of a few thousand so float64 gives different values
+    coord = np.mod(coord, round(size)).astype("f4")
+    hashed = np.sin(coord[..., 0] * np.float32(12.9898) + coord[..., 1] * np.float32(78.233)) * np.float32(15.5453) * np.float32(seed)
+    return hashed - np.floor(hashed)
+
+
+def noise(coord:np.ndarray, size:float=NOISE_SIZE, seed:float=NOISE_SEED) -> np.ndarray:
+    # value noise, cubic between the lattice points like the shader
+    i = np.floor(coord)
+    f = coord - i
+    a = rand(i, size, seed)
+    b = rand(i + (1, 0), size, seed)
+    c = rand(i + (0, 1), size, seed)
+    d = rand(i + (1, 1), size, seed)
+    cubic = f * f * (3 - 2 * f)
+    cx, cy = cubic[..., 0], cubic[..., 1]
+    return a + (b - a) * cx + (c - a) * cy * (1 - cx) + (d - b) * cx * cy
+
+
+def fbm(coord:np.ndarray, size:float=NOISE_SIZE, seed:float=NOISE_SEED, octaves:int=NOISE_OCTAVES) -> np.ndarray:
+    value = np.zeros(coord.shape[:-1])
+    scale = 0.5
+    for _ in range(octaves):
+        value += noise(coord, size, seed) * scale
+        coord = coord * 2
+        scale *= 0.5
+    return value
+
+
+def fbm_max(octaves:int=NOISE_OCTAVES) -> float:
+    # the texture stores fbm / this so it fills 0-255
+    return 1 - 0.5 ** octaves
+
+
+def bake_fbm(size:int=NOISE_SIZE, seed:float=NOISE_SEED, octaves:int=NOISE_OCTAVES, texels:int=NOISE_TEXELS) -> np.ndarray:
+    # one period of the fbm, texel (x, y) holds fbm at its centre so texture(T_fbm, coord / size) == fbm(coord)
+    side = size * texels
+    axis = (np.arange(side) + 0.5) / texels
+    x, y = np.meshgrid(axis, axis) # rows are y, like the image
+    value = fbm(np.stack([x, y], axis=-1), size, seed, octaves) / fbm_max(octaves)
+    return (value * 255).round().astype("u1")
+
+
+def bake_bayer(side:int=BAYER_SIZE) -> np.ndarray:
+    # recursive bayer matrix, thresholds at the middle of each of the side * side levels
+    matrix = np.zeros((1, 1), dtype="i4")
+    while len(matrix) < side:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return ((matrix + 0.5) / matrix.size * 255).round().astype("u1")
+
+
+def fbm_cache_path(size:int=NOISE_SIZE, seed:float=NOISE_SEED, octaves:int=NOISE_OCTAVES, texels:int=NOISE_TEXELS) -> str:
+    return f"{CACHE_DIR}fbm_{size}_{seed}_{octaves}_{texels}.npy"
+
+
+def load_fbm(size:int=NOISE_SIZE, seed:float=NOISE_SEED, octaves:int=NOISE_OCTAVES, texels:int=NOISE_TEXELS) -> np.ndarray:
+    path = fbm_cache_path(size, seed, octaves, texels)
+    if os.path.exists(path):
+        return np.load(path)
+    data = bake_fbm(size, seed, octaves, texels)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.save(path, data)
+    except OSError: # read only (web), baking every start is fine
+        pass
+    return data
+
+
+class NoiseTextures:
+    """T_fbm (r8unorm, linear, repeat) and T_bayer (r8unorm, texelFetch'ed) for the planet shader.
+
+    Get the shared one with NoiseTextures.get(app), both end up in app.mesh.texture.textures like the body table's.
+    """
+    def __init__(self, app:"Game"):
+        self.app = app
+        fbm_data = load_fbm()
+        bayer_data = bake_bayer()
+
+        textures = self.app.mesh.texture
+        fbm_image = self.app.ctx.image(fbm_data.shape[::-1], "r8unorm", fbm_data.tobytes())
+        bayer_image = self.app.ctx.image(bayer_data.shape[::-1], "r8unorm", bayer_data.tobytes())
+        self.fbm = Texture(fbm_image, filter=("linear", "linear"), repeat=("repeat", "repeat"))
+        self.bayer = Texture(bayer_image, repeat=("repeat", "repeat"))
+        textures.textures["fbm"] = self.fbm # Textures.destroy cleans them up
+        textures.textures["bayer"] = self.bayer
+
+    @classmethod
+    def get(cls, app:"Game") -> "NoiseTextures":
+        # built once, space and planet scenes share it
+        if "noise_textures" not in app.share_data:
+            app.share_data["noise_textures"] = cls(app)
+        return app.share_data["noise_textures"]
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    data = bake_fbm()
+    print(f"fbm {data.shape[1]}x{data.shape[0]} baked in {(time.perf_counter() - start) * 1000:.0f} ms, range {data.min():.3f} - {data.max():.3f}")
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.save(fbm_cache_path(), data)
+    print(bake_bayer())
@@ -0,0 +1,211 @@
+from typing import TYPE_CHECKING, Sequence, Tuple
+import numpy as np
+
+from engine.vbo import InstancingVBO
+from src.physics import step_bodies
+
+if TYPE_CHECKING:
+    import zengl
+    from engine.vao import VAO
+    from engine.texture import Texture
+    from src.collision import CollisionGrid
+
+# one row per particle, rows [:count] get uploaded as-is into the instance buffer
+# 0-1 position, 2-3 velocity (skipped by the format), 4 life, 5 max life, 6 radius, 7 texture layer (-1 == circle), 8-11 colour
+PARTICLE_FLOATS = 12
+PARTICLE_FORMAT = "2f 8x 2f 2f 4f"
+PARTICLE_ATTRIBS = ("in_center", "in_life", "in_shape", "in_color")
+POS, VEL, LIFE, MAX_LIFE, RADIUS, LAYER, COLOR = slice(0, 2), slice(2, 4), 4, 5, 6, 7, slice(8, 12)
+
+PARTICLE_CAPACITY = 1024
+GRAVITY = 500 # what ParticleManager used
+
+
+class ParticleSystem:
+    """Particles in one preallocated float array, stepped with numpy and drawn with one instanced call.
+
+    Rows [:count] are alive. Dead rows get the last live rows swapped into them, so the live slice stays packed.
+    emit() hands out ids from a free list, slot_of[id] follows a particle around while it gets swapped.
+    With a grid, particles are boxes as wide as they are (up to a tile) going through physics.step_bodies like
+    RigidBody does: a hit bounces the velocity into the wall by `bounce`, the slide along it only loses `friction`.
+    The VAO is made on the first render, everything else is plain numpy.
+    """
+    def __init__(
+        self,
+        app,
+        grid:"CollisionGrid" = None,
+        texture:"Texture" = None,
+        capacity:int = PARTICLE_CAPACITY,
+        gravity:float = GRAVITY,
+        bounce:float = 0.3,
+        friction:float = 5.0,
+        fbo:str = "default",
+        program:str = "particle",
+    ):
+        self.app = app
+        self.ctx:"zengl.Context" = app.ctx
+        self.grid = grid # particles bounce off its solid tiles, None == fly through everything
+        self.texture = texture # texture array for layer >= 0 particles
+        self.gravity = gravity
+        self.bounce = bounce # elasticity into the wall
+        self.friction = friction # how fast sliding along a tile slows down, times the tile's friction
+        self.depth = 0.0 # gl depth, same units as the sprites' place.z / 1000
+        self.fbo = fbo
+        self.program = program
+
+        self.count = 0
+        self.data:np.ndarray = None
+        self.ids:np.ndarray = None # slot -> id
+        self.slot_of:np.ndarray = None # id -> slot, -1 == dead
+        self.free:np.ndarray = None # stack of unused ids, [:free_count] are valid
+        self.free_count = 0
+        self.ibo:InstancingVBO = None
+        self.vao:"VAO" = None
+        self.reserve(capacity)
+
+    def reserve(self, capacity:int):
+        # like SpriteBatch.reserve, growing only reallocates the VAO's instance buffer
+        old_capacity = 0 if self.data is None else len(self.data)
+        data = np.zeros((capacity, PARTICLE_FLOATS), dtype="f4")
+        ids = np.zeros(capacity, dtype="i4")
+        slot_of = np.full(capacity, -1, dtype="i4")
+        free = np.zeros(capacity, dtype="i4")
+        # new ids go on the bottom of the stack so the old free ones get reused first, the top hands out the lowest id
+        new_ids = np.arange(capacity - 1, old_capacity - 1, -1, dtype="i4")
+        free[:len(new_ids)] = new_ids
+        if self.data is not None:
+            data[:self.count] = self.data[:self.count]
+            ids[:self.count] = self.ids[:self.count]
+            slot_of[:old_capacity] = self.slot_of
+            free[len(new_ids):len(new_ids) + self.free_count] = self.free[:self.free_count]
+        self.free_count += len(new_ids)
+        self.data, self.ids, self.slot_of, self.free = data, ids, slot_of, free
+        if self.vao is not None:
+            self.vao.grow_instances(self.data.nbytes)
+
+    def make_vao(self):
+        self.ibo = InstancingVBO(self.ctx, self.ctx.buffer(size=self.data.nbytes), PARTICLE_FORMAT, *PARTICLE_ATTRIBS, offset=2)
+        self.vao = self.app.mesh.vao.get_ins_vao(
+            fbo=self.app.mesh.vao.Framebuffers.framebuffers[self.fbo],
+            program=self.app.mesh.vao.program.programs[self.program],
+            vbo=self.app.mesh.vao.vbo.vbos["plane"],
+            ibo=self.ibo,
+            umap={
+                "key_color": "vec3", # discarded in textured particles, black like the sprites
+                "depth": "float",
+            },
+            tmap=["Sprites"],
+        )
+        if self.texture is not None:
+            self.vao.texture_bind(0, "Sprites", self.texture)
+
+    def emit(
+        self,
+        pos:np.ndarray,
+        velocity:np.ndarray = (0, 0),
+        life:np.ndarray = 1.0,
+        radius:np.ndarray = 5.0,
+        color:Sequence[float] = (1, 1, 1, 1),
+        layer:np.ndarray = -1,
+    ) -> np.ndarray:
+        # spawns one particle per row of pos (or one for a single (x, y)), everything else broadcasts, returns their ids
+        pos = np.atleast_2d(np.asarray(pos, dtype="f4"))
+        n = len(pos)
+        if self.count + n > len(self.data):
+            self.reserve(max(len(self.data) * 2, self.count + n))
+
+        rows = self.data[self.count:self.count + n]
+        rows[:, POS] = pos
+        rows[:, VEL] = velocity
+        rows[:, LIFE] = life
+        rows[:, MAX_LIFE] = life
+        rows[:, RADIUS] = radius
+        rows[:, LAYER] = layer
+        rows[:, COLOR] = color
+
+        ids = self.free[self.free_count - n:self.free_count][::-1].copy()
+        self.free_count -= n
+        self.ids[self.count:self.count + n] = ids
+        self.slot_of[ids] = np.arange(self.count, self.count + n, dtype="i4")
+        self.count += n
+        return ids
+
+    def burst(self, pos:Tuple[float, float], n:int, speed:float, life:float, radius:float, color:Sequence[float]=(1, 1, 1, 1), spread:float=np.pi, angle:float=np.pi / 2) -> np.ndarray:
+        # n particles flying out of pos in a cone of `spread` radians around `angle`, speeds and lives jittered a bit
+        angles = angle + (np.random.random(n) - 0.5) * spread
+        speeds = speed * (0.5 + np.random.random(n) * 0.5)
+        velocity = np.stack([np.cos(angles) * speeds, np.sin(angles) * speeds], axis=1)
+        return self.emit(np.broadcast_to(pos, (n, 2)), velocity, life * (0.75 + np.random.random(n) * 0.25), radius, color)
+
+    def kill(self, ids:np.ndarray):
+        # dead ones get compacted away on the next tick
+        slots = self.slot_of[np.asarray(ids, dtype="i4")]
+        self.data[slots[slots >= 0], LIFE] = 0
+
+    def step(self, dt:float):
+        n = self.count
+        if n == 0:
+            return
+        data = self.data[:n]
+        data[:, LIFE] -= dt
+
+        if self.grid is None:
+            data[:, 3] -= self.gravity * dt
+            data[:, POS] += data[:, VEL] * dt
+            return
+
+        # the sweep wants bottom left corners, a particle stuck in a tile gets pushed out like RigidBody would be
+        half = np.minimum(data[:, RADIUS], self.grid.tile_size / 2)[:, None]
+        corner = data[:, POS] - half
+        step_bodies(
+            self.grid, corner, data[:, VEL], np.repeat(half * 2, 2, axis=1),
+            (self.bounce, self.bounce), (self.friction, self.friction), (0, 0), dt, self.gravity, np.inf,
+        )
+        data[:, POS] = corner + half
+
+    def compact(self):
+        # swap remove every dead particle at once: live rows from the tail fill the dead rows at the front
+        n = self.count
+        dead = self.data[:n, LIFE] <= 0
+        alive = n - int(dead.sum())
+        if alive == n:
+            return
+        holes = np.flatnonzero(dead[:alive])
+        movers = alive + np.flatnonzero(~dead[alive:])
+
+        freed = self.ids[:n][dead]
+        self.slot_of[freed] = -1
+        self.free[self.free_count:self.free_count + len(freed)] = freed
+        self.free_count += len(freed)
+
+        self.data[holes] = self.data[movers]
+        self.ids[holes] = self.ids[movers]
+        self.slot_of[self.ids[holes]] = holes
+        self.count = alive
+
+    def tick(self, dt:float):
+        self.step(dt)
+        self.compact()
+
+    def update(self):
+        self.render()
+
+    def render(self):
+        if self.count == 0:
+            return
+        if self.vao is None:
+            self.make_vao()
+        # the draw is deferred to the arena flush, the buffer is only written once a frame
+        self.ibo.vbo.write(self.data[:self.count])
+        self.vao.uniform_bind("depth", self.depth)
+        self.vao.render(instance_count=self.count)
+
+    def release(self):
+        if self.vao is not None:
+            self.vao.destroy()
+            self.ibo.destroy()
+            self.vao = self.ibo = None
+
+    def destroy(self):
+        self.release()
+        self.data = self.ids = self.slot_of = self.free = None
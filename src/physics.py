@@ -0,0 +1,189 @@
+from typing import TYPE_CHECKING, Tuple
+import numpy as np
+
+from src.collision import NEIGHBOURS
+from src.broadphase import SpatialHash
+
+if TYPE_CHECKING:
+    from src.collision import CollisionGrid
+
+# collision flags, named like RigidBody.collision_types
+BOTTOM = 1
+TOP = 2
+LEFT = 4
+RIGHT = 8
+
+GRAVITY = 392
+MAX_FALL = 300
+
+NEIGHBOURS_X = np.array([offset[0] for offset in NEIGHBOURS], dtype="i4")
+NEIGHBOURS_Y = np.array([offset[1] for offset in NEIGHBOURS], dtype="i4")
+
+
+class PhysicsWorld:
+    """Lots of RigidBody-like boxes in numpy arrays, stepped with one call a frame.
+
+    Same sweep as RigidBody.apply_physics: move x, resolve the first hit, move y, gravity, resolve the first hit,
+    drag if nothing got hit. Rows [:count] are alive, remove() swaps the last body into the hole.
+    For boxes that don't have arrays of their own (debris, pickups), ParticleSystem keeps its own and calls step_bodies().
+    """
+    ARRAYS = ("pos", "vel", "size", "elasticity", "friction", "drag", "flags")
+
+    def __init__(self, grid:"CollisionGrid", capacity:int=256, gravity:float=GRAVITY, max_fall:float=MAX_FALL):
+        self.grid = grid
+        self.gravity = gravity
+        self.max_fall = max_fall
+        self.count = 0
+
+        self.pos = np.zeros((capacity, 2), dtype="f4") # bottom left corner, like rect.x / rect.y
+        self.vel = np.zeros((capacity, 2), dtype="f4")
+        self.size = np.zeros((capacity, 2), dtype="f4")
+        self.elasticity = np.zeros((capacity, 2), dtype="f4")
+        self.friction = np.zeros((capacity, 2), dtype="f4")
+        self.drag = np.zeros((capacity, 2), dtype="f4")
+        self.flags = np.zeros(capacity, dtype="u1")
+        self.broadphase = SpatialHash()
+
+    def reserve(self, capacity:int):
+        for name in self.ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(
+        self,
+        pos:Tuple[float, float],
+        size:Tuple[float, float],
+        velocity:Tuple[float, float] = (0, 0),
+        elasticity:Tuple[float, float] = (0.1, 0.15),
+        friction:Tuple[float, float] = (13.25, 5.375),
+        drag:Tuple[float, float] = (7.125, 1.0),
+    ) -> int:
+        # defaults are RigidBody's, returns the body's index (until something gets removed)
+        if self.count == len(self.pos):
+            self.reserve(len(self.pos) * 2)
+        i = self.count
+        self.pos[i], self.size[i], self.vel[i] = pos, size, velocity
+        self.elasticity[i], self.friction[i], self.drag[i] = elasticity, friction, drag
+        self.flags[i] = 0
+        self.count += 1
+        return i
+
+    def remove(self, index:int) -> int:
+        # swap remove, returns the index of the body that moved into `index` (or -1 if it was the last one)
+        last = self.count - 1
+        self.count = last
+        if index == last:
+            return -1
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            array[index] = array[last]
+        return last
+
+    def remove_where(self, mask:np.ndarray):
+        # drops every body where mask[:count] is True, keeps the rest in order
+        keep = ~mask[:self.count]
+        alive = int(keep.sum())
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            array[:alive] = array[:self.count][keep]
+        self.count = alive
+
+    def step(self, dt:float):
+        n = self.count
+        if n == 0:
+            return
+        step_bodies(
+            self.grid, self.pos[:n], self.vel[:n], self.size[:n], self.elasticity[:n], self.friction[:n], self.drag[:n], dt,
+            self.gravity, self.max_fall, self.flags[:n],
+        )
+
+    def body_pairs(self) -> np.ndarray:
+        # (m, 2) indices of bodies overlapping each other, call after step() so it's this tick's positions
+        pos, size = self.pos[:self.count], self.size[:self.count]
+        self.broadphase.build(pos, size)
+        return self.broadphase.overlaps(pos, size)
+
+
+def first_hit(grid:"CollisionGrid", pos:np.ndarray, size:np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # first solid tile overlapping each body in the 3x3 around it, in NEIGHBOURS order like RigidBody.collision_test
+    # returns hit mask, hit tile x, hit tile y (world units) and the tile's friction
+    tile_size = grid.tile_size
+    cx = np.floor(pos[:, 0] / tile_size).astype("i4")
+    cy = np.floor(pos[:, 1] / tile_size).astype("i4")
+    gx = cx[:, None] + NEIGHBOURS_X
+    gy = cy[:, None] + NEIGHBOURS_Y
+    tx, ty = gx * tile_size, gy * tile_size
+
+    hits = grid.solid_at(gx, gy)
+    hits &= (pos[:, 0, None] < tx + tile_size) & (pos[:, 0, None] + size[:, 0, None] > tx) # pg.Rect.colliderect
+    hits &= (pos[:, 1, None] < ty + tile_size) & (pos[:, 1, None] + size[:, 1, None] > ty)
+    hits &= (size[:, 0, None] > 0) & (size[:, 1, None] > 0)
+
+    hit = hits.any(axis=1)
+    first = hits.argmax(axis=1)
+    rows = np.arange(len(pos))
+    hit_x, hit_y = gx[rows, first], gy[rows, first]
+    friction = np.where(hit, grid.friction_at(hit_x, hit_y), 1.0)
+    return hit, (hit_x * tile_size).astype("f4"), (hit_y * tile_size).astype("f4"), friction
+
+
+def step_bodies(
+    grid:"CollisionGrid",
+    pos:np.ndarray,
+    vel:np.ndarray,
+    size:np.ndarray,
+    elasticity:np.ndarray,
+    friction:np.ndarray,
+    drag:np.ndarray,
+    dt:float,
+    gravity:float = GRAVITY,
+    max_fall:float = MAX_FALL,
+    flags:np.ndarray = None,
+):
+    """RigidBody.apply_physics for every row of the (n, 2) arrays at once, pos/vel/flags are changed in place.
+
+    elasticity/friction/drag can be one (x, y) pair for everything. pos and vel can be strided views,
+    ParticleSystem steps the columns of its instance data with this.
+    """
+    n = len(pos)
+    elasticity, friction, drag = (np.broadcast_to(np.asarray(array, dtype="f4"), (n, 2)) for array in (elasticity, friction, drag))
+    if flags is None:
+        flags = np.zeros(n, dtype="u1")
+    tile_size = grid.tile_size
+    flags[:] = 0
+
+    # x
+    pos[:, 0] += vel[:, 0] * dt
+    hit, tile_x, _, tile_friction = first_hit(grid, pos, size)
+    right = hit & (vel[:, 0] > 0)
+    left = hit & (vel[:, 0] < 0)
+    pos[right, 0] = tile_x[right] - size[right, 0]
+    pos[left, 0] = tile_x[left] + tile_size
+    flags[right] |= LEFT
+    flags[left] |= RIGHT
+
+    vel[hit, 1] *= np.exp(-friction[hit, 1] * tile_friction[hit] * dt)
+    vel[hit, 0] *= -elasticity[hit, 0]
+    vel[hit & (np.abs(vel[:, 0]) < 1.5), 0] = 0
+    apply_drag = ~hit
+
+    # y
+    pos[:, 1] += vel[:, 1] * dt
+    hit, _, tile_y, tile_friction = first_hit(grid, pos, size)
+    vel[:, 1] -= gravity * dt
+    down = hit & (vel[:, 1] < 0)
+    up = hit & (vel[:, 1] > 0)
+    pos[down, 1] = tile_y[down] + tile_size
+    pos[up, 1] = tile_y[up] - size[up, 1]
+    flags[down] |= BOTTOM
+    flags[up] |= TOP
+
+    vel[hit, 0] *= np.exp(-friction[hit, 0] * tile_friction[hit] * dt)
+    vel[hit, 1] *= -elasticity[hit, 1]
+    vel[hit & (np.abs(vel[:, 1]) < 1), 1] = 0
+    apply_drag &= ~hit
+
+    np.maximum(vel[:, 1], -max_fall, out=vel[:, 1])
+    vel[apply_drag] *= np.exp(-drag[apply_drag] * dt)
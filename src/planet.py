@@ -3,9 +3,14 @@ import math
 from copy import deepcopy
 import struct
 import zengl
-import webcolors
 
 from typing import TYPE_CHECKING
+import numpy as np
+from src.planet_manager import BODIES, camera_zoom, pick_lods
+from src.body_table import BodyTable
+from src.planet_renderer import PlanetRenderer
+
+BACKGROUND_RADIUS = 50 # px, whichever body it is
 
 class Planet:
     def __init__(
@@ -14,32 +19,12 @@ class Planet:
         self.app = app
         self.ctx: zengl.context = app.ctx
 
-        self.load_palette()
+        self.table = BodyTable.get(app, BODIES)
 
         self.time_speed = 1.0
         self.planetRotationSpeed = 0.1
 
         self.uniforms_map = {
-            "time": {
-                "value": lambda: struct.pack("f", self.app.elapsed_time),
-                "glsl_type": "float",
-            },
-            "planetCenter": {
-                "value": lambda: struct.pack("ff", *(glm.vec2(320, 240)- self.app.camera.position.xy/500) ),
-                "glsl_type": "vec2",
-            },
-            "bodyRadius": {
-                "value": lambda: struct.pack("f", 50),
-                "glsl_type": "float",
-            },
-            "cloudRadius": {
-                "value": lambda: struct.pack("f", 55),
-                "glsl_type": "float",
-            },
-            "screenResolution": {
-                "value": lambda: struct.pack("ff", 640.0, 480.0),
-                "glsl_type": "vec2",
-            },
             "aspectRatio": {
                 "value": lambda: struct.pack("f", 3 / 2),
                 "glsl_type": "float",
@@ -56,14 +41,6 @@ class Planet:
                 "value": lambda: struct.pack("fff", *[math.sin(self.app.elapsed_time/50), -0.6, math.cos(self.app.elapsed_time/50)]),
                 "glsl_type": "vec3",
             },
-            "paletteSize": {
-                "value": lambda: struct.pack("i", len(self.palette)),
-                "glsl_type": "int",
-            },
-            "palette": {
-                "value": self.get_palette,
-                "glsl_type": f"vec4[{len(self.palette)}]",
-            },
             "time_speed": {
                 "value": lambda: struct.pack("f", self.time_speed),
                 "glsl_type": "float",
@@ -76,59 +53,19 @@ class Planet:
                 "value": lambda: struct.pack("f", self.app.elapsed_time/480),
                 "glsl_type": "float",
             },
-            "isStar": {
-                "value": lambda: struct.pack("?", False),  # TODO, make this a func
-                "glsl_type": "bool",
-            },
-            "cameraPos": {
-                "value": lambda: struct.pack("ff", self.app.camera.position.x, self.app.camera.position.y),
-                "glsl_type": "vec2",
-            },
         }
 
         umapping = {key: val["glsl_type"] for key, val in self.uniforms_map.items()}
         
-        self.vao = app.mesh.vao.get_vao(
-            fbo=self.app.mesh.vao.Framebuffers.framebuffers["default"],
-            program=self.app.mesh.vao.program.programs["planet"],
-            vbo=self.app.mesh.vao.vbo.vbos["plane"],
-            umap=umapping,
-            tmap=["T_planet", "T_planetUV", "T_planetNormal"],  # texture map
-        )
-        app.mesh.vao.vaos["sun"] = self.vao
-
-        self.tex0 = app.mesh.texture.textures["sun"]
-        self.vao.texture_bind(0, "T_planet", self.tex0)
-        
-        self.tex1 = app.mesh.texture.textures["uv"]
-        self.vao.texture_bind(1, "T_planetUV", self.tex1)
-
-        self.tex2 = app.mesh.texture.textures["normal"]
-        self.vao.texture_bind(2, "T_planetNormal", self.tex2)
+        self.renderer = PlanetRenderer(app, self.table, umapping, capacity=1, impostors=1)
+        self.vao = self.renderer.vao
+        self.lods = np.full(len(self.table.names), -1, dtype="i4") # detail tier per body, -1 == not picked yet
 
         self.init_uniforms()
 
-    def load_palette(self):
-        _palette = """000000
-21283f
-38526e
-3f86b0
-839dbf
-cee3ef
-"""
-        self.palette = []
-        _palette = _palette.splitlines()
-        palette_size = len(_palette)
-        for v in _palette:
-            rgb = webcolors.hex_to_rgb(v if v[0] == "#" else f"#{v}")
-            color = [rgb.red / 255, rgb.green / 255, rgb.blue / 255, 1.0]  # rgba
-            self.palette.append(color)
-
-    def get_palette(self):
-        buffer = bytearray()
-        for rgb in self.palette:
-            buffer.extend(struct.pack("ffff", *rgb))
-        return buffer
+    def get_planet_id(self) -> int:
+        # the body we were closest to in space
+        return self.app.share_data.get("planet_id", self.table.ids["Albasee"])
 
     def init_uniforms(self):
         for key, obj in self.uniforms_map.items():
@@ -142,7 +79,11 @@ cee3ef
 
     def render(self):
         self.init_uniforms()
-        self.vao.render()
+        planet_id = self.get_planet_id()
+        center = glm.vec2(320, 240) - self.app.camera.position.xy / 500
+        scale = BACKGROUND_RADIUS / self.table.rows[planet_id, 0, 0] * camera_zoom(self.app.camera)
+        self.lods[planet_id] = pick_lods(self.table.rows[[planet_id], 0, 1] * scale, self.lods[[planet_id]])[0]
+        self.renderer.render([center.to_tuple()], scale, planet_id, self.lods[planet_id])
         
     def destroy(self):
-        self.app.mesh.vao.del_vao('sun')
\ No newline at end of file
+        self.renderer.destroy()
\ No newline at end of file
@@ -1,13 +1,17 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Tuple
 from pygame import Vector2, image
 import math
 from copy import deepcopy
 import struct
-import webcolors
+import numpy as np
+
+from src.body_index import BodyIndex
+from src.body_table import BodyTable
 
 if TYPE_CHECKING:
     from main import Game
     from src.sun import Sun
+    from engine.camera import Camera
 
 
 # astral bodies
@@ -39,51 +43,48 @@ BODIES = {
     },
 }
 
+# projected cloud radius (screen px) under which a body drops to the next detail tier (planet_renderer.py's LOD_*)
+LOD_RADII = (40.0, 12.0)
+LOD_HYSTERESIS = 0.15 # it has to get this much (fraction of the radius) past a threshold to switch, no popping on the edge
+CAMERA_Z = 120 # camera height where bodies are drawn 1 world px : 1 screen px, where Camera and the tilemap put it
+
+
+def camera_zoom(camera:"Camera") -> float:
+    # how many screen px a world px is at the camera's height, through its projection. Q / E move it
+    return camera.pixels_per_unit() / camera.pixels_per_unit(CAMERA_Z)
+
+
+def pick_lods(radii:np.ndarray, current:np.ndarray) -> np.ndarray:
+    # detail tier for every projected cloud radius (screen px), current is the tier each one had last time (-1 == none yet)
+    thresholds = np.asarray(LOD_RADII)
+    # going down a tier needs the radius below threshold * (1 - h), coming back up needs it above threshold * (1 + h),
+    # in between the body keeps whatever tier it had
+    lowest = (radii[:, None] < thresholds * (1 - LOD_HYSTERESIS)).sum(axis=1)
+    highest = (radii[:, None] < thresholds * (1 + LOD_HYSTERESIS)).sum(axis=1)
+    fresh = current < 0
+    current = np.where(fresh, (radii[:, None] < thresholds).sum(axis=1), current) # no history, no hysteresis
+    return np.clip(current, lowest, highest).astype("i4")
+
 
 class PlanetManager:
     def __init__(self, sun: "Sun", app: "Game") -> None:
         self.app = app
         self.sun = sun
         self.bodies = BODIES
-        self.latest_planet = list(BODIES.keys())[0]
+        self.names = list(BODIES.keys()) # planet id -> name
+        self.positions = np.array([(body["bodyPos"].x, body["bodyPos"].y) for body in BODIES.values()], dtype="f8")
+        self.index = BodyIndex(self.positions)
+        self.latest_planet = None # the first get_closest_planet() picks one
 
-        self.load_palette()
-        self.load_planet_textures()
+        self.table = BodyTable.get(app, BODIES) # radii, light, palette and surface of every body, on the gpu once
+        self.lods = np.full(len(self.names), -1, dtype="i4") # every body's current detail tier, -1 == not picked yet
 
         self.get_closest_planet()
         self.tp_planet()
 
-    def load_planet_textures(self):
-        self.planet_textures = {}
-        for name, body in BODIES.items():
-            tex = self.app.mesh.texture.get_texture(
-                f"assets/textures/planets/{name.lower()}.png"
-            ) # SO THAT TEXTURE.PY CAN DO GARBAGE COLLECTION BCUZ OGL != PYTHON
-            
-            self.app.mesh.texture.textures[name.lower()] = tex
-            self.planet_textures[name.lower()] = tex
-
-    def load_palette(self):
-        _palette = """000000
-21283f
-38526e
-3f86b0
-839dbf
-cee3ef
-"""
-        self.palette = []
-        _palette = _palette.splitlines()
-        palette_size = len(_palette)
-        for v in _palette:
-            rgb = webcolors.hex_to_rgb(v if v[0] == "#" else f"#{v}")
-            color = [rgb.red / 255, rgb.green / 255, rgb.blue / 255, 1.0]  # rgba
-            self.palette.append(color)
-
-    def get_palette(self):
-        buffer = bytearray()
-        for rgb in self.palette:
-            buffer.extend(struct.pack("ffff", *rgb))
-        return buffer
+        self.uniforms = self.get_uniforms()
+        # the rest never changes, which bodies and where is per instance (get_visible_bodies)
+        self.frame_uniforms = {name: self.uniforms[name] for name in ("movedLightDirection", "planetOffset")}
 
     def get_planet_offset(self):
         # scrolls the planet(texture uv)
@@ -95,26 +96,6 @@ cee3ef
         self.light_speed = 0.5
 
         return {
-            "time": {
-                "value": lambda: struct.pack("f", self.app.elapsed_time),
-                "glsl_type": "float",
-            },
-            "planetCenter": {
-                "value": lambda: struct.pack("ff", *self.planetPos),
-                "glsl_type": "vec2",
-            },
-            "bodyRadius": {
-                "value": lambda: struct.pack("f", self.bodyRadius),
-                "glsl_type": "float",
-            },
-            "cloudRadius": {
-                "value": lambda: struct.pack("f", self.cloudRadius),
-                "glsl_type": "float",
-            },
-            "screenResolution": {
-                "value": lambda: struct.pack("ff", *(640, 480)),
-                "glsl_type": "vec2",
-            },
             "aspectRatio": {
                 "value": lambda: struct.pack(
                     "f", 4/3
@@ -127,14 +108,6 @@ cee3ef
                 ),  # TODO: actually code this
                 "glsl_type": "vec3",
             },
-            "paletteSize": {
-                "value": lambda: struct.pack("i", len(self.palette)),
-                "glsl_type": "int",
-            },
-            "palette": {
-                "value": self.get_palette,
-                "glsl_type": f"vec4[{len(self.palette)}]",
-            },
             "time_speed": {
                 "value": lambda: struct.pack("f", self.time_speed),
                 "glsl_type": "float",
@@ -147,51 +120,12 @@ cee3ef
                 "value": lambda: struct.pack("f", self.get_planet_offset()),
                 "glsl_type": "float",
             },
-            "isStar": {
-                "value": lambda: struct.pack(
-                    "?", self.isStar
-                ),  # TODO, make this a func
-                "glsl_type": "bool",
-            },
-            "cameraPos": {
-                "value": lambda: struct.pack(
-                    "ff", self.app.camera.position.x, self.app.camera.position.y
-                ),
-                "glsl_type": "vec2",
-            },
         }
 
     def dynamic_uniforms(self):
-        past = deepcopy(self.latest_planet)
+        # light and texture scrolling, also keeps the closest body up to date for landing
         self.get_closest_planet()
-        if past != self.latest_planet:
-            # moved to diff planet
-            return self.get_uniforms()
-        else:
-            # same stuff, only update pos, light, texture scrolling
-            body = self.bodies[self.latest_planet]
-            cam_pos = Vector2(self.app.camera.position.x, self.app.camera.position.y)
-            self.planetPos = body["bodyPos"] - cam_pos
-            self.lightDirection = body["lightDirection"]
-            updated = {
-                "time": {
-                    "value": lambda: struct.pack("f", self.app.elapsed_time),
-                    "glsl_type": "float",
-                },
-                "planetCenter": {
-                    "value": lambda: struct.pack("ff", *self.planetPos),
-                    "glsl_type": "vec2",
-                },
-                "movedLightDirection": {
-                    "value": lambda: struct.pack("fff", *self.get_light_moved()),
-                    "glsl_type": "vec3",
-                },
-                "planetOffset": {  # for rotating planet in X axis
-                    "value": lambda: struct.pack("f", self.get_planet_offset()),
-                    "glsl_type": "float",
-                },
-            }
-            return updated
+        return self.frame_uniforms
 
     def get_light_moved(self):
         """
@@ -217,18 +151,11 @@ cee3ef
         return newLightDirection
 
     def get_closest_planet(self):
-        past = deepcopy(self.latest_planet)
-        # calculates uniforms for planet pos
-        closest_dis = 999_999_999
-        body_name = None
+        # calculates uniforms for planet pos, the index only searches when the camera moves into another grid cell
         cam_pos = Vector2(self.app.camera.position.x, self.app.camera.position.y)
-
-        for name, body in BODIES.items():
-            bodypos: Vector2 = body["bodyPos"]
-            dis = cam_pos - bodypos
-            if dis.length() < closest_dis:
-                closest_dis = dis.length()
-                body_name = name
+        self.planet_id = self.index.closest(cam_pos.x, cam_pos.y)
+        body_name = self.names[self.planet_id]
+        self.has_changed_planet = self.latest_planet != body_name
 
         self.latest_planet = body_name
         body = BODIES[body_name]
@@ -237,17 +164,32 @@ cee3ef
         self.planetPos = body["bodyPos"] - cam_pos
         self.lightDirection = body["lightDirection"]
         self.isStar = body.get("isStar", False)
-        self.has_changed_planet = True if self.latest_planet != body_name else False
-        self.planet_id = list(BODIES.keys()).index(body_name)
 
-        if past != self.latest_planet:
-            self.sun.update_planet_tex(self.latest_planet)
+        if self.has_changed_planet:
+            self.app.share_data["planet_id"] = self.planet_id # the planet scene draws whatever we were closest to
+
+    def get_visible_bodies(self, zoom:float=1.0) -> Tuple[np.ndarray, np.ndarray]:
+        # screen px centres and ids of every body whose clouds overlap the screen, the camera is the bottom left corner
+        # at zoom 1, zooming scales around the middle of the screen
+        resolution = self.app.mesh.vao.Framebuffers.framebuffers["default"].image_out[0].size
+        half = np.array(resolution) / 2
+        centers = (half + (self.positions - (self.app.camera.position.x, self.app.camera.position.y) - half) * zoom).astype("f4")
+        reach = self.table.rows[:, 0, 1, None] * zoom # cloudRadius
+        visible = np.all((centers + reach > 0) & (centers - reach < resolution), axis=1)
+        ids = np.flatnonzero(visible)
+        return centers[ids], ids
+
+    def get_lods(self, ids:np.ndarray, scale:float=1.0) -> np.ndarray:
+        # detail tier of each body from its radius on screen, scale is what it gets drawn at (camera_zoom() in space)
+        ids = np.atleast_1d(ids)
+        self.lods[ids] = pick_lods(self.table.rows[ids, 0, 1] * scale, self.lods[ids])
+        return self.lods[ids]
 
     def tp_planet(self, id=None):
         if id == None:
             self.planet_id += 1
-            self.planet_id %= len(BODIES.keys())
-            planet = BODIES[list(BODIES.keys())[self.planet_id]]
+            self.planet_id %= len(self.names)
+            planet = BODIES[self.names[self.planet_id]]
             self.app.camera.position.x = planet["bodyPos"].x - 320
             self.app.camera.position.y = planet["bodyPos"].y - 240
 
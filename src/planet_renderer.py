@@ -0,0 +1,506 @@
+from typing import TYPE_CHECKING, Dict, List, Tuple
+import time
+import numpy as np
+
+from engine.vbo import InstancingVBO
+from engine.texture import Texture
+from engine.fbo import Framebuffer
+from src.noise_textures import NoiseTextures, NOISE_OCTAVES
+
+if TYPE_CHECKING:
+    import zengl
+    from main import Game
+    from engine.vao import VAO
+    from src.body_table import BodyTable
+
+# one row per drawn body: centre x, centre y (screen px), radius scale, planet id (row of the body table),
+# motion xy (screen px since last frame, only the checkerboard resolve reads it), detail tier (LOD_* below)
+INSTANCE_FLOATS = 7
+INSTANCE_FORMAT = "4f 8x 1f"
+INSTANCE_ATTRIBS = ("in_body", "in_lod")
+MOTION_FORMAT = "4f 2f 4x"
+MOTION_ATTRIBS = ("in_body", "in_motion")
+# impostor draws: the same 4 floats + which slot of the impostor pool the body is in
+IMPOSTOR_FLOATS = 5
+IMPOSTOR_FORMAT = "4f 1f"
+IMPOSTOR_ATTRIBS = ("in_body", "in_slot")
+
+# detail tiers, PlanetManager.get_lods picks one per body from how big it is on screen
+LOD_FULL = 0 # fbm, clouds and the normal map
+LOD_REDUCED = 1 # fewer octaves, no clouds
+LOD_DISC = 2 # flat palette disc
+
+# planet shading quality, share_data["planet_quality"] picks one at runtime (F4 cycles them)
+QUALITY_FULL = "full" # every pixel, every frame
+QUALITY_HALF = "half" # half resolution offscreen, scaled up
+QUALITY_CHECKERBOARD = "checkerboard" # half the pixels each frame, the other half reprojected from the last one
+QUALITY_IMPOSTOR = "impostor" # shaded into a cached texture per body, only re-shaded when it visibly changed. Opt in, moving bodies get re-shaded nearly every frame
+QUALITIES = (QUALITY_FULL, QUALITY_HALF, QUALITY_CHECKERBOARD, QUALITY_IMPOSTOR) # first one is the default
+
+# when an impostor gets re-shaded
+IMPOSTOR_POOL = 4 # cached bodies, the least recently drawn one makes room for a new one
+IMPOSTOR_TEXELS = 1.0 # rotation (planetOffset) in surface texels
+IMPOSTOR_LIGHT_PIXELS = 1.0 # how far the light turning moved the shading bands, in screen px at the clouds' radius
+IMPOSTOR_MAX_AGE = 0.125 # seconds, the clouds drift about a texel in that
+# when impostors aren't worth it: every re-shade is an extra pass on top of the copy
+IMPOSTOR_MAX_REBAKES = 0.5 # re-shaded share of the cached bodies (running average) past which they get shaded straight to the screen
+IMPOSTOR_REBAKE_SMOOTHING = 0.1 # how much one frame moves that average
+IMPOSTOR_RETRY = 1.0 # seconds of shading them straight before the impostors get another go
+
+
+class PlanetRenderer:
+    """Any number of bodies with the planet shader in one instanced draw, each on an octagon around its clouds.
+
+    Surface layer, radii and palette come from the body table row, so an instance only needs where, how big and which.
+    Half and checkerboard quality shade offscreen and composite onto `fbo` over the same octagons. Impostor quality
+    shades each body into its own layer of a texture array (a slot) and just copies that while the body looks the same.
+    count_fragments() measures how many fragments that costs, fragment_report() prints it per body (F3 in space).
+    The fbm and dither come from baked textures unless share_data["planet_baked_noise"] is False (F5),
+    noise_report() times both ways and diffs their output. Both ways, and isStar / the detail tier when a draw's bodies
+    all share it, are shader variants (body_variant()) rather than uniform branches.
+    """
+    def __init__(
+        self,
+        app:"Game",
+        table:"BodyTable",
+        umap:Dict[str, str],
+        capacity:int = None,
+        fbo:str = "default",
+        impostors:int = IMPOSTOR_POOL,
+        impostor_size:int = None,
+    ):
+        self.app = app
+        self.ctx:"zengl.Context" = app.ctx
+        self.table = table
+        self.fbo = fbo
+        self.umap = {**umap, "checkerParity": "int", "viewRect": "vec4"} # -1 == shade every pixel, 0 rect == the screen
+        self.noise = NoiseTextures.get(app)
+        self.baked_noise = True
+
+        self.instances = np.zeros((capacity or len(table.names), INSTANCE_FLOATS), dtype="f4")
+        self.previous = np.full((len(table.names), 2), np.nan, dtype="f4") # last frame's centre of every body, nan == not drawn
+        buffer = self.ctx.buffer(size=self.instances.nbytes)
+        self.ibo = InstancingVBO(self.ctx, buffer, INSTANCE_FORMAT, *INSTANCE_ATTRIBS, offset=2)
+        self.motion_ibo = InstancingVBO(self.ctx, buffer, MOTION_FORMAT, *MOTION_ATTRIBS, offset=2) # same buffer
+
+        # the scenes bind their uniforms on this one, offscreen shading copies them over
+        self.vao:"VAO" = self.get_shading_vao(self.app.mesh.vao.Framebuffers.framebuffers[fbo])
+        self.vao.uniform_bind("checkerParity", -1)
+
+        self.quality = QUALITY_FULL
+        self.shade_fbo:"Framebuffer" = None
+        self.shade_vao:"VAO" = None
+        self.resolved:List["Framebuffer"] = [] # checkerboard only, ping-pong, one is last frame's history
+        self.resolve_vaos:List["VAO"] = []
+        self.composite_vao:"VAO" = None
+        self.shaded_textures:List[Texture] = [] # what the composite reads, one per resolved framebuffer
+        self.current = 0
+
+        # impostor pool, the slots get made by set_quality
+        self.impostors = impostors
+        # big enough for every body at scale 1, bigger ones get shaded every frame like before
+        self.impostor_size = impostor_size or int(np.ceil((table.rows[:, 0, 1].max() + 1) * 2 / 16) * 16)
+        self.impostor_image:"zengl.Image" = None
+        self.impostor_depth:"zengl.Image" = None
+        self.slot_fbos:List[Framebuffer] = []
+        self.slot_ibos:List[InstancingVBO] = []
+        self.slot_vaos:List["VAO"] = []
+        self.impostor_vao:"VAO" = None
+        self.impostor_ibo:InstancingVBO = None
+        self.impostor_instances = np.zeros((len(self.instances), IMPOSTOR_FLOATS), dtype="f4")
+        self.slot_body = np.full(impostors, -1, dtype="i4") # slot -> body, -1 == empty
+        self.slot_used = np.full(impostors, -1, dtype="i8") # frame the slot was last drawn, for the LRU
+        self.body_slot = np.full(len(table.names), -1, dtype="i4") # body -> slot
+        # what every body looked like when it got baked
+        self.baked_offset = np.zeros(len(table.names), dtype="f4")
+        self.baked_light = np.zeros((len(table.names), 3), dtype="f4")
+        self.baked_scale = np.zeros(len(table.names), dtype="f4")
+        self.baked_time = np.full(len(table.names), -np.inf)
+        self.baked_lod = np.zeros(len(table.names), dtype="i4")
+        self.rebakes = 0.0 # running average of the re-shaded share, see IMPOSTOR_MAX_REBAKES
+        self.impostor_retry = -np.inf # elapsed_time the impostors are used again after falling back
+        self.surface_width = table.surfaces.data.size[0]
+
+        self.destroyed = False # share_data['space_planet'] keeps one around after its scene is gone
+
+        # made on the first count_fragments(), debug only
+        self.count_fbo:"Framebuffer" = None
+        self.count_vao:"VAO" = None
+
+    def get_shading_vao(self, fbo:"Framebuffer", ibo:InstancingVBO=None) -> "VAO":
+        vao = self.app.mesh.vao.get_ins_vao(
+            fbo=fbo,
+            program=self.app.mesh.vao.program.get_program("planet", defines={"OCTAVES": NOISE_OCTAVES}), # what T_fbm is baked with
+            vbo=self.app.mesh.vao.vbo.vbos["circle"], # the plane's corners are outside the clouds anyway
+            ibo=ibo or self.ibo,
+            umap=self.umap,
+            tmap=["T_planet", "T_planetNormal", "T_planetUV", "T_bodies", "T_fbm", "T_bayer"],
+        )
+        # every body's surface and parameters, bound once
+        vao.texture_bind(0, "T_planet", self.table.surfaces)
+        vao.texture_bind(1, "T_planetUV", self.app.mesh.texture.textures["uv"])
+        vao.texture_bind(2, "T_planetNormal", self.app.mesh.texture.textures["normal"])
+        vao.texture_bind(3, "T_bodies", self.table.params)
+        vao.texture_bind(4, "T_fbm", self.noise.fbm)
+        vao.texture_bind(5, "T_bayer", self.noise.bayer)
+        return vao
+
+    def body_variant(self, ids:np.ndarray, lods:np.ndarray=LOD_FULL) -> Dict[str, int]:
+        # planet shader defines for a draw of `ids`, set_variant() on a shading VAO before rendering
+        variant = {"BAKED_NOISE": int(self.baked_noise)}
+        ids = np.atleast_1d(ids)
+        if len(ids) == 0:
+            return variant
+        stars = self.table.rows[ids, 0, 2] > 0.5
+        if stars.all() or not stars.any(): # isStar is the same for all of them, no need to look it up
+            variant["IS_STAR"] = int(stars[0])
+        lods = np.broadcast_to(np.asarray(lods, dtype="i4"), ids.shape)
+        if (lods == lods[0]).all(): # same for the detail tier
+            variant["LOD"] = int(lods[0])
+        return variant
+
+    def get_offscreen_vao(self, program:str, fbo:"Framebuffer", ibo:InstancingVBO, umap:Dict[str, str], tmap:List[str]) -> "VAO":
+        vao = self.app.mesh.vao.get_ins_vao(
+            fbo=fbo,
+            program=self.app.mesh.vao.program.programs[program],
+            vbo=self.app.mesh.vao.vbo.vbos["circle"],
+            ibo=ibo,
+            umap=umap,
+            tmap=tmap + ["T_bodies"], # the octagon's size comes from the body table
+        )
+        vao.texture_bind(len(tmap), "T_bodies", self.table.params)
+        return vao
+
+    def set_quality(self, quality:str):
+        if quality not in QUALITIES:
+            raise ValueError(f"Unknown planet quality {quality!r}, expected one of {QUALITIES}")
+        self.release_offscreen()
+        self.quality = quality
+        self.rebakes, self.impostor_retry = 0.0, -np.inf
+        if quality == QUALITY_FULL:
+            return
+        if quality == QUALITY_IMPOSTOR:
+            self.make_impostors()
+            return
+
+        framebuffers = self.app.mesh.vao.Framebuffers
+        width, height = framebuffers.framebuffers[self.fbo].image_out[0].size
+        scale = 0.5 if quality == QUALITY_HALF else 1.0
+        self.shade_fbo = framebuffers.get_framebuffer((max(int(width * scale), 1), max(int(height * scale), 1)))
+        self.shade_vao = self.get_shading_vao(self.shade_fbo)
+
+        if quality == QUALITY_CHECKERBOARD:
+            self.resolved = [framebuffers.get_framebuffer((width, height)) for _ in range(2)]
+            for resolved in self.resolved:
+                resolved.image_out[0].clear() # no history yet, the resolve falls back to the shaded neighbours
+            for i in range(2):
+                vao = self.get_offscreen_vao(
+                    "planet_resolve", self.resolved[i], self.motion_ibo, {"checkerParity": "int"}, ["T_shaded", "T_history"],
+                )
+                vao.texture_bind(0, "T_shaded", self.get_texture(self.shade_fbo))
+                vao.texture_bind(1, "T_history", self.get_texture(self.resolved[1 - i]))
+                self.resolve_vaos.append(vao)
+            self.current = 0
+
+        self.composite_vao = self.get_offscreen_vao(
+            "planet_composite", framebuffers.framebuffers[self.fbo], self.ibo, {"shadedScale": "float", "viewRect": "vec4"}, ["T_shaded"],
+        )
+        self.composite_vao.uniform_bind("shadedScale", scale)
+        self.shaded_textures = [self.get_texture(fbo) for fbo in self.resolved or [self.shade_fbo]]
+
+    def make_impostors(self):
+        # one layer per slot, each layer is its own framebuffer. They share a depth buffer, planets don't depth test each other
+        size = (self.impostor_size, self.impostor_size)
+        self.impostor_image = self.ctx.image(size, "rgba8unorm", array=self.impostors)
+        self.impostor_depth = self.ctx.image(size, "depth24plus")
+        for slot in range(self.impostors):
+            self.slot_fbos.append(Framebuffer(self.ctx, depth_out=self.impostor_depth, image_out=[self.impostor_image.face(layer=slot)]))
+            # a buffer per slot, every slot's draw reads its own instance when the arena gets flushed
+            self.slot_ibos.append(InstancingVBO(self.ctx, self.ctx.buffer(size=INSTANCE_FLOATS * 4), INSTANCE_FORMAT, *INSTANCE_ATTRIBS, offset=2))
+            self.slot_vaos.append(self.get_shading_vao(self.slot_fbos[slot], self.slot_ibos[slot]))
+        self.impostor_ibo = InstancingVBO(
+            self.ctx, self.ctx.buffer(size=self.impostor_instances.nbytes), IMPOSTOR_FORMAT, *IMPOSTOR_ATTRIBS, offset=2,
+        )
+        self.impostor_vao = self.get_offscreen_vao(
+            "planet_impostor", self.app.mesh.vao.Framebuffers.framebuffers[self.fbo], self.impostor_ibo, {}, ["T_impostors"],
+        )
+        self.impostor_vao.texture_bind(0, "T_impostors", Texture(self.impostor_image, repeat=("clamp_to_edge", "clamp_to_edge")))
+
+        self.slot_body[:] = -1
+        self.slot_used[:] = -1
+        self.body_slot[:] = -1
+
+    def get_slot(self, body:int, frame:int) -> int:
+        # the body's slot, or the least recently drawn one if it has none. -1 == every slot is taken this frame
+        slot = int(self.body_slot[body])
+        if slot < 0:
+            free = np.flatnonzero(self.slot_used < frame)
+            if len(free) == 0:
+                return -1
+            slot = int(free[np.argmin(self.slot_used[free])])
+            if self.slot_body[slot] >= 0:
+                self.body_slot[self.slot_body[slot]] = -1
+            self.slot_body[slot] = body
+            self.body_slot[body] = slot
+            self.baked_time[body] = -np.inf # nothing baked in it yet
+        self.slot_used[slot] = frame
+        return slot
+
+    def get_uniform(self, name:str) -> np.ndarray:
+        # what the scene bound, read without marking anything dirty
+        block = self.vao.block
+        return block.layout.fields[name].view(block.array) if name in block else np.zeros(3, dtype="f4")
+
+    def stale_impostors(self, ids:np.ndarray, scales:np.ndarray, lods:np.ndarray) -> np.ndarray:
+        offset = float(np.ravel(self.get_uniform("planetOffset"))[0])
+        light = np.asarray(self.get_uniform("movedLightDirection"), dtype="f4")
+        light = light / max(float(np.linalg.norm(light)), 1e-6)
+        baked_light = self.baked_light[ids] / np.maximum(np.linalg.norm(self.baked_light[ids], axis=1, keepdims=True), 1e-6)
+        turned = np.arccos(np.clip(baked_light @ light, -1, 1))
+        return (
+            (np.abs(offset - self.baked_offset[ids]) * self.surface_width >= IMPOSTOR_TEXELS)
+            | (turned * self.table.rows[ids, 0, 1] * scales >= IMPOSTOR_LIGHT_PIXELS)
+            | (self.baked_scale[ids] != scales)
+            | (self.app.elapsed_time - self.baked_time[ids] >= IMPOSTOR_MAX_AGE)
+            | (self.baked_lod[ids] != lods)
+        )
+
+    def bake(self, body:int, scale:float, slot:int, lod:int):
+        # shades the body around the middle of its slot, the draw happens at the arena flush like everything else
+        size = self.impostor_size
+        self.slot_fbos[slot].image_out[0].clear()
+        self.impostor_depth.clear()
+        vao = self.slot_vaos[slot]
+        vao.set_variant(self.body_variant(body, lod))
+        self.sync_uniforms(vao)
+        vao.uniform_bind("viewRect", (0, 0, size, size))
+        self.slot_ibos[slot].vbo.write(np.array([size / 2, size / 2, scale, body, 0, 0, lod], dtype="f4"))
+        vao.render(instance_count=1)
+
+        self.baked_offset[body] = float(np.ravel(self.get_uniform("planetOffset"))[0])
+        self.baked_light[body] = self.get_uniform("movedLightDirection")
+        self.baked_scale[body] = scale
+        self.baked_time[body] = self.app.elapsed_time
+        self.baked_lod[body] = lod
+
+    def render_impostors(self, centers:np.ndarray, scales:np.ndarray, ids:np.ndarray, lods:np.ndarray):
+        ids = np.atleast_1d(ids)
+        n = len(ids)
+        if n == 0:
+            return
+        centers = np.broadcast_to(np.asarray(centers, dtype="f4"), (n, 2))
+        scales = np.broadcast_to(np.asarray(scales, dtype="f4"), (n,))
+        lods = np.broadcast_to(np.asarray(lods, dtype="i4"), (n,))
+        frame = self.app.elapsed_frames
+
+        fits = 2 * (self.table.rows[ids, 0, 1] * scales + 1) <= self.impostor_size
+        slots = np.array([self.get_slot(body, frame) if fit else -1 for body, fit in zip(ids.tolist(), fits.tolist())], dtype="i4")
+        cached = slots >= 0
+        stale = np.flatnonzero(cached & self.stale_impostors(ids, scales, lods))
+        for i in stale:
+            self.bake(int(ids[i]), float(scales[i]), int(slots[i]), int(lods[i]))
+        if cached.any():
+            self.rebakes += (len(stale) / cached.sum() - self.rebakes) * IMPOSTOR_REBAKE_SMOOTHING
+            if self.rebakes > IMPOSTOR_MAX_REBAKES: # costs more than it saves, render() shades them like full for a while
+                self.rebakes = 0.0
+                self.impostor_retry = self.app.elapsed_time + IMPOSTOR_RETRY
+
+        live = ~cached # too big or no slot left, shaded straight into the target
+        if live.any():
+            self.vao.set_variant(self.body_variant(ids[live], lods[live]))
+            self.vao.render(instance_count=self.write_instances(centers[live], scales[live], ids[live], lods=lods[live]))
+        k = int(cached.sum())
+        if k:
+            rows = self.impostor_instances[:k]
+            rows[:, 0:2] = centers[cached]
+            rows[:, 2] = scales[cached]
+            rows[:, 3] = ids[cached]
+            rows[:, 4] = slots[cached]
+            self.impostor_ibo.vbo.write(rows)
+            self.impostor_vao.render(instance_count=k)
+
+    @staticmethod
+    def get_texture(fbo:"Framebuffer") -> Texture:
+        return Texture(fbo.image_out[0], repeat=("clamp_to_edge", "clamp_to_edge")) # texelFetch'ed, nearest
+
+    def release_offscreen(self):
+        [vao.destroy() for vao in [self.shade_vao, self.composite_vao, *self.resolve_vaos] if vao is not None]
+        [fbo.destroy(self.ctx) for fbo in [self.shade_fbo, *self.resolved] if fbo is not None]
+        self.shade_fbo, self.shade_vao, self.composite_vao = None, None, None
+        self.resolved, self.resolve_vaos, self.shaded_textures = [], [], []
+
+        [vao.destroy() for vao in [*self.slot_vaos, self.impostor_vao] if vao is not None]
+        [ibo.destroy() for ibo in [*self.slot_ibos, self.impostor_ibo] if ibo is not None]
+        [self.ctx.release(image) for image in [self.impostor_image, self.impostor_depth] if image is not None]
+        self.slot_fbos, self.slot_ibos, self.slot_vaos = [], [], []
+        self.impostor_vao, self.impostor_ibo, self.impostor_image, self.impostor_depth = None, None, None, None
+
+    def sync_uniforms(self, vao:"VAO"):
+        # the scenes only bind on self.vao, same layout so the bytes can be copied as is
+        if vao.block.data != self.vao.block.data:
+            vao.block.data[:] = self.vao.block.data
+            vao.block.mark_dirty(0, vao.block.layout.size)
+
+    def write_instances(self, centers:np.ndarray, scales:np.ndarray, ids:np.ndarray, motion:np.ndarray=0, lods:np.ndarray=LOD_FULL) -> int:
+        # centers (n, 2) in screen px, scales/ids/lods (n,) or scalars
+        ids = np.atleast_1d(ids)
+        n = len(ids)
+        if n == 0:
+            return 0
+        rows = self.instances[:n]
+        rows[:, 0:2] = centers
+        rows[:, 2] = scales
+        rows[:, 3] = ids
+        rows[:, 4:6] = motion
+        rows[:, 6] = lods
+        self.ibo.vbo.write(rows)
+        return n
+
+    def track_motion(self, centers:np.ndarray, ids:np.ndarray) -> np.ndarray:
+        # how far each body moved on screen since the last render(), 0 for the ones that weren't drawn
+        ids = np.atleast_1d(ids)
+        centers = np.broadcast_to(np.asarray(centers, dtype="f4"), (len(ids), 2))
+        motion = np.nan_to_num(centers - self.previous[ids])
+        self.previous[:] = np.nan
+        self.previous[ids] = centers
+        return motion
+
+    def render(self, centers:np.ndarray, scales:np.ndarray, ids:np.ndarray, lods:np.ndarray=LOD_FULL):
+        quality = self.app.share_data.get("planet_quality", QUALITIES[0])
+        if quality != self.quality:
+            self.set_quality(quality)
+        baked_noise = bool(self.app.share_data.get("planet_baked_noise", True))
+        if baked_noise != self.baked_noise:
+            self.baked_noise = baked_noise
+            self.baked_time[:] = -np.inf # the impostors were shaded the other way
+        if self.quality == QUALITY_IMPOSTOR and self.app.elapsed_time >= self.impostor_retry:
+            self.render_impostors(centers, scales, ids, lods)
+            return
+
+        n = self.write_instances(centers, scales, ids, self.track_motion(centers, ids), lods)
+        if n == 0:
+            return
+        variant = self.body_variant(ids, lods)
+        if self.quality in (QUALITY_FULL, QUALITY_IMPOSTOR): # impostor here == they were re-shaded too often, see render_impostors
+            self.vao.set_variant(variant)
+            self.vao.render(instance_count=n)
+            return
+
+        # clears happen now, the draws at the arena flush, so last frame's passes are done with these already
+        self.shade_fbo.image_out[0].clear()
+        self.shade_fbo.depth_out.clear()
+        self.sync_uniforms(self.shade_vao)
+        self.shade_vao.set_variant(variant)
+        shaded = 0
+
+        if self.quality == QUALITY_CHECKERBOARD:
+            parity = self.app.elapsed_frames % 2
+            self.shade_vao.uniform_bind("checkerParity", parity)
+            self.shade_vao.render(instance_count=n)
+
+            shaded = self.current
+            self.resolved[shaded].image_out[0].clear()
+            self.resolved[shaded].depth_out.clear()
+            resolve_vao = self.resolve_vaos[self.current]
+            resolve_vao.uniform_bind("checkerParity", parity)
+            resolve_vao.render(instance_count=n)
+            self.current = 1 - self.current
+        else:
+            self.shade_vao.render(instance_count=n)
+
+        self.composite_vao.texture_bind(0, "T_shaded", self.shaded_textures[shaded])
+        self.composite_vao.render(instance_count=n)
+
+    def count_fragments(self, centers:np.ndarray, scales:np.ndarray, ids:np.ndarray, lods:np.ndarray=LOD_FULL) -> Tuple[int, int]:
+        # same vertices as render() into a float target where every fragment adds 1, overlaps count twice like they cost twice
+        # returns (fragments rasterized, fragments that get past the corner discard and do the real work)
+        vaos = self.app.mesh.vao
+        if self.count_vao is None:
+            size = vaos.Framebuffers.framebuffers[self.fbo].image_out[0].size
+            self.count_fbo = vaos.Framebuffers.get_framebuffer(size, depth_type="depth16unorm", color_type=["rg32float"])
+            self.count_vao = self.get_offscreen_vao("planet_count", self.count_fbo, self.ibo, {"viewRect": "vec4"}, [])
+
+        vaos.arena.flush() # whatever was recorded this frame still reads the instance buffer as it is now
+        n = self.write_instances(centers, scales, ids, lods=lods)
+        self.count_fbo.image_out[0].clear()
+        self.count_fbo.depth_out.clear()
+        if n:
+            self.count_vao.render(instance_count=n)
+        vaos.arena.flush()
+        counts = np.frombuffer(self.count_fbo.image_out[0].read(), dtype="f4").reshape(-1, 2).sum(axis=0)
+        return int(counts[0]), int(counts[1])
+
+    def fragment_report(self):
+        # planet shader fragments for each body at its real size vs the fullscreen plane it used to be drawn on
+        width, height = self.app.mesh.vao.Framebuffers.framebuffers[self.fbo].image_out[0].size
+        full = width * height
+        center = np.array([[width / 2, height / 2]], dtype="f4")
+        for i, name in enumerate(self.table.names):
+            radius = self.table.rows[i, 0, 1]
+            rasterized, shaded = self.count_fragments(center, 1.0, i)
+            clipped = ", clipped by the screen" if 2 * (radius + 1) > min(width, height) else ""
+            print(
+                f"{name:>10}: clouds {radius:.0f} px, {rasterized:>6} fragments ({shaded:>6} shaded) vs {full} fullscreen, "
+                f"{100 - rasterized / full * 100:.1f}% ({100 - shaded / full * 100:.1f}%) skipped{clipped}"
+            )
+
+    def lod_report(self, frames:int=60):
+        # every body at its real size in the middle of the screen, gpu time of each detail tier
+        width, height = self.app.mesh.vao.Framebuffers.framebuffers[self.fbo].image_out[0].size
+        self.app.mesh.vao.arena.flush()
+        for i, name in enumerate(self.table.names):
+            took = []
+            for lod in (LOD_FULL, LOD_REDUCED, LOD_DISC):
+                n = self.write_instances(np.array([[width / 2, height / 2]], dtype="f4"), 1.0, i, lods=lod)
+                took.append(self.shade_offscreen(n, self.baked_noise, frames)[0] * 1000)
+            print(f"{name:>10}: full {took[0]:.3f} ms, reduced {took[1]:.3f} ms, disc {took[2]:.3f} ms/frame")
+
+    def shade_offscreen(self, n:int, baked:bool, frames:int) -> Tuple[float, np.ndarray]:
+        # renders the n instances already written `frames` times into a throwaway target, returns (seconds per frame, image)
+        vaos = self.app.mesh.vao
+        size = vaos.Framebuffers.framebuffers[self.fbo].image_out[0].size
+        fbo = vaos.Framebuffers.get_framebuffer(size)
+        vao = self.get_shading_vao(fbo)
+        self.sync_uniforms(vao)
+        vao.uniform_bind("checkerParity", -1)
+        vao.set_variant({**self.body_variant(self.instances[:n, 3].astype("i4"), self.instances[:n, 6]), "BAKED_NOISE": int(baked)})
+
+        fbo.image_out[0].read(size=(1, 1)) # nothing queued before the clock starts
+        start = time.perf_counter()
+        for _ in range(frames):
+            fbo.image_out[0].clear()
+            fbo.depth_out.clear() # the planets sit at one depth, without this every draw after the first gets depth tested away
+            vao.render(instance_count=n)
+            vaos.arena.flush()
+        fbo.image_out[0].read(size=(1, 1)) # waits for the gpu
+        took = (time.perf_counter() - start) / frames
+
+        image = np.frombuffer(fbo.image_out[0].read(), dtype=np.uint8).reshape(size[1], size[0], 4)[..., :3].astype("i2")
+        vao.destroy()
+        fbo.destroy(self.ctx)
+        return took, image
+
+    def noise_report(self, frames:int=60):
+        # every body at its real size in the middle of the screen, procedural fbm + dither vs the baked textures
+        width, height = self.app.mesh.vao.Framebuffers.framebuffers[self.fbo].image_out[0].size
+        self.app.mesh.vao.arena.flush() # whatever was recorded this frame still reads the instance buffer as it is now
+        for i, name in enumerate(self.table.names):
+            n = self.write_instances(np.array([[width / 2, height / 2]], dtype="f4"), 1.0, i)
+            procedural, procedural_image = self.shade_offscreen(n, False, frames)
+            baked, baked_image = self.shade_offscreen(n, True, frames)
+            body = np.any((procedural_image > 0) | (baked_image > 0), axis=-1)
+            diff = np.abs(procedural_image - baked_image)[body]
+            print(
+                f"{name:>10}: procedural {procedural * 1000:.3f} ms, baked {baked * 1000:.3f} ms/frame "
+                f"({procedural / max(baked, 1e-9):.2f}x faster), {np.any(diff > 0, axis=-1).mean() * 100:.1f}% of its pixels differ, "
+                f"by {diff.mean():.2f}/255 on average"
+            )
+
+    def destroy(self):
+        self.destroyed = True
+        self.release_offscreen()
+        self.vao.destroy()
+        self.ibo.destroy() # motion_ibo shares its buffer
+        if self.count_vao is not None:
+            self.count_vao.destroy()
+            self.count_fbo.destroy(self.ctx)
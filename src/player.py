@@ -1,18 +1,18 @@
 import pygame as pg
 import glm
-import struct
 import math
-from typing import List, Dict, Tuple
+from typing import TYPE_CHECKING, List, Dict, Tuple
 from bindings import *
 
+if TYPE_CHECKING:
+    from src.collision import CollisionGrid, TileHit
+
 IDLE_KEYFRAMES = [0.28 for _ in range(4)]
 WALK_KEYFRAMES = [0.12 for _ in range(4)]
 SLIDE_KEYFRAMES = [0.1]
 FALL_KEYFRAMES = [0.1]
 JUMP_KEYFRAMES = [0.1]
 
-neighbor_offsets = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1), (0, 0)]
-
 class RigidBody:
     def __init__(self):
         self.rect = pg.FRect(0, 0, 15, 15)
@@ -23,83 +23,82 @@ class RigidBody:
         self.elasticity = [0.1, 0.15]
         self.friction = [13.25, 5.375]
         self.wind_drag = [7.125, 1.0]
+        self.continuous = False # sweep through the grid instead of checking where we ended up, for fast stuff
 
-    def get_neighboring_tiles(self, tilemap:"Tilemap"):
-        tiles = []
-        loc = (round(self.rect.x // 16), round(self.rect.y // 16))
+    def get_neighboring_tiles(self, grid:"CollisionGrid") -> List["TileHit"]:
+        # solid tiles around us, the grid reuses these so use them before asking again
+        return grid.neighbours(int(self.rect.x // grid.tile_size), int(self.rect.y // grid.tile_size))
 
-        for offset in neighbor_offsets:
-            around_loc = f'{offset[0] + loc[0]};{offset[1] - loc[1]}'
-            if around_loc in tilemap:
-                if tilemap[around_loc][1]:
-                    x, y = around_loc.split(';')
-                    x = (int(x)) * 16
-                    y = (-int(y)) * 16
-                    r = pg.Rect(x, y, 16, 16)
-                    tiles.append({'rect':r, 'friction':tilemap[around_loc]})
-        
-        return tiles
-
-    def collision_test(self, rect, tileset:"Tilemap"):
+    def collision_test(self, rect, grid:"CollisionGrid") -> List["TileHit"]:
         hit_list = []
         
-        for tile in self.get_neighboring_tiles(tileset):
-            if rect.colliderect(tile['rect']):
+        for tile in self.get_neighboring_tiles(grid):
+            if rect.colliderect(tile.rect):
                 hit_list.append(tile)
 
         return hit_list
 
-    def apply_physics(self, tilemap:"Tilemap", dt:float):
+    def move_and_collide(self, grid:"CollisionGrid", dx:float, dy:float) -> List["TileHit"]:
+        # moves the rect, continuous mode stops it at the first tile it would go through
+        if self.continuous and (dx or dy):
+            toi, normal, hit = grid.sweep(self.rect, dx, dy)
+            self.rect.x += dx * toi
+            self.rect.y += dy * toi
+            return [] if hit is None else [hit]
+
+        self.rect.x += dx
+        self.rect.y += dy
+        return self.collision_test(self.rect, grid)
+
+    def apply_physics(self, grid:"CollisionGrid", dt:float):
         self.collision_types = {'bottom': False, 'top': False, 'right': False, 'left': False}
 
-        self.rect.x += self.velocity[0] * dt
         do_gravity = 392
         clamp_gravity = 300
 
-        hit_list = self.collision_test(self.rect, tilemap)
+        hit_list = self.move_and_collide(grid, self.velocity[0] * dt, 0)
 
         apply_wind_drag = True
 
         for block in hit_list:
             apply_wind_drag = False
             if self.velocity[0] > 0:
-                self.rect.right = block['rect'].left
+                self.rect.right = block.rect.left
                 self.collision_types['left'] = True
                 if self.move > 0.205:
                     self.coyote_time_wall = 0
 
             if self.velocity[0] < 0:
-                self.rect.left = block['rect'].right
+                self.rect.left = block.rect.right
                 self.collision_types['right'] = True
                 if self.move > 0.205:
                     self.coyote_time_wall = 0
 
             
-            self.velocity[1] *= math.exp(-self.friction[1] * dt)
+            self.velocity[1] *= math.exp(-self.friction[1] * block.friction * dt)
                 
             self.velocity[0] = -self.velocity[0] * self.elasticity[0]
             self.velocity[0] = 0 if (self.velocity[0]<1.5 and self.velocity[0]>-1.5) else self.velocity[0]
         
             break
 
-        self.rect.y += self.velocity[1] * dt
-        hit_list = self.collision_test(self.rect, tilemap)
+        hit_list = self.move_and_collide(grid, 0, self.velocity[1] * dt)
         
         self.velocity[1] -= do_gravity * dt
         
         for block in hit_list:
             apply_wind_drag = False
             if self.velocity[1] < 0:
-                self.rect.top = block['rect'].bottom
+                self.rect.top = block.rect.bottom
                 self.collision_types['bottom'] = True
                 self.coyote_time = 0
 
             if self.velocity[1] > 0:
-                self.rect.bottom = block['rect'].top
+                self.rect.bottom = block.rect.top
                 self.collision_types['top'] = True
 
 
-            self.velocity[0] *= math.exp(-self.friction[0] * dt)
+            self.velocity[0] *= math.exp(-self.friction[0] * block.friction * dt)
             
             
             self.velocity[1] = -self.velocity[1] * self.elasticity[1]
@@ -117,31 +116,20 @@ class Player(RigidBody):
         super().__init__()
         self.app = app
         
-        self.app.mesh.vao.add_vao(
-            vao_name="playerX",
-            fbo=self.app.mesh.vao.Framebuffers.framebuffers["default"],
-            program=self.app.mesh.vao.program.programs['player'],
-            vbo=self.app.mesh.vao.vbo.vbos['plane'],
-            umap=
-			{ 
-				"m_model": "mat4",
-				"m_view": "mat4",
-				"frame": "int",
-                "flip": "int",
-			},
-            tmap=["u_texture_0"],
-        )
-        self.vao = self.app.mesh.vao.vaos['playerX']
-        
         self.app.mesh.texture.textures['players'] = self.app.mesh.texture.get_texture_array("./assets/textures/player/")
         self.texture = self.app.mesh.texture.textures['players']
-        self.vao.texture_bind(0, "u_texture_0", self.app.mesh.texture.textures['players'])
+        self.sprites = self.app.mesh.sprites.get_batch('players') # drawn by the scene with everything else using this array
         
         self.pos = glm.vec3(902, 0, 0)
         self.rect = pg.FRect(902, 0, 14, 15)
+        self.continuous = True # MAX_SPED is about a tile per tick
         self.roll = 0
         self.scale = glm.vec2(7.5)
         self.boxcam = glm.vec2(0)
+        # state from the last two ticks, rendering happens somewhere in between
+        self.prev_pos = self.render_pos = self.pos
+        self.camera_pos = self.prev_camera_pos = self.pos.xy + self.boxcam
+        self.jump_queued = False # presses between ticks, a frame can run zero ticks
         self.idle_animation = Animation(IDLE_KEYFRAMES)
         self.walk_animation = Animation(WALK_KEYFRAMES)
         self.slide_animation = Animation(SLIDE_KEYFRAMES)
@@ -157,17 +145,18 @@ class Player(RigidBody):
         self.animation_manager = AnimationManager(self.animations)
         self.move = 1
         self.flip = False
+        self.frame = 0
         
         self.anim_scale = [1,1]
         self.since_jump = -1
         self.since_bounce = -1
 
-    def set_anim_scale(self):
+    def set_anim_scale(self, dt:float):
         if self.since_jump != -1:
-            self.since_jump += self.app.delta_time
+            self.since_jump += dt
         
         if self.since_bounce != -1:
-            self.since_bounce += self.app.delta_time
+            self.since_bounce += dt
         self.anim_scale = [1, 1]
         
         max_time = 0.4
@@ -184,7 +173,7 @@ class Player(RigidBody):
             self.anim_scale[0] = 1 + (v * 1.4)
             self.anim_scale[1] = 1 - (v * 0.9)
 
-    def check(self, keys):
+    def check(self, keys, dt:float):
         # self.velocity[0] = 0
         MAX_SPED = 1800 if self.move > 0.205 else 1
         ACC_SPED = 1600
@@ -199,13 +188,13 @@ class Player(RigidBody):
 
         elif keys[bindings['right']]:
             self.elasticity[0] = 0.0
-            input_velocity.x += (ACC_SPED if self.coyote_time < 0.1 else ACC_WINDSPED) * self.app.delta_time
+            input_velocity.x += (ACC_SPED if self.coyote_time < 0.1 else ACC_WINDSPED) * dt
             # TO NON-CALCULUS PEOPLE: because of chain rule this should be dP/dT
             self.flip = False
 
         elif keys[bindings['left']]:
             self.elasticity[0] = 0.0
-            input_velocity.x -= (ACC_SPED if self.coyote_time < 0.1 else ACC_WINDSPED) * self.app.delta_time
+            input_velocity.x -= (ACC_SPED if self.coyote_time < 0.1 else ACC_WINDSPED) * dt
             # TO NON-CALCULUS PEOPLE: because of chain rule this should be dP/dT
             self.flip = True
             
@@ -234,14 +223,16 @@ class Player(RigidBody):
         if self.coyote_time < 0.1 and keys[bindings['jump']]:
             self.velocity.y = 195
             self.coyote_time = 100
-            self.since_jump = self.app.delta_time
+            self.since_jump = dt
+            if 'particles' in self.app.share_data: # dust kicked up from where we jumped
+                self.app.share_data['particles'].burst((self.rect.centerx, self.rect.y), 8, 60, 0.35, 2.5, (0.8, 0.78, 0.72, 0.8))
             
-        elif self.coyote_time_wall < 0.1 and pg.key.get_just_pressed()[bindings['jump']]:
+        elif self.coyote_time_wall < 0.1 and self.jump_queued:
             self.velocity.y = 150
             self.velocity.x = -800 if self.collision_types['left'] else 800
             self.coyote_time_wall = 100
             self.move = 0
-            self.since_bounce = self.app.delta_time  # wall bounce
+            self.since_bounce = dt  # wall bounce
             
         if self.coyote_time_wall < 0.1:
             self.animation_manager.set_animation(2)
@@ -265,46 +256,45 @@ class Player(RigidBody):
         if self.coyote_time < 0.1:  # on ground
             self.since_jump = -1
         
-        self.set_anim_scale()
+        self.set_anim_scale(dt)
         
             
-    def update(self):
+    def tick(self, dt:float): # fixed rate, see Game.simulate
         self.elasticity[0] = 0.1
         keys = pg.key.get_pressed()
-        self.check(keys)
-        self.apply_physics(self.app.share_data['tilemap'].tilemap['0'], self.app.delta_time)
-        self.coyote_time += self.app.delta_time
-        self.coyote_time_wall += self.app.delta_time
+        self.check(keys, dt)
+        self.jump_queued = False
+        self.apply_physics(self.app.share_data['tilemap'].collision, dt)
+        self.coyote_time += dt
+        self.coyote_time_wall += dt
         
+        self.prev_pos, self.prev_camera_pos = self.pos, self.camera_pos
         self.boxcam = glm.clamp(self.boxcam, glm.vec2(-30), glm.vec2(30))
         self.boxcam += self.pos.xy - glm.vec2(self.rect.x-1, self.rect.y)
         
         self.pos = glm.vec3(self.rect[0]-1, self.rect[1], 0)
+        self.camera_pos = self.pos.xy + self.boxcam
         
-        
-        
-        self.app.camera.position.xy = self.pos.xy + self.boxcam
-        self.m_model = self.get_model_matrix()
-        
-        
-        self.animation_manager.update(self.app.delta_time)
+        self.animation_manager.update(dt)
         self.frame = self.animation_manager.get_frame()
-        self.move += self.app.delta_time
-        
-        self.vao.uniform_bind("m_model", self.m_model.to_bytes())
-        self.vao.uniform_bind("frame", struct.pack("i", self.frame))
-        self.vao.uniform_bind("flip", struct.pack("i", 1 if self.flip else 0))
-        self.vao.uniform_bind(
-            "m_view",
-            (self.app.camera.m_proj * self.app.camera.m_view * self.m_model).to_bytes(),
-        )
-        self.vao.texture_bind(0, "u_texture_0", self.app.mesh.texture.textures['players'])
-        self.vao.render()
+        self.move += dt
+
+    def interpolate(self, alpha:float): # every frame, before the camera gets updated
+        self.jump_queued = self.jump_queued or pg.key.get_just_pressed()[bindings['jump']]
+        self.render_pos = glm.mix(self.prev_pos, self.pos, alpha)
+        self.app.camera.position.xy = glm.mix(self.prev_camera_pos, self.camera_pos, alpha)
+            
+    def update(self):
+        self.m_model = self.get_model_matrix()
+        self.sprites.add(self.m_model, frame=self.frame, flip=self.flip)
+
+    def destroy(self):
+        self.app.mesh.sprites.del_batch('players')
 
     def get_model_matrix(self):
         m_model = glm.mat4()
         # translate
-        m_model = glm.translate(m_model, self.pos)
+        m_model = glm.translate(m_model, self.render_pos)
         # rotate
         m_model = glm.rotate(m_model, glm.radians(self.roll), glm.vec3(0, 0, 1))
         # scale
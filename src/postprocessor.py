@@ -50,6 +50,7 @@ class ProcessRender:
         self.vao.uniform_bind("scaling_vector", ar.to_bytes())
         
         self.vao.render()
+        self.app.mesh.vao.arena.flush() # draws are only recorded until here
         if not self.isSceneInit:
             self.resize() 
         
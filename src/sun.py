@@ -6,7 +6,8 @@ import zengl
 import webcolors
 
 from typing import TYPE_CHECKING
-from src.planet_manager import PlanetManager
+from src.planet_manager import PlanetManager, camera_zoom
+from src.planet_renderer import PlanetRenderer
 # from vbo import InstancingVBO
 
 if TYPE_CHECKING:
@@ -31,36 +32,13 @@ class Sun:
         self.planet_manager = PlanetManager(self, self.app)
         self.init_uniforms()
 
-        self.vao = app.mesh.vao.get_vao(
-            fbo=self.app.mesh.vao.Framebuffers.framebuffers["default"],
-            program=self.app.mesh.vao.program.programs["planet"],
-            vbo=self.app.mesh.vao.vbo.vbos["plane"],
-            umap=self.u_type_mapping,
-            tmap=["T_planet", "T_planetNormal", "T_planetUV"],  # texture map
-        )
-        app.mesh.vao.vaos['suni'] = self.vao
+        # every body on screen in one draw, not just the closest one
+        self.renderer = PlanetRenderer(app, self.planet_manager.table, self.u_type_mapping)
+        self.vao = self.renderer.vao
         self.update_uniforms(self.uniforms)
 
-        self.tex0 = app.mesh.texture.textures["sun"]
-        self.vao.texture_bind(0, "T_planet", self.tex0)
-
-        self.tex1 = app.mesh.texture.textures["uv"]
-        self.vao.texture_bind(1, "T_planetUV", self.tex1)
-
-        self.tex2 = app.mesh.texture.textures["normal"]
-        self.vao.texture_bind(2, "T_planetNormal", self.tex2)
-
-    def update_planet_tex(self, planet_name):
-        try:
-            texs = self.app.mesh.texture.textures
-            texs["sun"] = self.planet_manager.planet_textures[planet_name]
-            # self.tex0 = texs["sun"]
-            self.vao.texture_bind(0, "T_planet", texs["sun"])
-        except:
-            print("ğ")
-
     def init_uniforms(self):
-        self.uniforms = self.planet_manager.get_uniforms()
+        self.uniforms = self.planet_manager.uniforms
         self.u_type_mapping = {
             key: val["glsl_type"] for key, val in self.uniforms.items()
         }
@@ -76,10 +54,9 @@ class Sun:
         self.render()
 
     def render(self):
-        # self.init_uniforms()
-        self.vao.render()
+        zoom = camera_zoom(self.app.camera) # the camera's height, bodies get smaller (and cheaper) zoomed out
+        centers, ids = self.planet_manager.get_visible_bodies(zoom)
+        self.renderer.render(centers, zoom, ids, self.planet_manager.get_lods(ids, zoom))
         
     def destroy(self):
-        self.app.mesh.vao.del_vao('suni')
-        for tex in self.planet_manager.planet_textures:
-            self.ctx.release(tex) # let em be freeeeeeee
\ No newline at end of file
+        self.renderer.destroy() # the body table's textures stay, the planet scene uses them too
\ No newline at end of file
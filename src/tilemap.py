@@ -1,8 +1,70 @@
+from typing import TYPE_CHECKING
 import numpy as np
 import glm
-import struct
 import json
+import time
 from engine.vbo import InstancingVBO
+from src.tilemap_file import TileLayers, load_cached
+from src.collision import CollisionGrid
+
+if TYPE_CHECKING:
+    import zengl
+
+MAP_JSON = "file.json"
+MAP_BINARY = "file.tmap" # made from the json on first load, used instead of it until the json changes
+
+
+def report_load(path:str, tiles:int, seconds:float): # keep an eye on this when maps get big
+    print(f"{path}: {tiles} tiles in {seconds * 1000:.1f} ms ({tiles / max(seconds, 1e-9):,.0f} tiles/s)")
+
+CHUNK_SIZE = 16 # tiles per chunk side
+CULL_MARGIN = 32 # world units added around the camera rect, covers the layer depth offsets
+
+
+class TileChunks:
+    """Splits a tilemap instance array into CHUNK_SIZE x CHUNK_SIZE chunks, each one a contiguous
+    sub-range with a world AABB, and only keeps the chunks the camera sees in the instance buffer."""
+    def __init__(self, app, block_arr:np.ndarray, buffer:"zengl.Buffer", tile_size:int):
+        self.app = app
+        self.buffer = buffer
+
+        # stable sort by chunk so every chunk is one run of instances (and layers keep their order)
+        keys = np.floor(block_arr[:, :2] / CHUNK_SIZE).astype("i4")
+        chunk_keys, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        self.block_arr = np.ascontiguousarray(block_arr[order])
+        self.chunk_keys = chunk_keys
+        self.counts = counts
+        self.starts = np.cumsum(counts) - counts
+
+        # instance xy is in tiles, the map's m_model puts the quad at +-half a tile around xy * tile_size
+        centers = self.block_arr[:, :2] * tile_size
+        self.aabbs = np.empty((len(counts), 4), dtype="f4") # min x, min y, max x, max y
+        self.aabbs[:, :2] = np.minimum.reduceat(centers, self.starts) - tile_size / 2
+        self.aabbs[:, 2:] = np.maximum.reduceat(centers, self.starts) + tile_size / 2
+
+        self.visible:np.ndarray = None
+        self.count = 0
+
+    def cull(self) -> int:
+        # returns how many instances to draw, re-uploads only when a chunk comes in or out of view
+        lo, hi = self.app.camera.get_visible_rect()
+        visible = (
+            (self.aabbs[:, 0] <= hi.x + CULL_MARGIN) & (self.aabbs[:, 2] >= lo.x - CULL_MARGIN) &
+            (self.aabbs[:, 1] <= hi.y + CULL_MARGIN) & (self.aabbs[:, 3] >= lo.y - CULL_MARGIN)
+        )
+        if self.visible is not None and np.array_equal(visible, self.visible):
+            return self.count
+        self.visible = visible
+
+        starts, counts = self.starts[visible], self.counts[visible]
+        self.count = int(counts.sum())
+        if self.count:
+            # instance indices of every visible chunk, back to back
+            index = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(self.count)
+            self.buffer.write(self.block_arr[index])
+        return self.count
+
 
 class TilemapForTrashDrivers:
     def __init__(self, app, tile_size=16):
@@ -37,41 +99,35 @@ class TilemapForTrashDrivers:
         self.str_dict = str_dict
             
             
-        with open(f"file.json") as file:
-            self.tilemap = json.load(file)
-            self.app.share_data['tilemap'] = self
-            self.app.camera.freemove = False
+        self.app.share_data['tilemap'] = self
+        self.app.camera.freemove = False
+        load_start = time.perf_counter()
+        self.map_file, self.tilemap = load_cached(MAP_JSON, MAP_BINARY) # TileLayers only builds the "x;y" dicts someone asks for
+        self.MAPSIZE = len(self.map_file)
 
         self.offgrid_tiles = []
 
-        self.MAPSIZE = sum([len(tilemap_i) for tilemap_i in self.tilemap.values()])
         self.size = self.MAPSIZE + 256
 
         self.block_arr = np.zeros((self.size, 4), dtype="f4")
-        
-        giga_i = 0        
-        for index, tilemap_i in reversed(self.tilemap.items()):
-            for j in tilemap_i.items():
-                key = j[0].split(";")
-                print(key, int(index))
-                self.block_arr[giga_i] = [int(key[0]), -int(key[1]), self.str_dict[str(j[1][4])], int(index)*0.1 ]
-                giga_i += 1
+        self.map_file.fill_instances(self.block_arr, self.str_dict)
+        self.collision = CollisionGrid.from_map_file(self.map_file, "0", tile_size) # what RigidBody collides with
+        report_load(MAP_BINARY if isinstance(self.tilemap, TileLayers) else MAP_JSON, self.MAPSIZE, time.perf_counter() - load_start)
 
         self.block_arr.reshape((self.size, 4))
         self.buffer = self.ctx.buffer(self.block_arr)
 
+        self.chunks = TileChunks(app, self.block_arr[:self.MAPSIZE], self.buffer, tile_size)
         self.ibo = InstancingVBO(self.ctx, self.buffer, "4f", "posOffset", offset=2)
         self.app.mesh.vao.vbo.vbos["mapIbo"] = self.ibo
 
         self.vao = app.mesh.vao.get_ins_vao(
             fbo=self.app.mesh.vao.Framebuffers.framebuffers["default"],
-            program=self.app.mesh.vao.program.programs["tilemap"],
+            program=self.app.mesh.vao.program.programs["tilemap"], # everything lives in the one array, no DECOR
             vbo=self.app.mesh.vao.vbo.vbos["plane"],
             ibo=self.ibo,
             umap={
                 "m_model": "mat4",
-                "m_view": "mat4",
-                "decor": "int",
             },
             tmap=["Tiles"],
         )
@@ -86,17 +142,14 @@ class TilemapForTrashDrivers:
 
         self.m_model = self.get_model_matrix()
         self.vao.uniform_bind("m_model", self.m_model.to_bytes())
-        self.vao.uniform_bind("decor", decorMax)
         self.decorMax = decorMax
         self.app.camera.position.z = 120
 
     def update(self):
         self.vao.texture_bind(0, "Tiles", self.tex0)
-        self.vao.uniform_bind(
-            "m_view",
-            (self.app.camera.m_proj * self.app.camera.m_view * self.m_model).to_bytes(),
-        )
-        self.vao.render(instance_count=self.MAPSIZE)
+        count = self.chunks.cull()
+        if count:
+            self.vao.render(instance_count=count)
 
     def get_model_matrix(self):
         m_model = glm.mat4()
@@ -148,41 +201,35 @@ class Tilemap:
         self.j = j
             
             
-        with open(f"file.json") as file:
-            self.tilemap = json.load(file)
-            self.app.share_data['tilemap'] = self
-            self.app.camera.freemove = False
+        self.app.share_data['tilemap'] = self
+        self.app.camera.freemove = False
+        load_start = time.perf_counter()
+        self.map_file, self.tilemap = load_cached(MAP_JSON, MAP_BINARY) # TileLayers only builds the "x;y" dicts someone asks for
+        self.MAPSIZE = len(self.map_file)
 
         self.offgrid_tiles = []
 
-        self.MAPSIZE = sum([len(tilemap_i) for tilemap_i in self.tilemap.values()])
         self.size = self.MAPSIZE + 256
 
         self.block_arr = np.zeros((self.size, 4), dtype="f4")
-        
-        giga_i = 0        
-        for index, tilemap_i in reversed(self.tilemap.items()):
-            for j in tilemap_i.items():
-                key = j[0].split(";")
-                print(key, int(index))
-                self.block_arr[giga_i] = [int(key[0]), -int(key[1]), self.str_dict[str(j[1][4])], int(index)*0.1 ]
-                giga_i += 1
+        self.map_file.fill_instances(self.block_arr, self.str_dict)
+        self.collision = CollisionGrid.from_map_file(self.map_file, "0", tile_size) # what RigidBody collides with
+        report_load(MAP_BINARY if isinstance(self.tilemap, TileLayers) else MAP_JSON, self.MAPSIZE, time.perf_counter() - load_start)
 
         self.block_arr.reshape((self.size, 4))
         self.buffer = self.ctx.buffer(self.block_arr)
 
+        self.chunks = TileChunks(app, self.block_arr[:self.MAPSIZE], self.buffer, tile_size)
         self.ibo = InstancingVBO(self.ctx, self.buffer, "4f", "posOffset", offset=2)
         self.app.mesh.vao.vbo.vbos["mapIbo"] = self.ibo
 
         self.vao = app.mesh.vao.get_ins_vao(
             fbo=self.app.mesh.vao.Framebuffers.framebuffers["default"],
-            program=self.app.mesh.vao.program.programs["tilemap"],
+            program=self.app.mesh.vao.program.get_program("tilemap", defines={"DECOR": decorMax}), # first layer id that samples Decor
             vbo=self.app.mesh.vao.vbo.vbos["plane"],
             ibo=self.ibo,
             umap={
                 "m_model": "mat4",
-                "m_view": "mat4",
-                "decor": "int",
             },
             tmap=["Tiles", "Decor"],
         )
@@ -200,16 +247,13 @@ class Tilemap:
 
         self.m_model = self.get_model_matrix()
         self.vao.uniform_bind("m_model", self.m_model.to_bytes())
-        self.vao.uniform_bind("decor", self.j-decorMax+1)
         self.decorMax = decorMax
         self.app.camera.position.z = 120
 
     def update(self):
-        self.vao.uniform_bind(
-            "m_view",
-            (self.app.camera.m_proj * self.app.camera.m_view * self.m_model).to_bytes(),
-        )
-        self.vao.render(instance_count=self.MAPSIZE)
+        count = self.chunks.cull()
+        if count:
+            self.vao.render(instance_count=count)
 
     def get_model_matrix(self):
         m_model = glm.mat4()
@@ -0,0 +1,194 @@
+"""Binary tilemap format, same data as file.json without the per tile python objects.
+
+Layout (little endian):
+    b"TMAP", uint32 version, uint32 header size
+    utf-8 json header: {"types": [tile, ...], "layers": [[name, tile count], ...], "source": sha1 of the json it was made from}
+    zero padding up to a 16 byte boundary
+    every layer's tiles back to back, TILE_DTYPE records (int32 x, int32 y, uint16 type id)
+
+"types" is the interned table of every distinct tile value in the json ([type, solid, flips, size, name]),
+the tiles only store the index into it.
+
+The .tmap is a cache of the json: load_cached() only uses it while "source" still matches the json and
+rebuilds it otherwise, so editing file.json is enough.
+
+Converting:
+    python -m src.tilemap_file file.json file.tmap
+    python -m src.tilemap_file file.tmap file.json
+"""
+from typing import Dict, List, Tuple
+import argparse
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+
+MAGIC = b"TMAP"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+TILE_DTYPE = np.dtype([("x", "<i4"), ("y", "<i4"), ("type", "<u2")])
+
+
+class TileLayers(dict):
+    """layer name -> {"x;y": tile} like json.load(file.json) gives, each layer only built when asked for"""
+    def __init__(self, map_file:"TilemapFile"):
+        super().__init__()
+        self.map_file = map_file
+
+    def __missing__(self, name:str) -> Dict[str, list]:
+        layer = self.map_file.layer_dict(name)
+        self[name] = layer
+        return layer
+
+
+class TilemapFile:
+    def __init__(self, types:List[list], layers:Dict[str, np.ndarray], source:str=None):
+        if len(types) > np.iinfo(TILE_DTYPE["type"]).max + 1:
+            raise ValueError(f"{len(types)} tile types don't fit in a uint16 type id")
+        self.types = types
+        self.layers = layers # name -> TILE_DTYPE array, keeps the json's layer order
+        self.source = source # sha1 of the json this came from, None == unknown
+
+    def __len__(self) -> int:
+        return sum(len(tiles) for tiles in self.layers.values())
+
+    @classmethod
+    def from_dict(cls, tilemap:Dict[str, Dict[str, list]], source:str=None) -> "TilemapFile":
+        types:List[list] = []
+        type_ids:Dict[str, int] = {} # repr of a tile value -> its index in types
+        layers = {}
+
+        for name, tiles in tilemap.items():
+            layer = np.empty(len(tiles), dtype=TILE_DTYPE)
+            if tiles:
+                coords = np.array(";".join(tiles).split(";"), dtype="i4").reshape(-1, 2) # every "x;y" key in one parse
+                layer["x"] = coords[:, 0]
+                layer["y"] = coords[:, 1]
+
+                tile_keys = list(map(repr, tiles.values()))
+                for tile_key, tile in dict(zip(tile_keys, tiles.values())).items():
+                    if tile_key not in type_ids:
+                        type_ids[tile_key] = len(types)
+                        types.append(tile)
+                layer["type"] = np.fromiter(map(type_ids.__getitem__, tile_keys), dtype="u2", count=len(tile_keys))
+            layers[name] = layer
+
+        return cls(types, layers, source)
+
+    @classmethod
+    def from_json(cls, path:str) -> "TilemapFile":
+        with open(path, "rb") as file:
+            data = file.read()
+        return cls.from_dict(json.loads(data), source_hash(data))
+
+    @classmethod
+    def load(cls, path:str, mmap:bool=True) -> "TilemapFile":
+        with open(path, "rb") as file:
+            magic, version, header_size = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} tilemap file")
+            header = json.loads(file.read(header_size))
+            data_offset = cls.data_offset(header_size)
+            count = sum(layer_count for _, layer_count in header["layers"])
+
+            if mmap:
+                tiles = np.memmap(path, dtype=TILE_DTYPE, mode="r", offset=data_offset, shape=(count,))
+            else:
+                file.seek(data_offset)
+                tiles = np.fromfile(file, dtype=TILE_DTYPE, count=count)
+
+        layers = {}
+        start = 0
+        for name, layer_count in header["layers"]:
+            layers[name] = tiles[start:start + layer_count]
+            start += layer_count
+        return cls(header["types"], layers, header.get("source"))
+
+    @staticmethod
+    def data_offset(header_size:int) -> int:
+        return (HEADER.size + header_size + 15) // 16 * 16
+
+    def save(self, path:str):
+        header = json.dumps({
+            "types": self.types,
+            "layers": [[name, len(tiles)] for name, tiles in self.layers.items()],
+            "source": self.source,
+        }).encode("utf-8")
+
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(header)))
+            file.write(header)
+            file.write(bytes(self.data_offset(len(header)) - HEADER.size - len(header)))
+            for tiles in self.layers.values():
+                file.write(np.ascontiguousarray(tiles, dtype=TILE_DTYPE).tobytes())
+
+    def layer_dict(self, name:str) -> Dict[str, list]:
+        # tiles with the same value share the one list from the type table, don't edit them in place
+        tiles = self.layers[name]
+        return {f"{x};{y}": self.types[t] for x, y, t in zip(tiles["x"].tolist(), tiles["y"].tolist(), tiles["type"].tolist())}
+
+    def to_dict(self) -> Dict[str, Dict[str, list]]:
+        return {name: self.layer_dict(name) for name in self.layers}
+
+    def save_json(self, path:str):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+    def fill_instances(self, block_arr:np.ndarray, str_dict:Dict[str, int]) -> int:
+        # tilemap instance rows (x, -y, texture layer, depth), layers in reverse like the json loop did
+        texture_layers = np.array([str_dict[str(tile[4])] for tile in self.types], dtype="f4")
+        start = 0
+        for name, tiles in reversed(self.layers.items()):
+            rows = block_arr[start:start + len(tiles)]
+            rows[:, 0] = tiles["x"]
+            rows[:, 1] = -tiles["y"]
+            rows[:, 2] = texture_layers[tiles["type"]]
+            rows[:, 3] = int(name) * 0.1
+            start += len(tiles)
+        return start
+
+
+def source_hash(data:bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def load_cached(json_path:str, binary_path:str) -> Tuple[TilemapFile, Dict[str, Dict[str, list]]]:
+    # (map file, "x;y" layer dicts), from binary_path while it was made from the json as it is now.
+    # Otherwise from the json, and binary_path gets rewritten for next time
+    data = None
+    if os.path.exists(json_path):
+        with open(json_path, "rb") as file:
+            data = file.read()
+
+    if os.path.exists(binary_path):
+        map_file = TilemapFile.load(binary_path)
+        if data is None or map_file.source == source_hash(data): # no json == the .tmap is all there is
+            return map_file, TileLayers(map_file)
+
+    if data is None:
+        raise FileNotFoundError(json_path)
+    tilemap = json.loads(data)
+    map_file = TilemapFile.from_dict(tilemap, source_hash(data))
+    try:
+        map_file.save(binary_path)
+    except OSError: # read only (web), the json works, just slower
+        pass
+    return map_file, tilemap
+
+
+def convert(src:str, dst:str):
+    map_file = TilemapFile.from_json(src) if src.endswith(".json") else TilemapFile.load(src)
+    if dst.endswith(".json"):
+        map_file.save_json(dst)
+    else:
+        map_file.save(dst)
+    print(f"{src} -> {dst}: {len(map_file)} tiles, {len(map_file.types)} tile types")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert tilemaps between json and the binary .tmap format")
+    parser.add_argument("src", help="file.json or file.tmap")
+    parser.add_argument("dst", help="output, the extension picks the format")
+    args = parser.parse_args()
+    convert(args.src, args.dst)
@@ -0,0 +1,63 @@
+import numpy as np
+
+from src.broadphase import SpatialHash, CELL_SIZE, HASH_X, HASH_Y
+
+
+def brute_force(pos, size) -> set:
+    # every pair whose AABBs overlap, same strict test as pg.Rect.colliderect
+    n = len(pos)
+    a, b = np.triu_indices(n, 1)
+    hit = np.all((pos[a] < pos[b] + size[b]) & (pos[a] + size[a] > pos[b]), axis=1)
+    return set(zip(a[hit].tolist(), b[hit].tolist()))
+
+
+def pairs_of(spatial_hash, pos, size) -> set:
+    spatial_hash.build(pos, size)
+    pairs = spatial_hash.overlaps(pos, size)
+    assert np.all(pairs[:, 0] < pairs[:, 1])
+    assert len(np.unique(pairs, axis=0)) == len(pairs) # no pair twice, even when it shares several cells
+    return set(map(tuple, pairs.tolist()))
+
+
+def test_overlaps_match_brute_force():
+    rng = np.random.default_rng(0)
+    spatial_hash = SpatialHash()
+    for n in (0, 1, 2, 50, 500, 2000):
+        pos = ((rng.random((n, 2)) - 0.5) * 1000).astype("f4") # negative cells too
+        size = (rng.random((n, 2)) * 40 + 1).astype("f4") # some bigger than a cell
+        assert pairs_of(spatial_hash, pos, size) == brute_force(pos, size)
+
+
+def test_bodies_on_cell_edges():
+    # corners and edges exactly on cell borders, touching boxes don't overlap, boxes across a border do
+    rng = np.random.default_rng(1)
+    spatial_hash = SpatialHash()
+    pos = (rng.integers(-20, 20, (400, 2)) * CELL_SIZE / 2).astype("f4")
+    size = (rng.integers(1, 5, (400, 2)) * CELL_SIZE / 2).astype("f4")
+    assert pairs_of(spatial_hash, pos, size) == brute_force(pos, size)
+
+    pos = np.array([[0, 0], [CELL_SIZE, 0], [CELL_SIZE - 1, 0], [0, -CELL_SIZE]], dtype="f4")
+    size = np.full((4, 2), CELL_SIZE, dtype="f4")
+    assert pairs_of(spatial_hash, pos, size) == {(0, 2), (1, 2)}
+
+
+def test_bucket_collisions_are_not_overlaps():
+    # two far apart cells that land in the same bucket: candidates, but not overlapping
+    spatial_hash = SpatialHash()
+    table_size = 4 # what build() picks for 2 bodies in one cell each
+    bucket = lambda cx, cy: int((np.int64(cx) * HASH_X ^ np.int64(cy) * HASH_Y) & (table_size - 1))
+    other = next((cx, 0) for cx in range(2, 100) if bucket(cx, 0) == bucket(0, 0))
+    pos = np.array([[0, 0], [other[0] * CELL_SIZE, 0]], dtype="f4")
+    size = np.full((2, 2), 8, dtype="f4")
+
+    spatial_hash.build(pos, size)
+    assert spatial_hash.candidates().tolist() == [[0, 1]]
+    assert len(spatial_hash.overlaps(pos, size)) == 0
+
+    # bodies spanning up to 10x10 cells, lots of candidates share a bucket without overlapping
+    rng = np.random.default_rng(2)
+    pos = (rng.random((300, 2)) * 20000).astype("f4")
+    size = (rng.random((300, 2)) * 300 + 1).astype("f4")
+    spatial_hash.build(pos, size)
+    assert len(spatial_hash.candidates()) > len(brute_force(pos, size))
+    assert pairs_of(spatial_hash, pos, size) == brute_force(pos, size)
@@ -0,0 +1,179 @@
+import os
+import types
+import numpy as np
+import pytest
+
+from src.collision import CollisionGrid
+from src.particles import ParticleSystem, RADIUS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RecordingContext:
+    # the real zengl context, but remembers what got released
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.released = []
+
+    def release(self, obj):
+        self.released.append(obj)
+        self.ctx.release(obj)
+
+    def __getattr__(self, name):
+        return getattr(self.ctx, name)
+
+
+@pytest.fixture(scope="module")
+def app():
+    zengl = pytest.importorskip("zengl")
+    egl = pytest.importorskip("glcontext.egl")
+    try:
+        gl = egl.create_context(mode="standalone", glversion=330)
+    except Exception as error:
+        pytest.skip(f"no headless GL context: {error}")
+    zengl.init(types.SimpleNamespace(load_opengl_function=gl.load_opengl_function))
+
+    import pygame
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1)) # Textures converts its surfaces
+
+    from engine.mesh import Mesh
+    cwd = os.getcwd()
+    os.chdir(ROOT) # textures and shaders load from relative paths
+    app = types.SimpleNamespace(ctx=RecordingContext(zengl.context()))
+    app.mesh = Mesh(app)
+    os.chdir(cwd)
+    return app
+
+
+def test_growing_a_batch_keeps_other_vaos_drawing(app):
+    vaos = app.mesh.vao
+    nul_img = app.mesh.texture.textures["NUL_IMG"]
+    fbo = vaos.Framebuffers.framebuffers["default"]
+    vaos.frame["viewProj"] = np.eye(4) # particles in clip space
+
+    grown = ParticleSystem(app, capacity=4)
+    other = ParticleSystem(app, capacity=4)
+    grown.emit((0, 0))
+    grown.render() # makes the VAO
+    vaos.arena.flush()
+    grown.kill(grown.ids[:1])
+    grown.compact()
+    vao = grown.vao
+    grown.emit(np.full((16, 2), -0.5), radius=0.1, color=(0, 1, 0, 1)) # past its capacity
+    other.emit((0.5, 0.5), radius=0.1, color=(1, 0, 0, 1))
+
+    assert grown.vao is vao
+    assert len(grown.data) >= 16 and grown.ibo.vbo.size >= grown.data.nbytes
+    assert not any(obj is nul_img for obj in app.ctx.released)
+
+    vaos.new_frame()
+    fbo.image_out[0].clear()
+    fbo.depth_out.clear()
+    grown.render()
+    other.render()
+    vaos.arena.flush()
+
+    width, height = fbo.image_out[0].size
+    pixels = np.frombuffer(fbo.image_out[0].read(), dtype=np.uint8).reshape(height, width, 4)
+    assert tuple(pixels[height * 3 // 4, width * 3 // 4, :3]) == (255, 0, 0)
+    assert tuple(pixels[height // 4, width // 4, :3]) == (0, 255, 0)
+
+    grown.destroy()
+    other.destroy()
+    assert not any(obj is nul_img for obj in app.ctx.released)
+
+
+# the rest is plain numpy, no GL context needed until render()
+
+def headless(**kwargs) -> ParticleSystem:
+    return ParticleSystem(types.SimpleNamespace(ctx=None), **kwargs)
+
+
+def tagged(system, ids):
+    # every particle's radius is its id, to see which row ended up where
+    system.data[system.slot_of[ids], RADIUS] = ids
+
+
+def check_ids(system):
+    alive = system.ids[:system.count]
+    free = system.free[:system.free_count]
+    assert np.array_equal(system.slot_of[alive], np.arange(system.count))
+    assert np.array_equal(system.data[:system.count, RADIUS], alive) # rows moved with their ids
+    assert np.all(np.delete(system.slot_of, alive) == -1)
+    assert sorted(np.concatenate([alive, free]).tolist()) == list(range(len(system.data))) # every id exactly once
+
+
+def test_kill_and_compact_keep_ids():
+    system = headless(capacity=8)
+    ids = system.emit(np.zeros((5, 2)))
+    assert ids.tolist() == [0, 1, 2, 3, 4]
+    tagged(system, ids)
+
+    system.kill([1, 3])
+    assert system.count == 5 # only marked, compact() removes them
+    system.compact()
+    assert system.count == 3 and system.slot_of[1] == system.slot_of[3] == -1
+    check_ids(system)
+
+    system.kill([1, 4, 4]) # dead and duplicate ids are fine
+    system.compact()
+    assert sorted(system.ids[:system.count].tolist()) == [0, 2]
+    check_ids(system)
+
+    again = system.emit(np.zeros((3, 2)))
+    assert sorted(again.tolist()) == [1, 3, 4] # freed ids get reused before unused ones
+    tagged(system, again)
+    check_ids(system)
+
+
+def test_ids_survive_random_emits_kills_and_growing():
+    rng = np.random.default_rng(0)
+    system = headless(capacity=4)
+    for _ in range(300):
+        tagged(system, system.emit(np.zeros((int(rng.integers(0, 6)), 2))))
+        alive = system.ids[:system.count]
+        system.kill(alive[rng.random(len(alive)) < 0.3])
+        if rng.random() < 0.5:
+            system.data[:system.count, 4] -= rng.random(system.count) # some die of old age too
+        system.compact()
+        check_ids(system)
+    assert len(system.data) > 4
+
+
+def floor_grid() -> CollisionGrid:
+    grid = CollisionGrid(16)
+    grid.fill(np.arange(-8, 9), np.zeros(17), True) # y 0..16 is solid
+    grid.fill(np.full(4, 8), np.arange(1, 5), True) # wall at x 128
+    return grid
+
+
+def test_particles_slide_along_the_floor():
+    system = headless(grid=floor_grid(), gravity=500, bounce=0.3, friction=5.0)
+    system.emit((0, 20), velocity=(50, -100), life=10, radius=2)
+    for _ in range(30):
+        system.step(1 / 60)
+    x, y, vx, vy = system.data[0, :4]
+    assert y == pytest.approx(18, abs=0.5) # resting on the floor
+    assert 50 * 0.3 < vx < 49 # slowed down by friction, but not scaled by `bounce` on every touch
+    assert x > 20
+
+
+def test_particles_bounce_off_walls_and_keep_falling():
+    system = headless(grid=floor_grid(), gravity=500, bounce=0.3)
+    system.emit((120, 60), velocity=(600, -60), life=10, radius=2)
+    system.step(1 / 60)
+    x, y, vx, vy = system.data[0, :4]
+    assert x == 126 and vx == pytest.approx(-180) # pushed out of the wall, bounced back
+    assert vy == pytest.approx(-60 * np.exp(-5 / 60) - 500 / 60) # still falling, only friction along the wall
+
+
+def test_particles_spawned_in_a_tile_get_pushed_out():
+    system = headless(grid=floor_grid())
+    system.emit((4, 8), life=10, radius=2) # inside the floor
+    system.step(1 / 60)
+    assert system.data[0, 1] == 18 # on top of it
+    for _ in range(10):
+        system.step(1 / 60)
+    assert system.data[0, 1] == pytest.approx(18, abs=0.5)
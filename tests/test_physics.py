@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+pg = pytest.importorskip("pygame")
+pytest.importorskip("glm")
+
+from src.collision import CollisionGrid
+from src.physics import PhysicsWorld, BOTTOM, TOP, LEFT, RIGHT, step_bodies
+from src.player import RigidBody
+
+DT = 1 / 60
+FLAGS = {"bottom": BOTTOM, "top": TOP, "left": LEFT, "right": RIGHT}
+
+
+def random_grid(rng, size=40, fill=0.2):
+    # a walled box with random solid tiles (and a few slippery ones) inside, solid is [y, x]
+    gx, gy = np.meshgrid(np.arange(size), np.arange(size))
+    solid = rng.random((size, size)) < fill
+    solid[[0, -1], :] = solid[:, [0, -1]] = True
+    grid = CollisionGrid(16)
+    grid.fill(gx.ravel(), gy.ravel(), solid.ravel(), np.where(rng.random(size * size) < 0.2, 0.25, 1.0).astype("f4"))
+    return grid, solid
+
+
+def random_bodies(rng, solid, n):
+    # boxes up to a tile big, each in a free cell so nothing starts inside a wall
+    free = np.argwhere(~solid)
+    cells = free[rng.integers(len(free), size=n)]
+    size = rng.uniform(4, 16, (n, 2)).astype("f4")
+    pos = ((cells[:, ::-1] * 16) + rng.random((n, 2)) * (16 - size)).astype("f4")
+    vel = rng.uniform(-400, 400, (n, 2)).astype("f4")
+    return pos, size, vel
+
+
+def test_step_matches_apply_physics():
+    rng = np.random.default_rng(1)
+    grid, solid = random_grid(rng)
+    pos, size, vel = random_bodies(rng, solid, 500)
+
+    world = PhysicsWorld(grid, capacity=16) # grows while adding
+    bodies = []
+    for p, s, v in zip(pos, size, vel):
+        world.add(p, s, v)
+        body = RigidBody()
+        body.rect = pg.FRect(*p.tolist(), *s.tolist())
+        body.velocity[0], body.velocity[1] = v.tolist()
+        body.move = 0 # only read for the wall jump coyote time
+        bodies.append(body)
+
+    hits = 0
+    for _ in range(200):
+        world.step(DT)
+        hits += np.count_nonzero(world.flags[:world.count])
+        for body in bodies:
+            body.apply_physics(grid, DT)
+
+        expected_pos = np.array([(body.rect.x, body.rect.y) for body in bodies])
+        expected_vel = np.array([tuple(body.velocity) for body in bodies])
+        expected_flags = np.array([sum(flag for key, flag in FLAGS.items() if body.collision_types[key]) for body in bodies])
+        np.testing.assert_allclose(world.pos[:world.count], expected_pos, atol=1e-2)
+        np.testing.assert_allclose(world.vel[:world.count], expected_vel, atol=1e-2)
+        np.testing.assert_array_equal(world.flags[:world.count], expected_flags)
+    assert hits > 10000 # plenty of walls, floors and ceilings got hit
+
+
+def test_bodies_land_on_the_floor():
+    grid = CollisionGrid(16)
+    grid.fill(np.arange(-4, 5), np.zeros(9), True)
+    world = PhysicsWorld(grid)
+    world.add((0, 40), (8, 8))
+    landed = False
+    for _ in range(120):
+        world.step(DT)
+        landed |= world.flags[0] == BOTTOM
+    # resting bodies sink into the floor and get pushed back out every other tick, like the player does
+    assert landed and world.pos[0, 0] == 0
+    assert world.pos[0, 1] == pytest.approx(16, abs=0.1) and abs(world.vel[0, 1]) < 10
+
+
+def test_step_bodies_takes_strided_views():
+    # the same bodies as columns of one float array, the way ParticleSystem keeps them
+    rng = np.random.default_rng(2)
+    grid, solid = random_grid(rng)
+    pos, size, vel = random_bodies(rng, solid, 200)
+    world = PhysicsWorld(grid)
+    for p, s, v in zip(pos, size, vel):
+        world.add(p, s, v, elasticity=(0.3, 0.3), friction=(2, 2), drag=(0, 0))
+    data = np.zeros((200, 6), dtype="f4")
+    data[:, 0:2], data[:, 2:4] = pos, vel
+
+    for _ in range(60):
+        world.step(DT)
+        step_bodies(grid, data[:, 0:2], data[:, 2:4], size, (0.3, 0.3), (2, 2), (0, 0), DT)
+
+    np.testing.assert_array_equal(data[:, 0:2], world.pos[:200])
+    np.testing.assert_array_equal(data[:, 2:4], world.vel[:200])
+    assert not data[:, 4:].any()
+
+
+def test_remove_swaps_the_last_body_in():
+    world = PhysicsWorld(CollisionGrid(16))
+    for i in range(4):
+        world.add((i, 0), (1, 1))
+    assert world.remove(1) == 3
+    assert world.count == 3 and world.pos[1, 0] == 3
+    assert world.remove(2) == -1
+    world.remove_where(np.array([True, False]))
+    assert world.count == 1 and world.pos[0, 0] == 3
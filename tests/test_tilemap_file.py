@@ -0,0 +1,94 @@
+import json
+import numpy as np
+import pytest
+
+from src.tilemap_file import TilemapFile, TileLayers, load_cached, source_hash
+
+TILEMAP = {
+    "-1": {
+        "54;4": [2, False, [False, False], [32, 32], 0],
+        "52;6": [2, False, [False, False], [32, 32], "AlbaseeBG4"],
+    },
+    "0": {
+        "51;9": [1, True, [False, False], [32, 32], "Albasee1"],
+        "51;10": [1, True, [False, False], [32, 32], "Albasee5"],
+        "-3;-7": [1, True, [True, False], [32, 32], "Albasee1"], # same value as 51;9 but flipped
+        "52;9": [1, True, [False, False], [32, 32], "Albasee1"],
+    },
+    "1": {},
+}
+
+
+def write_json(path, tilemap) -> bytes:
+    data = json.dumps(tilemap).encode("utf-8")
+    path.write_bytes(data)
+    return data
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip(tmp_path, mmap):
+    map_file = TilemapFile.from_dict(TILEMAP, "abc")
+    assert len(map_file) == 6 and len(map_file.types) == 5 # equal tiles share a type
+    assert list(map_file.layers) == ["-1", "0", "1"]
+
+    map_file.save(tmp_path / "map.tmap")
+    loaded = TilemapFile.load(tmp_path / "map.tmap", mmap=mmap)
+    assert loaded.source == "abc"
+    assert loaded.types == map_file.types
+    for name, tiles in map_file.layers.items():
+        assert np.array_equal(loaded.layers[name], tiles)
+    assert loaded.to_dict() == TILEMAP
+    assert list(loaded.to_dict()["0"]) == list(TILEMAP["0"]) # tile order too
+
+    loaded.save_json(tmp_path / "map.json")
+    assert json.loads((tmp_path / "map.json").read_text()) == TILEMAP
+
+
+def test_lazy_layers():
+    layers = TileLayers(TilemapFile.from_dict(TILEMAP))
+    assert len(layers) == 0
+    assert layers["0"] == TILEMAP["0"]
+    assert list(layers) == ["0"]
+
+
+def test_load_cached_writes_and_reuses_the_tmap(tmp_path):
+    json_path, tmap_path = tmp_path / "file.json", tmp_path / "file.tmap"
+    data = write_json(json_path, TILEMAP)
+
+    map_file, tilemap = load_cached(json_path, tmap_path)
+    assert tilemap == TILEMAP and not isinstance(tilemap, TileLayers) # parsed from the json
+    assert map_file.source == source_hash(data)
+    assert TilemapFile.load(tmap_path).source == source_hash(data)
+
+    map_file, tilemap = load_cached(json_path, tmap_path)
+    assert isinstance(tilemap, TileLayers) # from the .tmap this time
+    assert tilemap["-1"] == TILEMAP["-1"]
+
+
+def test_load_cached_rebuilds_a_stale_tmap(tmp_path):
+    json_path, tmap_path = tmp_path / "file.json", tmp_path / "file.tmap"
+    write_json(json_path, TILEMAP)
+    load_cached(json_path, tmap_path)
+
+    edited = {**TILEMAP, "1": {"0;0": [3, True, [False, False], [32, 32], "Albasee2"]}}
+    data = write_json(json_path, edited)
+    map_file, tilemap = load_cached(json_path, tmap_path)
+    assert tilemap == edited and not isinstance(tilemap, TileLayers)
+    assert map_file.to_dict() == edited
+
+    cached = TilemapFile.load(tmap_path)
+    assert cached.source == source_hash(data)
+    assert cached.to_dict() == edited
+
+
+def test_load_cached_without_the_json(tmp_path):
+    json_path, tmap_path = tmp_path / "file.json", tmp_path / "file.tmap"
+    write_json(json_path, TILEMAP)
+    load_cached(json_path, tmap_path)
+    json_path.unlink()
+    map_file, tilemap = load_cached(json_path, tmap_path) # the .tmap is all there is
+    assert map_file.to_dict() == TILEMAP
+
+    tmap_path.unlink()
+    with pytest.raises(FileNotFoundError):
+        load_cached(json_path, tmap_path)